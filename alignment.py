@@ -0,0 +1,178 @@
+from math import exp
+import numpy as np
+from utils import batch_word_similarity
+
+# 跳词惩罚
+GAP_PENALTY = 0.5
+
+# 页面中出现次数不超过该值的单词（或二元词组）才作为锚点
+MAX_ANCHOR_HITS = 4
+
+
+def _unique(tokens):
+    """去重并返回 (唯一值列表, 每个元素在唯一值列表中的序号)"""
+    positions = {}
+    inverse = np.empty(len(tokens), dtype=np.intp)
+    for k, t in enumerate(tokens):
+        inverse[k] = positions.setdefault(t, len(positions))
+    return list(positions), inverse
+
+
+def similarity_matrix(sent_tokens, page_tokens):
+    """计算句子单词与页面单词的相似度矩阵 (m × n)
+
+    只对去重后的单词计算，结果与逐个调用 calculate_word_similarity 完全相同。
+    """
+    sent_unique, sent_inv = _unique(sent_tokens)
+    page_unique, page_inv = _unique(page_tokens)
+
+    unique_sim = batch_word_similarity(sent_unique, page_unique)
+    return unique_sim[sent_inv][:, page_inv]
+
+
+class SimilarityTable:
+    """一批句子单词 × 页面单词区间 [lo, hi) 的相似度表
+
+    批量定位连续句子时只计算一次，各句在区间内的对齐窗口直接取子矩阵。
+    """
+
+    def __init__(self, sent_tokens, page_tokens, lo, hi):
+        self.lo, self.hi = lo, hi
+        sent_unique, _ = _unique(sent_tokens)
+        page_unique, self.page_inverse = _unique(page_tokens[lo:hi])
+        self.rows = {t: k for k, t in enumerate(sent_unique)}
+        self.table = batch_word_similarity(sent_unique, page_unique)
+
+    def covers(self, sent_tokens, lo, hi):
+        return self.lo <= lo and hi <= self.hi and all(t in self.rows for t in sent_tokens)
+
+    def matrix(self, sent_tokens, lo, hi):
+        """与 similarity_matrix(sent_tokens, page_tokens[lo:hi]) 的结果相同"""
+        rows = [self.rows[t] for t in sent_tokens]
+        return self.table[np.ix_(rows, self.page_inverse[lo - self.lo:hi - self.lo])]
+
+
+def spatial_scores(rects, avg_width, avg_height, segments=None):
+    """每个页面单词相对前一个单词的空间得分（只与页面单词有关）
+
+    返回长度为 n+1 的数组，下标与动态规划矩阵的列号 j 一致；j ≤ 1 时为1.0。
+    segments 为每个单词的分段（栏）编号：换栏后的第一个单词与前一个单词的位置无关，同样记为1.0。
+    """
+    scores = np.ones(len(rects) + 1)
+    for j in range(2, len(rects) + 1):
+        if segments is not None and segments[j - 1] != segments[j - 2]:
+            continue
+        prev_rect = rects[j - 2]
+        current_rect = rects[j - 1]
+        dx = abs(current_rect.x0 - prev_rect.x1)
+        dy = abs(current_rect.y0 - prev_rect.y0)
+        scores[j] = exp(-((dx / avg_width) ** 2 + (dy / avg_height) ** 2))
+    return scores
+
+
+def page_spatial_scores(index):
+    """页面文本索引对应的空间得分（每页只计算一次）"""
+    scores = index.derived.get("spatial")
+    if scores is None:
+        rects = [w["rect"] for w in index.merged]
+        scores = spatial_scores(rects, index.avg_width, index.avg_height, index.merged_segments)
+        index.derived["spatial"] = scores
+    return scores
+
+
+def find_anchors(sent_tokens, index):
+    """在页面中查找句子的锚点 [(句子单词序号, 页面单词序号)]
+
+    罕见单词直接作为锚点；常见单词与后一个单词组成二元词组，词组罕见时作为锚点。
+    """
+    positions = index.merged_positions
+    page_tokens = index.merged_cleaned
+    n = len(page_tokens)
+    anchors = []
+    for i, token in enumerate(sent_tokens):
+        hits = positions.get(token) if token else None
+        if not hits:
+            continue
+        if len(hits) > MAX_ANCHOR_HITS:
+            if i + 1 >= len(sent_tokens) or not sent_tokens[i + 1]:
+                continue
+            following = sent_tokens[i + 1]
+            hits = [j for j in hits if j + 1 < n and page_tokens[j + 1] == following]
+            if not hits or len(hits) > MAX_ANCHOR_HITS:
+                continue
+        anchors.extend((i, j) for j in hits)
+    return anchors
+
+
+def anchor_window(sent_tokens, index):
+    """根据锚点选取页面单词窗口 (lo, hi)，没有锚点时返回 None
+
+    锚点按对角线 (j - i) 聚类，取锚点最多（并列时最靠前）的一组。
+    句子总得分不超过 m，达到最低要求 m*0.5 的对齐最多跳过 m 个页面单词，
+    因此窗口向两侧各扩展 m 个单词即可容纳经过这些锚点的任何有效对齐。
+    """
+    anchors = find_anchors(sent_tokens, index)
+    if not anchors:
+        return None
+    m = len(sent_tokens)
+    tolerance = max(2, m // 4)
+
+    # 有序对角线上的滑动窗口：找出跨度不超过 2*tolerance 且锚点最多的一段
+    diagonals = sorted(j - i for i, j in anchors)
+    best_count, best_start = 0, 0
+    start = 0
+    for end, d in enumerate(diagonals):
+        while d - diagonals[start] > 2 * tolerance:
+            start += 1
+        if end - start + 1 > best_count:
+            best_count, best_start = end - start + 1, diagonals[start]
+
+    cluster = [(i, j) for i, j in anchors if 0 <= (j - i) - best_start <= 2 * tolerance]
+    lo = max(0, min(j - i for i, j in cluster) - m)
+    hi = min(len(index.merged), max(j + (m - i) for i, j in cluster) + m)
+    return lo, hi
+
+
+def score_matrix(similarity, spatial):
+    """综合得分（文本相似度占80%，空间相似度占20%）；句子第一个单词不计空间得分"""
+    spatial_rows = np.broadcast_to(spatial[1:], similarity.shape).copy()
+    spatial_rows[0, :] = 1.0
+    return 0.8 * similarity + 0.2 * spatial_rows
+
+
+def smith_waterman(scores, gap_penalty=GAP_PENALTY):
+    """逐行向量化填充局部对齐得分矩阵（不按反对角线推进）
+
+    scores: (m × n) 匹配得分
+    返回 (H, best_score, best_position)，H 为 (m+1) × (n+1) 矩阵，
+    与逐格填充的结果逐位相同；best_position 为按行优先顺序第一个最高分的位置。
+
+    逐行计算：匹配和删除只依赖上一行，可整行向量化；
+    插入链 H[i,j] = max(c[j], H[i,j-1] - gap) 等价于 max(c[k] - gap*(j-k))，按倍增步长展开。
+    跳词惩罚为0.5，非负得分减去0.5的整数倍没有舍入误差，因此结果与逐格计算完全一致。
+    """
+    m, n = scores.shape
+    H = np.zeros((m + 1, n + 1))
+    if m == 0 or n == 0:
+        return H, 0, (0, 0)
+
+    for i in range(1, m + 1):
+        prev = H[i - 1]
+        row = prev[:-1] + scores[i - 1]
+        np.maximum(row, prev[1:] - gap_penalty, out=row)
+        np.maximum(row, 0.0, out=row)
+
+        # 插入链最长为 top/gap 步
+        top = row.max()
+        step = 1
+        while step * gap_penalty <= top:
+            shifted = row[:-step] - step * gap_penalty
+            np.maximum(row[step:], shifted, out=row[step:])
+            step *= 2
+        H[i, 1:] = row
+
+    flat = int(np.argmax(H))
+    best_score = H.flat[flat]
+    if best_score <= 0:
+        return H, 0, (0, 0)
+    return H, best_score, divmod(flat, n + 1)
@@ -0,0 +1,181 @@
+import re
+import threading
+from collections import defaultdict
+from utils import clean_text
+
+# 页眉页脚所在的页边区域（占页面高度的比例）
+MARGIN_RATIO = 0.1
+
+# 各类被跳过内容在日志中的名称
+SUPPRESS_LABELS = {
+    "header_footer": "页眉页脚",
+    "page_number": "页码",
+    "figure_label": "图表标签",
+    "reference": "参考文献",
+}
+
+PAGE_NUMBER_RE = re.compile(r'^(page\s*)?(\d+|[ivxlc]{1,6})(\s*(/|of)\s*\d+)?$', re.IGNORECASE)
+REFERENCE_HEADING_RE = re.compile(
+    r'^(\d+\.?\s*)?(references|bibliography|works cited|literature cited|参考文献)$',
+    re.IGNORECASE
+)
+APPENDIX_HEADING_RE = re.compile(r'^([a-z]\.?\s*)?(appendix|appendices|附录)\b', re.IGNORECASE)
+NUMERIC_TOKEN_RE = re.compile(r'^[-+−]?[\d.,%]+$')
+
+
+def fingerprint_block(text):
+    """计算文本块指纹：忽略大小写、空白和数字（页码、年份等会变化的部分）"""
+    text = re.sub(r'\d+', '#', text.lower())
+    return ' '.join(text.split())
+
+
+def page_text(page, suppressed):
+    """提取页面文本并按位置跳过应跳过的文本块，返回 (清理后的文本, [(类型, 被跳过的文本)])
+
+    suppressed 为 DocumentAnalyzer.get_suppressed_blocks 的结果，
+    文本块按自身的区域匹配，不会误删正文中相同的文字。
+    """
+    skipped = {bbox: (kind, text) for kind, text, bbox in suppressed}
+    texts = []
+    spans = []
+    for block in page.get_text("blocks"):
+        # 跳过图片块
+        if len(block) > 6 and block[6] != 0:
+            continue
+        bbox = tuple(block[:4])
+        if bbox in skipped:
+            spans.append(skipped[bbox])
+        else:
+            texts.append(block[4])
+    return clean_text('\n'.join(texts)), spans
+
+
+class DocumentAnalyzer:
+    """文档分析：跨页识别重复的页眉页脚、页码、图表坐标标签和参考文献区"""
+
+    def __init__(self, doc, min_repeat_ratio=0.3):
+        self.doc = doc
+        self.min_repeat_ratio = min_repeat_ratio
+        self._page_blocks = None   # {page_index: [(fingerprint, text, in_margin, y0, bbox)]}
+        self._reference_start = None  # (page_index, y0)，参考文献区起点
+        self._reference_end = None    # (page_index, y0)，附录等后续内容起点
+        self._suppressed = {}      # {page_index: [(kind, text, bbox)]}
+        self._ready = threading.Event()
+
+    def is_ready(self):
+        """分析是否已完成（完成后可在其他线程中只读使用）"""
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """等待分析完成（在工作线程中调用），返回是否已完成"""
+        return self._ready.wait(timeout)
+
+    def results(self):
+        """分析结果 {page_index: [(类型, 文本, 区域)]}，可在进程之间传递"""
+        return self._suppressed
+
+    def load(self, suppressed):
+        """载入在其他进程中完成的分析结果"""
+        self._suppressed = suppressed
+        self._ready.set()
+
+    def analyze(self):
+        """对整个文档做一次分析（结果缓存）"""
+        if self.is_ready():
+            return
+
+        self._page_blocks = {}
+        fingerprint_pages = defaultdict(set)
+
+        for page_index in range(self.doc.page_count):
+            page = self.doc[page_index]
+            height = page.rect.height or 1
+            blocks = []
+            for block in page.get_text("blocks"):
+                # 跳过图片块
+                if len(block) > 6 and block[6] != 0:
+                    continue
+                text = clean_text(block[4]).strip()
+                if not text:
+                    continue
+                in_margin = block[3] < height * MARGIN_RATIO or block[1] > height * (1 - MARGIN_RATIO)
+                fp = fingerprint_block(text)
+                blocks.append((fp, text, in_margin, block[1], tuple(block[:4])))
+                fingerprint_pages[fp].add(page_index)
+
+                # 定位参考文献区的起止位置
+                if self._reference_start is None and REFERENCE_HEADING_RE.match(text.strip(' .:')):
+                    self._reference_start = (page_index, block[1])
+                elif (self._reference_start is not None and self._reference_end is None
+                      and APPENDIX_HEADING_RE.match(text)):
+                    self._reference_end = (page_index, block[1])
+            self._page_blocks[page_index] = blocks
+
+        # 页数太少时无法判断重复块
+        min_pages = max(2, int(self.doc.page_count * self.min_repeat_ratio))
+
+        suppressed_pages = {}
+        for page_index, blocks in self._page_blocks.items():
+            suppressed = []
+            for fp, text, in_margin, y0, bbox in blocks:
+                kind = None
+                if in_margin and PAGE_NUMBER_RE.match(text.strip()):
+                    kind = "page_number"
+                elif in_margin and self.doc.page_count > 1 and len(fingerprint_pages[fp]) >= min_pages:
+                    kind = "header_footer"
+                elif self._is_figure_label(text):
+                    kind = "figure_label"
+                elif self._in_reference_section(page_index, y0):
+                    kind = "reference"
+                if kind:
+                    suppressed.append((kind, text, bbox))
+            suppressed_pages[page_index] = suppressed
+        self._page_blocks = None
+        self.load(suppressed_pages)
+
+    def _is_figure_label(self, text):
+        """判断是否为图表坐标轴刻度等纯数字短块"""
+        tokens = text.split()
+        if not tokens or len(tokens) > 12:
+            return False
+        numeric = sum(1 for t in tokens if NUMERIC_TOKEN_RE.match(t))
+        return numeric / len(tokens) >= 0.8
+
+    def _in_reference_section(self, page_index, y0):
+        """判断文本块是否位于参考文献区内"""
+        if self._reference_start is None:
+            return False
+        if (page_index, y0) <= self._reference_start:
+            return False
+        if self._reference_end is not None and (page_index, y0) >= self._reference_end:
+            return False
+        return True
+
+    def get_suppressed_blocks(self, page_index):
+        """获取指定页面中应跳过的文本块 [(类型, 文本, 区域)]"""
+        self.analyze()
+        return self._suppressed.get(page_index, [])
+
+    def page_text(self, page_index):
+        """提取整页文本并跳过应跳过的文本块，返回 (清理后的文本, [(类型, 被跳过的文本)])"""
+        return page_text(self.doc[page_index], self.get_suppressed_blocks(page_index))
+
+    def strip_boilerplate(self, text, page_index):
+        """从选中的文本中移除页眉页脚、页码等内容
+
+        返回 (清理后的文本, [(类型, 被移除的文本)])
+        """
+        suppressed_spans = []
+        for kind, block_text, _ in self.get_suppressed_blocks(page_index):
+            # 容忍空白差异
+            body = r'\s*'.join(re.escape(t) for t in block_text.split())
+            if kind in ("page_number", "figure_label"):
+                # 页码和图表刻度只在文本首尾移除，避免误删正文中的数字
+                pattern = r'^\s*' + body + r'(?!\w)|(?<!\w)' + body + r'\s*$'
+            else:
+                pattern = r'(?<!\w)' + body + r'(?!\w)'
+            text, count = re.subn(pattern, ' ', text)
+            if count:
+                suppressed_spans.append((kind, block_text))
+
+        return ' '.join(text.split()), suppressed_spans
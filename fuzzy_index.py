@@ -0,0 +1,102 @@
+from utils import normalize_word, edit_distance
+
+# 模糊匹配要求的最低相似度（严格大于）
+FUZZY_THRESHOLD = 0.8
+
+
+def fuzzy_radius(length):
+    """相似度能超过阈值的最大编辑距离
+
+    编辑距离为1时有元音替换加分，总能超过阈值；否则需要 d / max_len < 0.2，
+    而 max_len ≤ length + d，因此 d < length / 4。
+    """
+    return max(1, (length - 1) // 4)
+
+
+def rule_keys(word):
+    """复数、所有格和连字符规则下可能相等的形式"""
+    keys = {word}
+    if word.endswith("s"):
+        keys.add(word[:-1])
+    if word.endswith("'s"):
+        keys.add(word[:-2])
+    if '-' in word:
+        keys.add(word.replace('-', ''))
+    return keys
+
+
+class BKTree:
+    """按编辑距离组织的BK树：查询半径 r 内的单词只需访问与查询词距离差不超过 r 的子树"""
+
+    def __init__(self, words=()):
+        self.root = None  # (单词, {距离: 子节点})
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            d = edit_distance(node[0], word)
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (word, {})
+                return
+            node = child
+
+    def query(self, word, radius):
+        """返回与 word 编辑距离不超过 radius 的单词列表"""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            term, children = stack.pop()
+            d = edit_distance(term, word)
+            if d <= radius:
+                found.append(term)
+            for dist, child in children.items():
+                if d - radius <= dist <= d + radius:
+                    stack.append(child)
+        return found
+
+
+class FuzzyWordIndex:
+    """单页的模糊匹配索引：只返回相似度可能超过阈值的候选单词
+
+    页面单词（含跨行连字符拼接后的形式，来自页面索引的连字符拼接表）按规范化形式建立BK树，
+    复数、所有格和连字符规则通过字典查找补充。
+    """
+
+    def __init__(self, index):
+        # 页面单词表（拆开和合并的形式都在内）：清理后的单词 → [(起始序号, 结束序号)]
+        self.spans = index.token_spans
+        self.forms = {}   # {规范化形式: {原单词, ...}}
+        for token in self.spans:
+            if token:
+                self.forms.setdefault(normalize_word(token), set()).add(token)
+        self.rules = {}   # {规则形式: {规范化形式, ...}}
+        for form in self.forms:
+            for key in rule_keys(form):
+                self.rules.setdefault(key, set()).add(form)
+        self.tree = BKTree(self.forms)
+
+    def candidates(self, word):
+        """可能与 word 的相似度超过阈值的页面单词集合"""
+        target = normalize_word(word)
+        forms = set(self.tree.query(target, fuzzy_radius(len(target))))
+        for key in rule_keys(target):
+            forms.update(self.rules.get(key, ()))
+        return {token for form in forms for token in self.forms[form]}
+
+
+def get_fuzzy_index(index):
+    """页面文本索引对应的模糊匹配索引（首次模糊查询时构建，随页面索引缓存）"""
+    fuzzy = index.derived.get("fuzzy")
+    if fuzzy is None:
+        fuzzy = index.derived["fuzzy"] = FuzzyWordIndex(index)
+    return fuzzy
@@ -2,6 +2,7 @@ import fitz
 from PyQt5 import QtCore, QtGui, QtWidgets
 from .highlight_rect import HighlightRect
 from utils import clean_text
+from text_index import get_page_index
 
 class GraphicsView(QtWidgets.QGraphicsView):
     def __init__(self, parent):
@@ -56,11 +57,11 @@ class GraphicsView(QtWidgets.QGraphicsView):
                 )
                 
                 # 获取文本并清理
-                text = self.current_page.get_textbox(pdf_r)
+                text = get_page_index(self.current_page).get_textbox(pdf_r)
                 cleaned_text = clean_text(text)
                 
                 # 修复：使用 self.parent_window 而不是 self.parent
-                self.parent_window.update_selection_display(cleaned_text)
+                self.parent_window.update_selection_display(cleaned_text, pdf_r)
         super().mouseReleaseEvent(ev)
     
     def wheelEvent(self, ev):
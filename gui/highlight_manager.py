@@ -1,7 +1,10 @@
 import fitz
 from PyQt5 import QtCore, QtGui, QtWidgets
 from .highlight_rect import HighlightRect
-from translator import find_word_in_page, find_sentence_in_page
+from translator import (
+    find_word_in_page, locate_words, find_sentence_in_page, find_sentences_in_page, debug
+)
+from text_index import get_page_index
 import uuid
 
 class HighlightManager:
@@ -21,9 +24,19 @@ class HighlightManager:
             'words': {},      # {page_index: {word: translation}}
             'sentences': []   # [{'id': str, 'original': str, 'translation': str, 'page': int}]
         }
+        self.sentence_ids = {}  # 按ID索引句子: {sent_id: 句子}
+        
+        # 批量操作进行中时单个高亮/取消高亮不绘制，结束后统一绘制当前页
+        self.batching = False
 
         self.first_occurrence_positions = {}
         
+        # 已定位的几何结果（取消高亮后保留），重新高亮时不再查找
+        self.geometry = {}  # 格式: {(page_index, 'words'|'sentences', 单词或句子原文): 矩形列表}
+        
+        # 批量高亮只记录待高亮项和颜色，访问页面、渲染缩略图、导出或空闲时再定位
+        self.deferred = {}  # 格式: {page_index: {'words': {单词: 颜色}, 'sentences': {句子ID: 颜色}}}
+        
         # 默认颜色
         self.default_word_color = QtGui.QColor(255, 255, 0, 100)  # 黄色
         self.default_sentence_color = QtGui.QColor(173, 216, 230, 100)  # 淡蓝色
@@ -49,39 +62,48 @@ class HighlightManager:
             if 'id' not in sent:
                 sent['id'] = str(uuid.uuid4())
             self.translations['sentences'].append(sent)
+            self.sentence_ids[sent['id']] = sent
 
     def get_current_page_sentences(self, page_index):
         """获取当前页的句子"""
         return [sent for sent in self.translations['sentences'] if sent['page'] == page_index]
 
+    def sentence_page(self, sent_id):
+        """句子所在的页面，句子不存在时返回 None"""
+        sent = self.sentence_ids.get(sent_id)
+        return sent.get('page') if sent else None
+
+    def is_current_page(self, page_index):
+        """页面是否为视图中正在显示的页面（批量操作进行中时返回False，结束后统一绘制）"""
+        return (not self.batching and hasattr(self.view, 'current_page_index')
+                and self.view.current_page_index == page_index)
+
     def find_word_rects(self, page, word):
         """查找单词在页面中的位置"""
-        # 首先尝试标准搜索
-        rects = page.search_for(word)
+        # 页面文本只提取一次，所有查找共用
+        index = get_page_index(page)
         
-        # 如果找不到，尝试更智能的搜索
+        # 首先在倒排索引中精确查找（单词或词组）
+        rects = index.find_rects(word)
+        
+        # 然后尝试标准搜索
         if not rects:
-            rects = find_word_in_page(page, word)
+            rects = index.search_for(word)
         
-        # 如果仍然找不到，尝试模糊匹配
+        # 然后按词干查找屈折形式（复数、时态、不规则变化）
         if not rects:
-            base_word = word
-            if word.endswith("'s"):
-                base_word = word[:-2]
-            elif word.endswith("s") and len(word) > 1:
-                base_word = word[:-1]
-            elif word.endswith("ed") and len(word) > 2:
-                base_word = word[:-2]
-            elif word.endswith("ing") and len(word) > 3:
-                base_word = word[:-3]
-            
-            if base_word != word:
-                rects = page.search_for(base_word)
-                if not rects:
-                    rects = find_word_in_page(page, base_word)
+            rects = index.find_stem_rects(word)
+        
+        # 如果找不到，尝试更智能的搜索
+        if not rects:
+            rects = find_word_in_page(page, word)
         
         return rects
 
+    def find_words_rects(self, page, words):
+        """批量查找多个单词在页面中的位置，返回 {单词: 矩形列表}（查找顺序与 find_word_rects 相同）"""
+        return locate_words(page, words)
+
     def parse_color(self, color_str, for_word=True):
         """解析颜色字符串，根据上下文返回单词或句子默认颜色"""
         try:
@@ -120,8 +142,81 @@ class HighlightManager:
         # 根据上下文返回默认颜色
         return self.default_word_color if for_word else self.default_sentence_color
 
-    def highlight_word(self, word, page_index, color_str=None):
-        """高亮单词 - 改进版，处理被拆分的单词，支持自定义颜色"""
+    def add_geometry(self, page_index, kind, geometry):
+        """记录在其他线程中定位好的结果 {单词或句子原文: 矩形列表}（kind 为 'words' 或 'sentences'）"""
+        for text, rects in geometry.items():
+            self.geometry.setdefault((page_index, kind, text), rects)
+
+    def pending_geometry(self, page_index, kind, texts):
+        """尚未定位过的单词或句子原文（去重，保持顺序）"""
+        return [text for text in dict.fromkeys(texts) if (page_index, kind, text) not in self.geometry]
+
+    def word_geometry(self, page_index, words):
+        """单词在页面中的矩形 {单词: 矩形列表}，已定位过的直接取缓存"""
+        pending = self.pending_geometry(page_index, 'words', words)
+        if pending:
+            found = self.find_words_rects(self.doc[page_index], pending)
+            for word in pending:
+                self.geometry[(page_index, 'words', word)] = found[word]
+        return {word: self.geometry[(page_index, 'words', word)] for word in words}
+
+    def sentence_geometry(self, page_index, texts, word_range=None):
+        """句子在页面中的单词矩形列表（与 texts 顺序对应），已定位过的直接取缓存
+
+        未定位的句子仍作为一批连续句子交给 find_sentences_in_page。
+        """
+        pending = self.pending_geometry(page_index, 'sentences', texts)
+        if pending:
+            found = find_sentences_in_page(self.doc[page_index], pending, word_range)
+            for text, word_rects in zip(pending, found):
+                self.geometry[(page_index, 'sentences', text)] = word_rects
+        return [self.geometry[(page_index, 'sentences', text)] for text in texts]
+
+    def defer_highlights(self, page_index, kind, keys, color_str=None):
+        """记录一页待高亮的单词或句子ID（kind 为 'words' 或 'sentences'），暂不定位"""
+        pending = self.deferred.setdefault(page_index, {'words': {}, 'sentences': {}})
+        for key in keys:
+            pending[kind][key] = color_str
+
+    def discard_deferred(self, page_index, kind, key):
+        """取消一个待高亮项，返回是否存在"""
+        pending = self.deferred.get(page_index)
+        if pending is None or key not in pending[kind]:
+            return False
+        del pending[kind][key]
+        if not pending['words'] and not pending['sentences']:
+            del self.deferred[page_index]
+        return True
+
+    def realize_page(self, page_index):
+        """定位并高亮一页的所有待高亮项（同色的项一起批量定位），返回高亮数量"""
+        pending = self.deferred.pop(page_index, None)
+        if pending is None:
+            return 0
+        count = 0
+        for kind, highlight in (('words', self.highlight_words), ('sentences', self.highlight_sentences)):
+            by_color = {}
+            for key, color_str in pending[kind].items():
+                by_color.setdefault(color_str, []).append(key)
+            for color_str, keys in by_color.items():
+                count += highlight(keys, page_index, color_str)
+        return count
+
+    def realize_all(self):
+        """定位所有页面的待高亮项（导出前调用），返回高亮数量"""
+        return sum(self.realize_page(page_index) for page_index in list(self.deferred))
+
+    def highlight_words(self, words, page_index, color_str=None):
+        """批量高亮同一页的多个单词：一次扫描页面找出所有单词的位置"""
+        rects = self.word_geometry(page_index, list(words))
+        count = 0
+        for word in words:
+            if self.highlight_word(word, page_index, color_str, rects=rects[word]):
+                count += 1
+        return count
+
+    def highlight_word(self, word, page_index, color_str=None, rects=None):
+        """高亮单词 - 改进版，处理被拆分的单词，支持自定义颜色（rects 为已查找到的矩形）"""
         # 确保页面数据结构存在
         if page_index not in self.page_highlights:
             self.page_highlights[page_index] = {'words': {}, 'sentences': {}}
@@ -129,19 +224,21 @@ class HighlightManager:
         # 获取页面高亮信息
         page_data = self.page_highlights[page_index]
         
-        # 检查是否已高亮 - 如果已高亮但颜色不同，也更新
+        # 检查是否已高亮 - 如果已高亮但颜色不同，原地换色
         if word in page_data['words']:
-            # 如果已高亮但颜色不同，先取消高亮再重新高亮
-            if page_data['words'][word].get('highlighted', False):
-                current_color = page_data['words'][word]['color']
+            word_info = page_data['words'][word]
+            if word_info.get('highlighted', False):
                 new_color = self.parse_color(color_str, for_word=True) if color_str else self.default_word_color
-                
-                # 如果颜色不同，取消高亮以便重新高亮
-                if current_color != new_color:
-                    self.unhighlight_word(word, page_index)
-                else:
+                if word_info['color'] == new_color:
                     # 颜色相同且已高亮，无需操作
                     return False
+                word_info['color'] = new_color
+                for item in word_info.get('items', []):
+                    try:
+                        item.set_color(new_color)
+                    except RuntimeError:
+                        pass
+                return True
         
         # 解析颜色
         color = self.parse_color(color_str, for_word=True) if color_str else self.default_word_color
@@ -149,9 +246,12 @@ class HighlightManager:
         # 获取翻译
         translation = self.translations['words'].get(page_index, {}).get(word, "")
         
-        # 在页面中查找单词位置
-        page = self.doc[page_index]
-        rects = self.find_word_rects(page, word)
+        # 在页面中查找单词位置（已定位过的取缓存）
+        if rects is None:
+            key = (page_index, 'words', word)
+            if key not in self.geometry:
+                self.geometry[key] = self.find_word_rects(self.doc[page_index], word)
+            rects = self.geometry[key]
         
         if not rects:
             print(f"未找到单词: {word}")
@@ -166,7 +266,7 @@ class HighlightManager:
         }
         
         # 如果当前是活动页面，立即绘制
-        if hasattr(self.view, 'current_page_index') and self.view.current_page_index == page_index:
+        if self.is_current_page(page_index):
             # 直接绘制这个单词的高亮
             self.draw_word_highlight(word, page_index)
         
@@ -236,6 +336,7 @@ class HighlightManager:
         
         # 创建新的高亮项 - 为每个单词矩形创建独立高亮
         items = []
+        sent_info['first_item'] = None
         
         # 计算首单词颜色（加深50%）
         base_color = sent_info['color']
@@ -259,7 +360,7 @@ class HighlightManager:
             # 跳过代表整个句子的大矩形
             page_width = self.doc[page_index].rect.width * self.zoom
             if rectF.width() > page_width * 0.2 or rectF.height() > page_width * 0.1:
-                print(f"跳过整个句子的大矩形: {rectF}")
+                debug(f"跳过整个句子的大矩形: {rectF}")
                 continue
             
             try:
@@ -270,9 +371,11 @@ class HighlightManager:
                 hl = HighlightRect(rectF, sent_info['translation'], color)
                 self.view.scene.addItem(hl)
                 items.append(hl)
+                if idx == 0:
+                    sent_info['first_item'] = hl
                 
                 # 调试信息
-                print(f"添加单词高亮: {rectF} (原始: {rect})")
+                debug(f"添加单词高亮: {rectF} (原始: {rect})")
             except Exception as e:
                 print(f"创建单词高亮失败: {str(e)}")
         
@@ -296,13 +399,73 @@ class HighlightManager:
             if page_data['sentences'][sent_id]['highlighted']:
                 self.draw_sentence_highlight(sent_id, page_index)
 
+    def apply_batch(self, operations):
+        """在一次事务中执行一组高亮操作，返回 (成功数量, 高亮有变化的页面集合)
+
+        operations 为 [(操作, 类型, 页面, 单词或句子ID, 颜色), ...]，操作为 'highlight'（已高亮时换色）
+        或 'unhighlight'，类型为 'words' 或 'sentences'（取消句子高亮时页面可为 None）。
+        先执行所有取消高亮，再把高亮按页面、类型和颜色分组批量定位；
+        执行期间不逐项重绘，结束后只绘制当前页新增的高亮。
+        只取消了尚未定位的待高亮项的页面不算作有变化。
+        """
+        count = 0
+        dirty = set()
+        groups = {}  # {(页面, 类型, 颜色): [单词或句子ID, ...]}
+        self.batching = True
+        try:
+            for action, kind, page_index, key, color_str in operations:
+                if action == 'highlight':
+                    groups.setdefault((page_index, kind, color_str), []).append(key)
+                    continue
+                if kind == 'words':
+                    drawn = self.is_word_highlighted(key, page_index)
+                    done = self.unhighlight_word(key, page_index)
+                else:
+                    page_index = self.sentence_page(key)
+                    drawn = self.is_sentence_highlighted(key)
+                    done = self.unhighlight_sentence(key)
+                if done:
+                    count += 1
+                    if drawn:
+                        dirty.add(page_index)
+            
+            for (page_index, kind, color_str), keys in groups.items():
+                if kind == 'words':
+                    done = self.highlight_words(keys, page_index, color_str)
+                else:
+                    done = self.highlight_sentences(keys, page_index, color_str)
+                if done:
+                    count += done
+                    dirty.add(page_index)
+        finally:
+            self.batching = False
+        
+        page_index = getattr(self.view, 'current_page_index', None)
+        if page_index in dirty:
+            self.draw_new_highlights(page_index)
+        return count, dirty
+
+    def draw_new_highlights(self, page_index):
+        """绘制页面中已高亮但还没有高亮项的单词和句子（换色的高亮项已原地更新）"""
+        page_data = self.page_highlights.get(page_index)
+        if page_data is None:
+            return
+        for word, word_info in page_data['words'].items():
+            if word_info['highlighted'] and not word_info.get('items'):
+                self.draw_word_highlight(word, page_index)
+        for sent_id, sent_info in page_data['sentences'].items():
+            if sent_info['highlighted'] and not sent_info.get('items'):
+                self.draw_sentence_highlight(sent_id, page_index)
+
     def unhighlight_word(self, word, page_index):
         """取消单词高亮"""
+        # 尚未定位的待高亮项直接取消
+        dropped = self.discard_deferred(page_index, 'words', word)
         if page_index not in self.page_highlights:
-            return False
+            return dropped
         page_data = self.page_highlights[page_index]
         if word not in page_data['words']:
-            return False
+            return dropped
         
         word_info = page_data['words'][word]
         
@@ -321,13 +484,10 @@ class HighlightManager:
         return True
 
     def clear_page_word_highlights(self, page_index):
-        """清除指定页面所有单词高亮"""
-        if page_index not in self.page_highlights:
-            return
-        
-        words = list(self.page_highlights[page_index]['words'].keys())
-        for word in words:
-            self.unhighlight_word(word, page_index)
+        """清除指定页面所有单词高亮（包括尚未定位的待高亮项）"""
+        words = dict.fromkeys(self.page_highlights.get(page_index, {}).get('words', ()))
+        words.update(dict.fromkeys(self.deferred.get(page_index, {}).get('words', ())))
+        self.apply_batch([('unhighlight', 'words', page_index, word, None) for word in words])
 
     def is_word_highlighted(self, word, page_index):
         """检查单词是否已高亮"""
@@ -335,9 +495,24 @@ class HighlightManager:
                 word in self.page_highlights[page_index]['words'] and 
                 self.page_highlights[page_index]['words'][word]['highlighted'])
 
-    def highlight_sentence(self, sent_id, page_index, color_str=None):
-        """高亮句子 - 支持自定义颜色"""
-        print(f"\n===== 开始高亮句子 (ID: {sent_id}, 页面: {page_index}) =====")
+    def highlight_sentences(self, sent_ids, page_index, color_str=None, word_range=None):
+        """批量高亮同一翻译结果中的连续句子：按顺序续接定位，整批约等于一次对齐
+
+        word_range 为框选覆盖的页面单词序号范围，给出时只在选区附近定位。
+        """
+        sent_ids = [sent_id for sent_id in sent_ids if sent_id in self.sentence_ids]
+        rects = self.sentence_geometry(
+            page_index, [self.sentence_ids[sent_id]['original'] for sent_id in sent_ids], word_range
+        )
+        count = 0
+        for sent_id, word_rects in zip(sent_ids, rects):
+            if self.highlight_sentence(sent_id, page_index, color_str, word_rects=word_rects):
+                count += 1
+        return count
+
+    def highlight_sentence(self, sent_id, page_index, color_str=None, word_rects=None):
+        """高亮句子 - 支持自定义颜色（word_rects 为已定位的单词矩形，为空时在页面中查找）"""
+        debug(f"\n===== 开始高亮句子 (ID: {sent_id}, 页面: {page_index}) =====")
         
         # 确保页面数据结构存在
         if page_index not in self.page_highlights:
@@ -346,44 +521,46 @@ class HighlightManager:
         # 获取页面高亮信息
         page_data = self.page_highlights[page_index]
         
-        # 检查是否已高亮 - 如果已高亮但颜色不同，也更新
+        # 检查是否已高亮 - 如果已高亮但颜色不同，原地换色
         if sent_id in page_data['sentences']:
-            # 如果已高亮但颜色不同，先取消高亮再重新高亮
-            if page_data['sentences'][sent_id].get('highlighted', False):
-                current_color = page_data['sentences'][sent_id]['color']
+            sent_info = page_data['sentences'][sent_id]
+            if sent_info.get('highlighted', False):
                 new_color = self.parse_color(color_str, for_word=False) if color_str else self.default_sentence_color
-                
-                # 如果颜色不同，取消高亮以便重新高亮
-                if current_color != new_color:
-                    self.unhighlight_sentence(sent_id)
-                else:
+                if sent_info['color'] == new_color:
                     # 颜色相同且已高亮，无需操作
-                    print("句子已高亮且颜色相同，跳过")
+                    debug("句子已高亮且颜色相同，跳过")
                     return False
+                sent_info['color'] = new_color
+                for item in sent_info.get('items', []):
+                    try:
+                        # 首单词使用深色
+                        item.set_color(new_color.darker(180) if item is sent_info.get('first_item') else new_color)
+                    except RuntimeError:
+                        pass
+                return True
         
         # 查找句子
-        sentence = None
-        for sent in self.translations['sentences']:
-            if sent.get('id') == sent_id:
-                sentence = sent
-                break
+        sentence = self.sentence_ids.get(sent_id)
         
         if not sentence:
             print(f"错误: 未找到句子 {sent_id}")
             return False
         
-        print(f"句子原文: '{sentence['original']}'")
-        print(f"句子翻译: '{sentence['translation']}'")
+        debug(f"句子原文: '{sentence['original']}'")
+        debug(f"句子翻译: '{sentence['translation']}'")
         
-        # 在页面中查找句子
-        page = self.doc[page_index]
-        word_rects = find_sentence_in_page(page, sentence['original'])
+        # 在页面中查找句子（已定位过的取缓存）
+        if word_rects is None:
+            key = (page_index, 'sentences', sentence['original'])
+            if key not in self.geometry:
+                self.geometry[key] = find_sentence_in_page(self.doc[page_index], sentence['original'])
+            word_rects = self.geometry[key]
         
         if not word_rects:
             print(f"错误: 未在页面中找到句子: {sentence['original']}")
             return False
         
-        print(f"找到 {len(word_rects)} 个匹配单词矩形")
+        debug(f"找到 {len(word_rects)} 个匹配单词矩形")
         
         # 直接使用单词矩形，不进行分组合并
         # 解析颜色
@@ -398,7 +575,7 @@ class HighlightManager:
         }
         
         # 如果当前是活动页面，立即绘制
-        if hasattr(self.view, 'current_page_index') and self.view.current_page_index == page_index:
+        if self.is_current_page(page_index):
             self.draw_sentence_highlight(sent_id, page_index)
         
         return True
@@ -406,18 +583,16 @@ class HighlightManager:
     def unhighlight_sentence(self, sent_id):
         """取消句子高亮"""
         # 查找句子所在的页面
-        page_index = None
-        for sent in self.translations['sentences']:
-            if sent.get('id') == sent_id:
-                page_index = sent.get('page')
-                break
+        page_index = self.sentence_page(sent_id)
         
+        # 尚未定位的待高亮项直接取消
+        dropped = self.discard_deferred(page_index, 'sentences', sent_id)
         if page_index is None or page_index not in self.page_highlights:
-            return False
+            return dropped
         
         page_data = self.page_highlights[page_index]
         if sent_id not in page_data['sentences']:
-            return False
+            return dropped
         
         sent_info = page_data['sentences'][sent_id]
         
@@ -435,7 +610,7 @@ class HighlightManager:
         sent_info['highlighted'] = False
         
         # 如果当前是活动页面，立即重绘
-        if hasattr(self.view, 'current_page_index') and self.view.current_page_index == page_index:
+        if self.is_current_page(page_index):
             self.draw_page_highlights(page_index)
         
         return True
@@ -443,11 +618,7 @@ class HighlightManager:
     def is_sentence_highlighted(self, sent_id):
         """检查句子是否已高亮"""
         # 查找句子所在的页面
-        page_index = None
-        for sent in self.translations['sentences']:
-            if sent.get('id') == sent_id:
-                page_index = sent.get('page')
-                break
+        page_index = self.sentence_page(sent_id)
         
         return (page_index is not None and 
                 page_index in self.page_highlights and 
@@ -455,13 +626,10 @@ class HighlightManager:
                 self.page_highlights[page_index]['sentences'][sent_id]['highlighted'])
 
     def clear_page_sentence_highlights(self, page_index):
-        """清除指定页面所有句子高亮"""
-        if page_index not in self.page_highlights:
-            return
-        
-        sent_ids = list(self.page_highlights[page_index]['sentences'].keys())
-        for sent_id in sent_ids:
-            self.unhighlight_sentence(sent_id)
+        """清除指定页面所有句子高亮（包括尚未定位的待高亮项）"""
+        sent_ids = dict.fromkeys(self.page_highlights.get(page_index, {}).get('sentences', ()))
+        sent_ids.update(dict.fromkeys(self.deferred.get(page_index, {}).get('sentences', ())))
+        self.apply_batch([('unhighlight', 'sentences', page_index, sent_id, None) for sent_id in sent_ids])
 
     def get_word_highlight_info(self, page_index):
         """获取单词高亮信息用于表格更新"""
@@ -491,10 +659,9 @@ class HighlightManager:
         self.unhighlight_sentence(sent_id)
         
         # 从翻译数据中移除句子
-        for i, sent in enumerate(self.translations['sentences']):
-            if sent.get('id') == sent_id:
-                self.translations['sentences'].pop(i)
-                break
+        sent = self.sentence_ids.pop(sent_id, None)
+        if sent is not None:
+            self.translations['sentences'].remove(sent)
 
     def remove_word(self, word, page_index):
         """从翻译数据中移除指定单词，并取消其高亮"""
@@ -9,11 +9,15 @@ class HighlightRect(QtWidgets.QGraphicsRectItem):
         
         # 设置默认颜色
         self.default_color = color if color else QtGui.QColor(255, 255, 0, 100)
-        self.hover_color = QtGui.QColor(self.default_color)
+        self.set_color(self.default_color)
+
+    def set_color(self, color):
+        """原地更换颜色（不重新创建高亮项）"""
+        self.default_color = color
+        self.hover_color = QtGui.QColor(color)
         self.hover_color.setAlpha(180)  # 悬停时增加透明度
-        
-        self.setPen(QtGui.QPen(self.default_color.darker(120), 1))
-        self.setBrush(QtGui.QBrush(self.default_color))
+        self.setPen(QtGui.QPen(color.darker(120), 1))
+        self.setBrush(QtGui.QBrush(self.hover_color if self.isUnderMouse() else color))
 
     def hoverEnterEvent(self, event):
         self.setBrush(QtGui.QBrush(self.hover_color))
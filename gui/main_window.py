@@ -9,13 +9,22 @@ from .graphics_view import GraphicsView
 from .highlight_manager import HighlightManager
 from .table_manager import TableManager
 from .export_manager import ExportManager
-from translator import translate_sentences, extract_and_translate_words
-from utils import clean_text
+from translator import translate_sentences, extract_and_translate_words, load_latency_history
+from text_index import get_page_index, clear_text_index
+from doc_analysis import DocumentAnalyzer, SUPPRESS_LABELS
+from planner import forecast_job, forecast_pages, format_forecast
 import threading
-from .thread_manager import TranslationWorker
+from .thread_manager import TranslationWorker, BatchTranslationWorker, BatchCheckpoint, LocateWorker
+from locate_service import LocateService, PARALLEL_MIN_PAGES, pool_size, analyze_document, locate_page
+from .prefetch_manager import PrefetchManager
 from .api_set import ApiSetPanel, PromptSetPanel
 
 class PDFHighlighter(QtWidgets.QMainWindow):
+    # 后台文档分析结束 (分析器, Future)，从定位服务的回调线程发出
+    analysis_finished = QtCore.pyqtSignal(object, object)
+    # 空闲定位的一页结果返回 (Future, page_index)，从定位服务的回调线程发出
+    idle_page_located = QtCore.pyqtSignal(object, int)
+
     def __init__(self, pdf_path):
         super().__init__()
         # 1. 初始化文档相关属性
@@ -42,11 +51,15 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         # 3. 初始化模式相关属性
         self.is_dark_mode = False
         self.invert_pdf_colors = False
+        self.prefetch_enabled = False
+        self.prefetch_depth = 2
+        self.locate_processes = 0  # 多进程定位的进程数，0表示与CPU核数相同
         
         # 4. 初始化核心组件
         self.view = GraphicsView(self)
         self.highlight_manager = HighlightManager(self.doc, self.view)
         self.table_manager = TableManager(self.highlight_manager)
+        self.doc_analyzer = DocumentAnalyzer(self.doc)
         
         # 5. 创建箭头图标
         self.create_arrow_icons()
@@ -57,6 +70,20 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         # 7. 初始化其他属性
         self.SELECTION_TIMEOUT = 300  # 5分钟
         self.active_workers = {}  # 存储当前活动的工作线程
+        self.batch_job = None  # 当前批量翻译任务 (worker, thread)
+        self.prefetch_manager = PrefetchManager(self, self.prefetch_depth)  # 预读翻译
+        self.locate_service = None  # 多进程定位服务（按文档创建）
+        self.locate_job = None  # 当前"高亮所有页"的多进程定位任务
+        self.analysis_future = None  # 进行中的后台文档分析
+        self.realize_timer = QtCore.QTimer(self)  # 空闲时逐页定位待高亮项
+        self.realize_timer.setSingleShot(True)
+        self.realize_timer.setInterval(20)  # 每处理一页后留出处理界面事件的间隔（毫秒）
+        self.realize_timer.timeout.connect(self.realize_next_deferred_page)
+        self.idle_locate_future = None  # 进行中的空闲定位
+        self.idle_page_located.connect(self.handle_idle_page_located)
+        self.analysis_finished.connect(self.handle_analysis_finished)
+        self.start_document_analysis()
+        load_latency_history()  # 任务预估使用以往会话的请求耗时
         self.current_page_lock = threading.Lock()  # 页面索引锁
         
         # 8. 设置暗黑模式 - 现在所有UI组件都已创建
@@ -145,6 +172,23 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         export_pdf_action.triggered.connect(self.export_highlighted_pdf)
         self.toolbar.addAction(export_pdf_action)
         
+        # 任务预估按钮
+        forecast_action = QtWidgets.QAction("预估", self)
+        forecast_action.triggered.connect(self.forecast_translation)
+        self.toolbar.addAction(forecast_action)
+        
+        # 批量翻译按钮
+        self.batch_action = QtWidgets.QAction("批量翻译", self)
+        self.batch_action.triggered.connect(self.start_batch_translation)
+        self.toolbar.addAction(self.batch_action)
+        
+        # 预读翻译按钮
+        self.prefetch_action = QtWidgets.QAction("预读", self)
+        self.prefetch_action.setCheckable(True)
+        self.prefetch_action.setChecked(self.prefetch_enabled)
+        self.prefetch_action.toggled.connect(self.toggle_prefetch)
+        self.toolbar.addAction(self.prefetch_action)
+        
         # 添加分隔线
         self.toolbar.addSeparator()
         
@@ -218,8 +262,13 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         )
         if file_path:
             try:
-                # 1. 关闭现有文档
+                # 1. 停止批量任务和预读并关闭现有文档
+                self.stop_batch_translation()
+                self.prefetch_manager.stop()
+                self.stop_locate_service()
+                self.realize_timer.stop()
                 if hasattr(self, 'doc') and self.doc:
+                    clear_text_index(self.doc)
                     self.doc.close()
                 
                 # 2. 重置预览相关状态
@@ -236,6 +285,8 @@ class PDFHighlighter(QtWidgets.QMainWindow):
                 self.doc = fitz.open(file_path)
                 self.page_index = 0
                 self.highlight_manager = HighlightManager(self.doc, self.view)
+                self.doc_analyzer = DocumentAnalyzer(self.doc)
+                self.start_document_analysis()
                 
                 # 5. 重新加载页面和预览
                 self.load_page()
@@ -252,6 +303,64 @@ class PDFHighlighter(QtWidgets.QMainWindow):
             except Exception as e:
                 QtWidgets.QMessageBox.critical(self, "错误", f"无法打开文件: {str(e)}")
 
+    def parse_page_range(self, text):
+        """解析页面范围字符串（如 "1-10, 15"），返回从0开始的页面索引列表"""
+        pages = []
+        for part in text.replace('，', ',').split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if '-' in part:
+                start, end = part.split('-', 1)
+                start, end = int(start), int(end)
+            else:
+                start = end = int(part)
+            start = max(1, start)
+            end = min(self.doc.page_count, end)
+            for page_num in range(start, end + 1):
+                if page_num - 1 not in pages:
+                    pages.append(page_num - 1)
+        return pages
+
+    def forecast_translation(self):
+        """预估翻译任务的请求数、token数和耗时（本地计算，不访问网络）"""
+        range_text, ok = QtWidgets.QInputDialog.getText(
+            self, "任务预估", "页面范围（如 1-10，留空则预估当前选择）:"
+        )
+        if not ok:
+            return
+        
+        task_name, ok = QtWidgets.QInputDialog.getItem(
+            self, "任务预估", "任务类型:", ["整段翻译", "提取生词"], 0, False
+        )
+        if not ok:
+            return
+        task_type = "sentences" if task_name == "整段翻译" else "words"
+        
+        try:
+            if range_text.strip():
+                pages = self.parse_page_range(range_text)
+                if not pages:
+                    self.log("无效的页面范围")
+                    return
+                forecast = forecast_pages(self.doc, pages, task_type, self.ready_analyzer())
+            else:
+                text = self.selection_info.get("text", "").strip()
+                if not text:
+                    self.log("警告：没有可预估的选中文本")
+                    return
+                page_index = self.selection_info.get("page_index")
+                if page_index is not None and self.ready_analyzer():
+                    text, _ = self.doc_analyzer.strip_boilerplate(text, page_index)
+                forecast = forecast_job([text], task_type)
+        except ValueError:
+            self.log("请输入有效的页面范围，例如 1-10")
+            return
+        
+        summary = format_forecast(forecast)
+        self.log(summary)
+        QtWidgets.QMessageBox.information(self, "任务预估", summary)
+
     def adjust_zoom(self, factor):
         """调整缩放比例"""
         self.zoom *= factor
@@ -618,8 +727,8 @@ class PDFHighlighter(QtWidgets.QMainWindow):
             self.log_text.verticalScrollBar().maximum()
         )
 
-    def update_selection_display(self, text: str):
-        """更新选中的文本显示"""
+    def update_selection_display(self, text: str, rect=None):
+        """更新选中的文本显示（rect 为框选区域的PDF坐标）"""
         # 记录选择时的页面和时间戳
         self.selection_info = {
             "text": text,
@@ -627,6 +736,11 @@ class PDFHighlighter(QtWidgets.QMainWindow):
             "timestamp": time.time()
         }
         
+        # 记录框选区域及其覆盖的页面单词序号范围，用于在选区内定位句子
+        if rect is not None and self.doc is not None and self.page_index is not None:
+            self.selection_info["rect"] = {"x0": rect.x0, "y0": rect.y0, "x1": rect.x1, "y1": rect.y1}
+            self.selection_info["word_range"] = get_page_index(self.doc[self.page_index]).words_in_rect(rect)
+        
         self.selection_box.setPlainText(text)
         self.update_selection_ui()  # 更新UI状态
         
@@ -639,6 +753,9 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         with self.current_page_lock:
             self.highlight_manager.set_zoom(self.zoom)
             
+            # 定位当前页尚未定位的待高亮项
+            self.highlight_manager.realize_page(self.page_index)
+            
             page = self.doc[self.page_index]
             pix = page.get_pixmap(matrix=fitz.Matrix(self.zoom, self.zoom))
             
@@ -693,10 +810,15 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         self.update_selection_ui()
         # 更新页码标签
         self.update_page_label()
+        
+        # 应用已预读的结果，并预读后续页面
+        self.apply_prefetched_result(self.page_index)
+        if self.prefetch_enabled and hasattr(self, 'prefetch_manager'):
+            self.prefetch_manager.schedule(self.page_index)
 
         if self.highlight_manager.get_page_translation_status(self.page_index) == 2:
             self.highlight_manager.clear_page_status(self.page_index)
-            self.update_thumbnail_previews()
+            self.update_thumbnail_previews([self.page_index])
         
         # 更新缩略图高亮
         self.update_thumbnail_highlight()
@@ -704,6 +826,25 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         # 记录页面切换
         self.log(f"已切换到页面 {self.page_index + 1}/{self.doc.page_count}")
 
+    def apply_prefetched_result(self, page_index):
+        """访问页面时高亮该页的预读翻译结果"""
+        if not hasattr(self, 'prefetch_manager'):
+            return
+        result, context = self.prefetch_manager.take_result(page_index)
+        if result and not self.highlight_manager.get_current_page_sentences(page_index):
+            self.handle_translate_sentences_result(result, page_index, "sentences", context)
+
+    def toggle_prefetch(self, checked):
+        """切换预读翻译模式"""
+        self.prefetch_enabled = checked
+        if checked:
+            self.log(f"已开启预读：自动翻译后续 {self.prefetch_depth} 页")
+            self.prefetch_manager.schedule(self.page_index)
+        else:
+            self.prefetch_manager.stop()
+            self.log("已关闭预读")
+        self.save_config()
+
     def update_tables(self):
         """更新单词和句子表格"""
         # 更新单词表格
@@ -758,11 +899,6 @@ class PDFHighlighter(QtWidgets.QMainWindow):
             self.log("警告：尝试翻译时没有选中文本")
             return
         
-        # 添加上下文信息以改善匹配
-        context_text = self.get_selection_with_context()
-        if context_text:
-            text = context_text + " " + text
-        
         # 获取保存的页面索引
         selection_page = self.selection_info.get("page_index")
         
@@ -792,10 +928,16 @@ class PDFHighlighter(QtWidgets.QMainWindow):
             self.log("错误：无法确定页面索引")
             return
             
+        # 移除页眉页脚、页码和参考文献等无需翻译的内容
+        text = self.strip_boilerplate_text(text, page_index)
+        if not text:
+            return
+            
         self.log(f"提交整段翻译请求 (页面 {page_index + 1})")
         
         # 创建工作线程 - 使用保存的页面索引
-        worker = TranslationWorker("sentences", text, page_index)
+        worker = TranslationWorker("sentences", text, page_index, context=self.selection_context(page_index),
+                                   service=self.document_service())
         worker_thread = QtCore.QThread()
         worker.moveToThread(worker_thread)
         
@@ -813,7 +955,7 @@ class PDFHighlighter(QtWidgets.QMainWindow):
 
         # 新增：设置页面翻译状态
         self.highlight_manager.start_translation_task(page_index)
-        self.update_thumbnail_previews()  # 立即更新缩略图
+        self.update_thumbnail_previews([page_index])  # 立即更新缩略图
         
         # 添加日志 - 不再使用超链接
         self.log(f"[翻译进行中] 页面 {page_index + 1} - 处理中...")
@@ -875,10 +1017,16 @@ class PDFHighlighter(QtWidgets.QMainWindow):
             self.log("错误：无法确定页面索引")
             return
             
+        # 移除页眉页脚、页码和参考文献等无需翻译的内容
+        text = self.strip_boilerplate_text(text, page_index)
+        if not text:
+            return
+            
         self.log(f"提交生词提取请求 (页面 {page_index + 1})")
         
         # 创建工作线程 - 使用保存的页面索引
-        worker = TranslationWorker("words", text, page_index)
+        worker = TranslationWorker("words", text, page_index, context=self.selection_context(page_index),
+                                   service=self.document_service())
         worker_thread = QtCore.QThread()
         worker.moveToThread(worker_thread)
         
@@ -895,50 +1043,105 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         worker_thread.start()
 
         self.highlight_manager.start_translation_task(page_index)
-        self.update_thumbnail_previews()  # 立即更新缩略图
+        self.update_thumbnail_previews([page_index])  # 立即更新缩略图
         
         # 添加日志 - 不再使用超链接
         self.log(f"[提取进行中] 页面 {page_index + 1} - 处理中...")
 
+    def start_document_analysis(self):
+        """在定位进程中分析整个文档（页眉页脚、页码等），不阻塞界面；文档没有路径时在界面线程中分析"""
+        analyzer = self.doc_analyzer
+        service = self.document_service()
+        if service is None:
+            analyzer.analyze()
+            return
+        try:
+            future = service.submit(analyze_document)
+        except RuntimeError as e:
+            self.log(f"文档分析失败: {str(e)}")
+            analyzer.load({})
+            return
+        self.analysis_future = future
+        # 定位服务关闭后（切换或关闭文档）不再载入结果
+        future.add_done_callback(
+            lambda f: f is self.analysis_future and self.analysis_finished.emit(analyzer, f)
+        )
+
+    def handle_analysis_finished(self, analyzer, future):
+        """后台文档分析结束：载入结果（失败时不跳过任何内容）"""
+        try:
+            analyzer.load(future.result())
+        except Exception as e:
+            analyzer.load({})
+            if analyzer is self.doc_analyzer:
+                self.log(f"文档分析失败，按原文提交: {str(e)}")
+
+    def ready_analyzer(self):
+        """已完成分析的文档分析器，分析尚未完成时返回 None"""
+        return self.doc_analyzer if self.doc_analyzer.is_ready() else None
+
+    def strip_boilerplate_text(self, text, page_index):
+        """移除选中文本中的重复/模板内容，并在日志中报告被跳过的部分"""
+        if not self.doc_analyzer.is_ready():
+            self.log("文档分析尚未完成，按原文提交")
+            return text
+        try:
+            text, suppressed = self.doc_analyzer.strip_boilerplate(text, page_index)
+        except Exception as e:
+            self.log(f"文档分析失败，按原文提交: {str(e)}")
+            return text
+        
+        for kind, span in suppressed:
+            preview = span if len(span) <= 40 else span[:40] + "..."
+            self.log(f"已跳过{SUPPRESS_LABELS.get(kind, kind)}: {preview}")
+        
+        if not text:
+            self.log("选中内容均为页眉页脚、页码或参考文献，已跳过")
+        return text
+
     # 单词操作
     def select_all_words(self):
         """全选单词表格中的行"""
         self.table_manager.word_table.selectAll()
 
+    def selected_words(self):
+        """单词表格中选中的单词"""
+        return [self.table_manager.word_table.item(idx.row(), 1).text()
+                for idx in self.table_manager.word_table.selectionModel().selectedRows()]
+
+    def selected_sentence_ids(self):
+        """句子表格中选中的句子ID"""
+        sentences = self.highlight_manager.get_current_page_sentences(self.page_index)
+        rows = [idx.row() for idx in self.table_manager.sentence_table.selectionModel().selectedRows()]
+        return [sentences[row]['id'] for row in rows if row < len(sentences) and 'id' in sentences[row]]
+
+    def apply_highlight_batch(self, operations):
+        """一次事务执行一组高亮操作：只刷新一次表格和有变化页面的缩略图，返回成功数量
+
+        operations 的格式见 HighlightManager.apply_batch
+        """
+        count, dirty = self.highlight_manager.apply_batch(operations)
+        if count:
+            self.update_tables()
+        if dirty:
+            self.update_thumbnail_previews(sorted(dirty))
+        return count
+
     def highlight_selected_words(self):
         """高亮选中的单词（强制高亮）"""
-        selected = False
         # 获取当前颜色
         color = self.table_manager.word_color_edit.text()
         
-        for idx in self.table_manager.word_table.selectionModel().selectedRows():
-            row = idx.row()
-            word = self.table_manager.word_table.item(row, 1).text()
-            
-            # 高亮单词 - 使用当前颜色
-            if self.highlight_manager.highlight_word(word, self.page_index, color):
-                selected = True
-        
-        if selected:
-            self.update_tables()
-            # 更新缩略图
-            self.update_thumbnail_previews()
+        # 高亮单词 - 使用当前颜色
+        self.apply_highlight_batch([
+            ('highlight', 'words', self.page_index, word, color) for word in self.selected_words()
+        ])
 
     def unhighlight_selected_words(self):
         """取消高亮选中的单词"""
-        selected = False
-        for idx in self.table_manager.word_table.selectionModel().selectedRows():
-            row = idx.row()
-            word = self.table_manager.word_table.item(row, 1).text()
-            
-            # 取消高亮单词
-            if self.highlight_manager.unhighlight_word(word, self.page_index):
-                selected = True
-        
-        if selected:
-            self.update_tables()
-            # 更新缩略图
-            self.update_thumbnail_previews()
+        self.apply_highlight_batch([
+            ('unhighlight', 'words', self.page_index, word, None) for word in self.selected_words()
+        ])
 
     def toggle_word_highlight(self, row, col):
         """切换单词高亮状态"""
@@ -960,47 +1163,26 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         # 更新表格
         self.update_tables()
         # 更新缩略图
-        self.update_thumbnail_previews()
+        self.update_thumbnail_previews([self.page_index])
 
     # 句子操作
     def highlight_selected_sentences(self):
         """高亮选中的句子（强制高亮）"""
-        selected = False
         # 获取当前颜色
         color = self.table_manager.sentence_color_edit.text()
         
-        for idx in self.table_manager.sentence_table.selectionModel().selectedRows():
-            row = idx.row()
-            sentences = self.highlight_manager.get_current_page_sentences(self.page_index)
-            if row < len(sentences):
-                sent = sentences[row]
-                if 'id' in sent:
-                    # 高亮句子 - 使用当前颜色
-                    if self.highlight_manager.highlight_sentence(sent['id'], self.page_index, color):
-                        selected = True
-        
-        if selected:
-            self.update_tables()
-            # 刷新预览 - 确保句子高亮显示在缩略图中
-            self.update_thumbnail_previews()
+        # 高亮句子 - 使用当前颜色，按顺序批量定位
+        self.apply_highlight_batch([
+            ('highlight', 'sentences', self.page_index, sent_id, color)
+            for sent_id in self.selected_sentence_ids()
+        ])
 
     def unhighlight_selected_sentences(self):
         """取消高亮选中的句子"""
-        selected = False
-        for idx in self.table_manager.sentence_table.selectionModel().selectedRows():
-            row = idx.row()
-            sentences = self.highlight_manager.get_current_page_sentences(self.page_index)
-            if row < len(sentences):
-                sent = sentences[row]
-                if 'id' in sent:
-                    # 取消高亮句子
-                    if self.highlight_manager.unhighlight_sentence(sent['id']):
-                        selected = True
-        
-        if selected:
-            self.update_tables()
-            # 更新缩略图
-            self.update_thumbnail_previews()
+        self.apply_highlight_batch([
+            ('unhighlight', 'sentences', self.page_index, sent_id, None)
+            for sent_id in self.selected_sentence_ids()
+        ])
 
     def delete_selected_sentences(self):
         """删除选中的句子"""
@@ -1010,8 +1192,8 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         )
         
         delete_count = 0
+        sentences = self.highlight_manager.get_current_page_sentences(self.page_index)
         for row in rows_to_delete:
-            sentences = self.highlight_manager.get_current_page_sentences(self.page_index)
             if row < len(sentences):
                 sent = sentences[row]
                 if 'id' in sent:
@@ -1021,7 +1203,7 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         
         # 更新表格
         self.update_tables()
-        self.update_thumbnail_previews()
+        self.update_thumbnail_previews([self.page_index])
         self.log(f"已删除 {delete_count} 条句子（当前页）")
 
     def toggle_sentence_highlight(self, row, col):
@@ -1052,7 +1234,7 @@ class PDFHighlighter(QtWidgets.QMainWindow):
                     # 更新表格
                     self.update_tables()
                     # 更新缩略图
-                    self.update_thumbnail_previews()
+                    self.update_thumbnail_previews([self.page_index])
         finally:
             # 确保标志被清除
             if hasattr(self, "_processing_sentence_highlight"):
@@ -1080,21 +1262,28 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         """导出所有句子"""
         ExportManager.export_sentences(self.highlight_manager.translations['sentences'], self, all_pages=True)
 
-    def handle_translate_sentences_result(self, sentences, page_index, task_type):
-        """处理翻译结果 - 立即绘制高亮"""
+    def handle_translate_sentences_result(self, sentences, page_index, task_type, context=None):
+        """处理翻译结果 - 立即绘制高亮（context 为提交任务时的选区信息）"""
         if not sentences:
             self.log("错误：翻译未返回任何内容")
+            self.cleanup_worker(id(self.sender()))
+            self.highlight_manager.complete_translation_task(page_index)
+            self.update_thumbnail_previews([page_index])
             return
         
         # 添加翻译结果 - 使用高亮管理器的方法
         self.highlight_manager.add_sentences(sentences, page_index)
         
+        # 工作线程已定位的句子直接使用，界面线程不再查找
+        geometry = (context or {}).get("geometry")
+        if geometry:
+            self.highlight_manager.add_geometry(page_index, 'sentences', geometry)
+        
         # 立即高亮这些句子
         color = self.table_manager.sentence_color_edit.text()  # 获取当前句子颜色
-        for sent in sentences:
-            sent_id = sent.get('id')
-            if sent_id:
-                self.highlight_manager.highlight_sentence(sent_id, page_index, color)
+        sent_ids = [sent.get('id') for sent in sentences if sent.get('id')]
+        word_range = (context or {}).get("word_range")
+        self.highlight_manager.highlight_sentences(sent_ids, page_index, color, word_range=word_range)
         
         # 如果当前显示的是结果所在的页面，则更新表格和视图
         if self.page_index == page_index:
@@ -1108,22 +1297,29 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         self.highlight_manager.complete_translation_task(page_index)
         
         # 更新缩略图
-        self.update_thumbnail_previews()
+        self.update_thumbnail_previews([page_index])
 
-    def handle_extract_words_result(self, new_map, page_index, task_type):
+    def handle_extract_words_result(self, new_map, page_index, task_type, context=None):
         """处理单词提取结果 - 立即绘制高亮"""
         if not new_map:
             self.log("错误：生词提取未返回任何内容")
+            self.cleanup_worker(id(self.sender()))
+            self.highlight_manager.complete_translation_task(page_index)
+            self.update_thumbnail_previews([page_index])
             return
         
         # 添加新单词
         for word, trans in new_map.items():
             self.highlight_manager.add_word_translation(word, trans, page_index)
         
+        # 工作线程已定位的单词直接使用，界面线程不再查找
+        geometry = (context or {}).get("geometry")
+        if geometry:
+            self.highlight_manager.add_geometry(page_index, 'words', geometry)
+        
         # 立即高亮这些单词
         color = self.table_manager.word_color_edit.text()  # 获取当前单词颜色
-        for word in new_map:
-            self.highlight_manager.highlight_word(word, page_index, color)
+        self.highlight_manager.highlight_words(list(new_map), page_index, color)
         
         # 如果当前显示的是结果所在的页面，则更新表格和视图
         if self.page_index == page_index:
@@ -1137,17 +1333,152 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         self.highlight_manager.complete_translation_task(page_index)
         
         # 更新缩略图
-        self.update_thumbnail_previews()
+        self.update_thumbnail_previews([page_index])
 
     def handle_translation_error(self, error_msg):
         """处理翻译错误"""
         worker = self.sender()
         if worker:
             self.highlight_manager.complete_translation_task(worker.page_index)
-            self.update_thumbnail_previews()
+            self.update_thumbnail_previews([worker.page_index])
         self.log(f"错误: {error_msg}")
         self.cleanup_worker(id(self.sender()))
 
+    def start_batch_translation(self):
+        """按页面范围批量翻译，支持中断后从断点继续"""
+        if self.batch_job is not None:
+            reply = QtWidgets.QMessageBox.question(
+                self, "批量翻译", "批量翻译正在进行，是否停止？",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                QtWidgets.QMessageBox.No
+            )
+            if reply == QtWidgets.QMessageBox.Yes:
+                self.stop_batch_translation()
+            return
+        
+        task_name, ok = QtWidgets.QInputDialog.getItem(
+            self, "批量翻译", "任务类型:", ["整段翻译", "提取生词"], 0, False
+        )
+        if not ok:
+            return
+        task_type = "sentences" if task_name == "整段翻译" else "words"
+        
+        checkpoint = BatchCheckpoint(self.doc.name, task_type)
+        resume = False
+        if checkpoint.load():
+            reply = QtWidgets.QMessageBox.question(
+                self, "批量翻译",
+                f"发现未完成的批量任务（已完成 {len(checkpoint.completed)}/{len(checkpoint.pages)} 页），"
+                "是否从中断处继续？",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                QtWidgets.QMessageBox.Yes
+            )
+            resume = reply == QtWidgets.QMessageBox.Yes
+        
+        if resume:
+            self.restore_batch_results(checkpoint)
+        else:
+            range_text, ok = QtWidgets.QInputDialog.getText(
+                self, "批量翻译", f"页面范围（1-{self.doc.page_count}，如 1-10）:",
+                text=f"1-{self.doc.page_count}"
+            )
+            if not ok:
+                return
+            try:
+                pages = self.parse_page_range(range_text)
+            except ValueError:
+                pages = []
+            if not pages:
+                self.log("请输入有效的页面范围，例如 1-10")
+                return
+            checkpoint.reset(pages)
+        
+        service = self.document_service()
+        if service is None:
+            self.log("批量翻译需要从文件打开的文档")
+            return
+        worker = BatchTranslationWorker(task_type, checkpoint, service, analyzer=self.doc_analyzer)
+        worker_thread = QtCore.QThread()
+        worker.moveToThread(worker_thread)
+        
+        # 每页结果复用单次翻译的结果处理
+        if task_type == "sentences":
+            worker.page_finished.connect(self.handle_translate_sentences_result)
+        else:
+            worker.page_finished.connect(self.handle_extract_words_result)
+        worker.page_started.connect(self.handle_batch_page_started)
+        worker.page_error.connect(self.handle_batch_page_error)
+        worker.page_canceled.connect(self.handle_batch_page_canceled)
+        worker.progress.connect(self.log)
+        worker.all_finished.connect(self.handle_batch_finished)
+        
+        self.batch_job = (worker, worker_thread)
+        worker_thread.started.connect(worker.run)
+        worker_thread.start()
+        
+        self.batch_action.setText("停止批量")
+        pending = len(checkpoint.pending_pages())
+        self.log(f"开始批量{task_name}：共 {len(checkpoint.pages)} 页，待处理 {pending} 页")
+
+    def restore_batch_results(self, checkpoint):
+        """续传时恢复断点中已完成页面的结果（跳过本次会话中已有结果的页面）"""
+        restored = 0
+        for page_index, result in sorted(checkpoint.completed.items()):
+            if not result:
+                continue
+            if checkpoint.task_type == "sentences":
+                if self.highlight_manager.get_current_page_sentences(page_index):
+                    continue
+                self.handle_translate_sentences_result(result, page_index, checkpoint.task_type)
+            else:
+                if self.highlight_manager.translations['words'].get(page_index):
+                    continue
+                self.handle_extract_words_result(result, page_index, checkpoint.task_type)
+            restored += 1
+        if restored:
+            self.log(f"已从断点恢复 {restored} 页的翻译结果")
+
+    def handle_batch_page_started(self, page_index):
+        """批量任务开始处理某一页"""
+        self.highlight_manager.start_translation_task(page_index)
+        self.update_thumbnail_previews([page_index])
+
+    def handle_batch_page_error(self, error_msg, page_index):
+        """批量任务中某一页处理失败"""
+        self.highlight_manager.complete_translation_task(page_index)
+        self.update_thumbnail_previews([page_index])
+        self.log(f"错误: 页面 {page_index + 1} 批量翻译失败: {error_msg}")
+
+    def handle_batch_page_canceled(self, page_index):
+        """批量任务停止时放弃了某一页（未记录断点，续传时重新处理）"""
+        self.highlight_manager.complete_translation_task(page_index)
+        self.update_thumbnail_previews([page_index])
+
+    def handle_batch_finished(self, completed, total):
+        """批量任务结束（完成或被停止）"""
+        if self.batch_job is None:
+            return
+        worker, thread = self.batch_job
+        self.batch_job = None
+        thread.quit()
+        thread.wait()
+        thread.deleteLater()
+        self.batch_action.setText("批量翻译")
+        
+        if completed >= total:
+            worker.checkpoint.remove()
+            self.log(f"批量翻译完成，共 {total} 页")
+        else:
+            self.log(f"批量翻译已停止：完成 {completed}/{total} 页，下次可从断点继续")
+
+    def stop_batch_translation(self):
+        """停止批量翻译（已完成的页面保留在断点中）"""
+        if self.batch_job is None:
+            return
+        worker, thread = self.batch_job
+        worker.cancel()
+        self.log("正在停止批量翻译...")
+
     def cancel_translation(self, worker_id):
         """取消翻译任务"""
         if worker_id in self.active_workers:
@@ -1222,154 +1553,158 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         self.thumbnail_size = (120, max_height)
         
         for page_num in range(self.doc.page_count):
-            page = self.doc[page_num]
-            pix = page.get_pixmap(matrix=fitz.Matrix(0.2, 0.2))
-            img = QtGui.QImage(pix.samples, pix.width, pix.height, 
-                            pix.stride, QtGui.QImage.Format_RGB888)              
-            pixmap = QtGui.QPixmap.fromImage(img)
-            
-            # 创建绘图设备
-            painter = QtGui.QPainter(pixmap)
+            self.thumbnails.append(self.render_thumbnail(page_num))
+
+    def render_thumbnail(self, page_num):
+        """渲染单个页面的缩略图（带高亮和状态指示器）"""
+        page = self.doc[page_num]
+        pix = page.get_pixmap(matrix=fitz.Matrix(0.2, 0.2))
+        img = QtGui.QImage(pix.samples, pix.width, pix.height, 
+                        pix.stride, QtGui.QImage.Format_RGB888)              
+        pixmap = QtGui.QPixmap.fromImage(img)
+        
+        # 创建绘图设备
+        painter = QtGui.QPainter(pixmap)
+        
+        # 绘制单词高亮
+        if page_num in self.highlight_manager.page_highlights:
+            page_data = self.highlight_manager.page_highlights[page_num]
+            if 'words' in page_data:  # 确保有单词高亮数据
+                for word, word_info in page_data['words'].items():
+                    if word_info.get('highlighted', False):
+                        color = word_info['color']
+                        for rect in word_info['rects']:
+                            # 确保使用正确的坐标系统
+                            # 注意：fitz.Rect 使用 PDF 坐标系统（原点在左上角）
+                            scaled_rect = QtCore.QRectF(
+                                rect.x0 * 0.2,
+                                rect.y0 * 0.2,
+                                abs(rect.x1 - rect.x0) * 0.2,  # 宽度
+                                abs(rect.y1 - rect.y0) * 0.2   # 高度
+                            )
+                            painter.setBrush(QtGui.QBrush(color))
+                            painter.setPen(QtGui.QPen(color.darker(120), 1))
+                            painter.drawRect(scaled_rect)
+        
+        # 绘制句子高亮 - 使用正确的数据结构
+        if page_num in self.highlight_manager.page_highlights:
+            page_data = self.highlight_manager.page_highlights[page_num]
+            if 'sentences' in page_data:  # 确保有句子高亮数据
+                for sent_id, sent_info in page_data['sentences'].items():
+                    if sent_info.get('highlighted', False):
+                        color = sent_info['color']
+                        for rect in sent_info['rects']:
+                            scaled_rect = QtCore.QRectF(
+                                rect.x0 * 0.2,
+                                rect.y0 * 0.2,
+                                abs(rect.x1 - rect.x0) * 0.2,
+                                abs(rect.y1 - rect.y0) * 0.2
+                            )
+                            painter.setBrush(QtGui.QBrush(color))
+                            painter.setPen(QtGui.QPen(color.darker(120), 1))
+                            painter.drawRect(scaled_rect)
+        
+        # === 修改：绘制状态指示器（在中央放大显示）===
+        status = self.highlight_manager.get_page_translation_status(page_num)
+        if status != 0:
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
+            painter.setRenderHint(QtGui.QPainter.TextAntialiasing, True)
             
-            # 绘制单词高亮
-            if page_num in self.highlight_manager.page_highlights:
-                page_data = self.highlight_manager.page_highlights[page_num]
-                if 'words' in page_data:  # 确保有单词高亮数据
-                    for word, word_info in page_data['words'].items():
-                        if word_info.get('highlighted', False):
-                            color = word_info['color']
-                            for rect in word_info['rects']:
-                                # 确保使用正确的坐标系统
-                                # 注意：fitz.Rect 使用 PDF 坐标系统（原点在左上角）
-                                scaled_rect = QtCore.QRectF(
-                                    rect.x0 * 0.2,
-                                    rect.y0 * 0.2,
-                                    abs(rect.x1 - rect.x0) * 0.2,  # 宽度
-                                    abs(rect.y1 - rect.y0) * 0.2   # 高度
-                                )
-                                painter.setBrush(QtGui.QBrush(color))
-                                painter.setPen(QtGui.QPen(color.darker(120), 1))
-                                painter.drawRect(scaled_rect)
+            # 计算指示器位置（缩略图中央）
+            indicator_size = 50  # 放大指示器大小
+            indicator_x = (pixmap.width() - indicator_size) // 2
+            indicator_y = (pixmap.height() - indicator_size) // 2
             
-            # 绘制句子高亮 - 使用正确的数据结构
-            if page_num in self.highlight_manager.page_highlights:
-                page_data = self.highlight_manager.page_highlights[page_num]
-                if 'sentences' in page_data:  # 确保有句子高亮数据
-                    for sent_id, sent_info in page_data['sentences'].items():
-                        if sent_info.get('highlighted', False):
-                            color = sent_info['color']
-                            for rect in sent_info['rects']:
-                                scaled_rect = QtCore.QRectF(
-                                    rect.x0 * 0.2,
-                                    rect.y0 * 0.2,
-                                    abs(rect.x1 - rect.x0) * 0.2,
-                                    abs(rect.y1 - rect.y0) * 0.2
-                                )
-                                painter.setBrush(QtGui.QBrush(color))
-                                painter.setPen(QtGui.QPen(color.darker(120), 1))
-                                painter.drawRect(scaled_rect)
+            # 创建半透明背景
+            bg_rect = QtCore.QRectF(
+                indicator_x - 5, indicator_y - 5,
+                indicator_size + 10, indicator_size + 10
+            )
+            painter.setBrush(QtGui.QBrush(QtGui.QColor(0, 0, 0, 180)))
+            painter.setPen(QtCore.Qt.NoPen)
+            painter.drawRoundedRect(bg_rect, 10, 10)
             
-            # === 修改：绘制状态指示器（在中央放大显示）===
-            status = self.highlight_manager.get_page_translation_status(page_num)
-            if status != 0:
-                painter.setRenderHint(QtGui.QPainter.Antialiasing)
-                painter.setRenderHint(QtGui.QPainter.TextAntialiasing, True)
+            if status == 1:  # 翻译中
+                # 绘制旋转的加载动画
+                painter.setPen(QtGui.QPen(QtGui.QColor(255, 200, 0), 4))
+                painter.setBrush(QtCore.Qt.NoBrush)
                 
-                # 计算指示器位置（缩略图中央）
-                indicator_size = 50  # 放大指示器大小
-                indicator_x = (pixmap.width() - indicator_size) // 2
-                indicator_y = (pixmap.height() - indicator_size) // 2
+                # 计算旋转角度（基于时间）
+                angle = int(time.time() * 360) % 360
+                start_angle = angle * 16
+                span_angle = 270 * 16  # 3/4圆
                 
-                # 创建半透明背景
-                bg_rect = QtCore.QRectF(
-                    indicator_x - 5, indicator_y - 5,
-                    indicator_size + 10, indicator_size + 10
+                painter.drawArc(
+                    indicator_x, indicator_y, 
+                    indicator_size, indicator_size, 
+                    start_angle, span_angle
                 )
-                painter.setBrush(QtGui.QBrush(QtGui.QColor(0, 0, 0, 180)))
-                painter.setPen(QtCore.Qt.NoPen)
-                painter.drawRoundedRect(bg_rect, 10, 10)
                 
-                if status == 1:  # 翻译中
-                    # 绘制旋转的加载动画
-                    painter.setPen(QtGui.QPen(QtGui.QColor(255, 200, 0), 4))
-                    painter.setBrush(QtCore.Qt.NoBrush)
-                    
-                    # 计算旋转角度（基于时间）
-                    angle = int(time.time() * 360) % 360
-                    start_angle = angle * 16
-                    span_angle = 270 * 16  # 3/4圆
-                    
-                    painter.drawArc(
-                        indicator_x, indicator_y, 
-                        indicator_size, indicator_size, 
-                        start_angle, span_angle
-                    )
-                    
-                    # 绘制加载文字（放大）
-                    font = painter.font()
-                    font.setPointSize(10)
-                    font.setBold(True)
-                    painter.setFont(font)
-                    painter.setPen(QtGui.QPen(QtGui.QColor(255, 200, 0)))
-                    
-                    # 获取活动任务数量
-                    tasks = self.highlight_manager.page_translation_tasks.get(page_num, {'active': 0})
-                    task_count = tasks['active']
-                    text = f"加载中 ({task_count})"
-                    
-                    painter.drawText(
-                        QtCore.QRectF(
-                            indicator_x, indicator_y + indicator_size, 
-                            indicator_size, 20
-                        ),
-                        QtCore.Qt.AlignCenter, text
-                    )
-                elif status == 2:  # 已完成
-                    # 绘制绿色对勾
-                    painter.setPen(QtGui.QPen(QtGui.QColor(0, 255, 0), 4))
-                    painter.setBrush(QtCore.Qt.NoBrush)
-                    
-                    # 绘制对勾
-                    check_size = indicator_size - 10
-                    painter.drawLine(
-                        indicator_x + 10, indicator_y + indicator_size//2,
-                        indicator_x + indicator_size//2, indicator_y + indicator_size - 10
-                    )
-                    painter.drawLine(
-                        indicator_x + indicator_size//2, indicator_y + indicator_size - 10,
-                        indicator_x + indicator_size - 10, indicator_y + 10
-                    )
-                    
-                    # 绘制完成文字（放大）
-                    font = painter.font()
-                    font.setPointSize(10)
-                    font.setBold(True)
-                    painter.setFont(font)
-                    painter.setPen(QtGui.QPen(QtGui.QColor(0, 255, 0)))
-                    
-                    # 获取已完成任务数量
-                    tasks = self.highlight_manager.page_translation_tasks.get(page_num, {'completed': 0})
-                    task_count = tasks['completed']
-                    text = f"完成 ({task_count})"
-                    
-                    painter.drawText(
-                        QtCore.QRectF(
-                            indicator_x, indicator_y + indicator_size, 
-                            indicator_size, 20
-                        ),
-                        QtCore.Qt.AlignCenter, text
-                    )
-            
-            painter.end()
-            
-            # 调整到统一尺寸
-            scaled_pixmap = pixmap.scaled(
-                self.thumbnail_size[0], 
-                self.thumbnail_size[1],
-                QtCore.Qt.KeepAspectRatio,
-                QtCore.Qt.SmoothTransformation
-            )
-            self.thumbnails.append(scaled_pixmap)
+                # 绘制加载文字（放大）
+                font = painter.font()
+                font.setPointSize(10)
+                font.setBold(True)
+                painter.setFont(font)
+                painter.setPen(QtGui.QPen(QtGui.QColor(255, 200, 0)))
+                
+                # 获取活动任务数量
+                tasks = self.highlight_manager.page_translation_tasks.get(page_num, {'active': 0})
+                task_count = tasks['active']
+                text = f"加载中 ({task_count})"
+                
+                painter.drawText(
+                    QtCore.QRectF(
+                        indicator_x, indicator_y + indicator_size, 
+                        indicator_size, 20
+                    ),
+                    QtCore.Qt.AlignCenter, text
+                )
+            elif status == 2:  # 已完成
+                # 绘制绿色对勾
+                painter.setPen(QtGui.QPen(QtGui.QColor(0, 255, 0), 4))
+                painter.setBrush(QtCore.Qt.NoBrush)
+                
+                # 绘制对勾
+                check_size = indicator_size - 10
+                painter.drawLine(
+                    indicator_x + 10, indicator_y + indicator_size//2,
+                    indicator_x + indicator_size//2, indicator_y + indicator_size - 10
+                )
+                painter.drawLine(
+                    indicator_x + indicator_size//2, indicator_y + indicator_size - 10,
+                    indicator_x + indicator_size - 10, indicator_y + 10
+                )
+                
+                # 绘制完成文字（放大）
+                font = painter.font()
+                font.setPointSize(10)
+                font.setBold(True)
+                painter.setFont(font)
+                painter.setPen(QtGui.QPen(QtGui.QColor(0, 255, 0)))
+                
+                # 获取已完成任务数量
+                tasks = self.highlight_manager.page_translation_tasks.get(page_num, {'completed': 0})
+                task_count = tasks['completed']
+                text = f"完成 ({task_count})"
+                
+                painter.drawText(
+                    QtCore.QRectF(
+                        indicator_x, indicator_y + indicator_size, 
+                        indicator_size, 20
+                    ),
+                    QtCore.Qt.AlignCenter, text
+                )
+        
+        painter.end()
+        
+        # 调整到统一尺寸
+        scaled_pixmap = pixmap.scaled(
+            self.thumbnail_size[0], 
+            self.thumbnail_size[1],
+            QtCore.Qt.KeepAspectRatio,
+            QtCore.Qt.SmoothTransformation
+        )
+        return scaled_pixmap
 
     def setup_thumbnail_dock(self):
         """设置缩略图预览dock（改进的抽屉效果）"""
@@ -1612,18 +1947,17 @@ class PDFHighlighter(QtWidgets.QMainWindow):
 
     def clear_all_pages_word_highlights(self):
         """清除所有页的单词高亮"""
-        total = 0
-        for page_index in list(self.highlight_manager.page_highlights.keys()):
-            # 获取该页的所有单词
-            if 'words' in self.highlight_manager.page_highlights[page_index]:
-                words = list(self.highlight_manager.page_highlights[page_index]['words'].keys())
-                for word in words:
-                    if self.highlight_manager.unhighlight_word(word, page_index):
-                        total += 1
-        
-        # 刷新当前页表格
-        self.update_tables()
-        self.update_thumbnail_previews()
+        operations = []
+        for page_index, page_data in self.highlight_manager.page_highlights.items():
+            # 该页已高亮的单词
+            operations.extend(('unhighlight', 'words', page_index, word, None)
+                              for word, info in page_data['words'].items() if info['highlighted'])
+        # 尚未定位的待高亮单词
+        for page_index, pending in self.highlight_manager.deferred.items():
+            operations.extend(('unhighlight', 'words', page_index, word, None) for word in pending['words'])
+        
+        # 一次事务取消高亮，刷新表格和有变化页面的缩略图
+        total = self.apply_highlight_batch(operations)
         self.log(f"已清除所有页共 {total} 个单词高亮")
 
     def setup_sentence_buttons(self):
@@ -1647,136 +1981,84 @@ class PDFHighlighter(QtWidgets.QMainWindow):
 
     def clear_all_pages_sentence_highlights(self):
         """清除所有页的句子高亮"""
-        total = 0
-        # 遍历所有句子
-        for sent in self.highlight_manager.translations['sentences']:
-            sent_id = sent.get('id')
-            if sent_id:
-                # 取消高亮句子
-                if self.highlight_manager.unhighlight_sentence(sent_id):
-                    total += 1
-        
-        # 刷新当前页表格
-        self.update_tables()
-        # 更新缩略图
-        self.update_thumbnail_previews()
+        operations = []
+        for page_index, page_data in self.highlight_manager.page_highlights.items():
+            # 该页已高亮的句子
+            operations.extend(('unhighlight', 'sentences', page_index, sent_id, None)
+                              for sent_id, info in page_data['sentences'].items() if info['highlighted'])
+        # 尚未定位的待高亮句子
+        for page_index, pending in self.highlight_manager.deferred.items():
+            operations.extend(('unhighlight', 'sentences', page_index, sent_id, None)
+                              for sent_id in pending['sentences'])
+        
+        # 一次事务取消高亮，刷新表格和有变化页面的缩略图
+        total = self.apply_highlight_batch(operations)
         self.log(f"已清除所有页共 {total} 个句子高亮")
 
     def highlight_current_page_unhighlighted_words(self):
         """高亮当前页所有未高亮的单词"""
-        # 获取当前页的单词映射
-        word_map = self.highlight_manager.translations['words'].get(self.page_index, {})
-        
-        # 获取当前页已高亮的单词
-        highlighted_words = []
-        if self.page_index in self.highlight_manager.page_highlights:
-            page_data = self.highlight_manager.page_highlights[self.page_index]
-            if 'words' in page_data:  # 确保有单词数据
-                for word, word_info in page_data['words'].items():
-                    if word_info.get('highlighted', False):
-                        highlighted_words.append(word)
+        # 获取当前页的单词映射和已高亮的单词
+        word_map, highlighted_words = self.highlight_manager.get_word_highlight_info(self.page_index)
+        highlighted_words = set(highlighted_words)
         
         # 获取当前颜色
         color = self.table_manager.word_color_edit.text()
         
-        count = 0
-        for word in word_map:
-            if word not in highlighted_words:
-                # 高亮单词 - 使用当前颜色
-                if self.highlight_manager.highlight_word(word, self.page_index, color):
-                    count += 1
-        
-        # 确保当前页的高亮全部绘制
-        self.highlight_manager.draw_page_highlights(self.page_index)
-        
-        self.update_tables()
-        
-        # 刷新预览
-        self.update_thumbnail_previews()
+        # 一次扫描页面批量高亮 - 使用当前颜色
+        count = self.apply_highlight_batch([
+            ('highlight', 'words', self.page_index, word, color)
+            for word in word_map if word not in highlighted_words
+        ])
         self.log(f"已高亮 {count} 个未高亮单词")
     def clear_current_page_word_highlights(self):
         """清除当前页所有单词高亮"""
-        # 使用新的 page_highlights 数据结构
-        if self.page_index in self.highlight_manager.page_highlights:
-            page_data = self.highlight_manager.page_highlights[self.page_index]
-            words = list(page_data['words'].keys())
-            
-            # 使用新的 unhighlight_word 方法
-            for word in words:
-                self.highlight_manager.unhighlight_word(word, self.page_index)
-            
-            self.update_tables()
-            self.update_thumbnail_previews()
-            self.log(f"已清除当前页 {len(words)} 个单词高亮")
+        _, highlighted_words = self.highlight_manager.get_word_highlight_info(self.page_index)
+        count = self.apply_highlight_batch([
+            ('unhighlight', 'words', self.page_index, word, None) for word in highlighted_words
+        ])
+        self.log(f"已清除当前页 {count} 个单词高亮")
 
     def highlight_all_pages_words(self):
         """高亮所有页的单词"""
         # 获取当前颜色
         color = self.table_manager.word_color_edit.text()
         
-        total = 0
+        # 每页未高亮的单词
+        plan = {}
         for page_index in self.highlight_manager.translations['words']:
             word_map = self.highlight_manager.translations['words'][page_index]
-            for word in word_map:
-                # 检查单词是否已高亮
-                if not self.highlight_manager.is_word_highlighted(word, page_index):
-                    # 高亮单词 - 使用当前颜色
-                    if self.highlight_manager.highlight_word(word, page_index, color):
-                        total += 1
-        
-        # 如果当前页有更新，刷新表格并绘制
-        if self.page_index in self.highlight_manager.translations['words']:
-            self.update_tables()
-            # 强制绘制当前页
-            self.highlight_manager.draw_page_highlights(self.page_index)
-
-        self.update_thumbnail_previews()
-        self.log(f"已高亮所有页共 {total} 个单词")
+            words = [word for word in word_map
+                     if not self.highlight_manager.is_word_highlighted(word, page_index)]
+            if words:
+                plan[page_index] = words
+        
+        self.schedule_highlights("words", plan, color)
 
     def highlight_current_page_unhighlighted_sentences(self):
         """高亮当前页所有未高亮的句子"""
-        # 获取当前页所有句子
-        sentences = self.highlight_manager.get_current_page_sentences(self.page_index)
-        
-        # 获取当前页已高亮的句子ID
-        highlighted_ids = []
-        if self.page_index in self.highlight_manager.page_highlights:
-            page_data = self.highlight_manager.page_highlights[self.page_index]
-            if 'sentences' in page_data:  # 确保有句子数据
-                for sent_id, sent_info in page_data['sentences'].items():
-                    if sent_info.get('highlighted', False):
-                        highlighted_ids.append(sent_id)
+        # 获取当前页所有句子和已高亮的句子ID
+        sentences, highlighted_ids = self.highlight_manager.get_sentence_highlight_info(self.page_index)
+        highlighted_ids = set(highlighted_ids)
         
         # 获取当前颜色
         color = self.table_manager.sentence_color_edit.text()
         
-        count = 0
-        for sent in sentences:
-            sent_id = sent.get('id')
-            if sent_id and sent_id not in highlighted_ids:
-                # 高亮句子 - 使用当前颜色
-                if self.highlight_manager.highlight_sentence(sent_id, self.page_index, color):
-                    count += 1
-        
-        self.update_tables()
-        # 刷新预览 - 确保句子高亮显示在缩略图中
-        self.update_thumbnail_previews()
+        # 按顺序批量定位未高亮的句子 - 使用当前颜色
+        count = self.apply_highlight_batch([
+            ('highlight', 'sentences', self.page_index, sent.get('id'), color)
+            for sent in sentences if sent.get('id') and sent.get('id') not in highlighted_ids
+        ])
         self.log(f"已高亮 {count} 个未高亮句子")
 
     def clear_current_page_sentence_highlights(self):
         """清除当前页所有句子高亮"""
-        # 收集当前页所有句子ID
-        sentences = self.highlight_manager.get_current_page_sentences(self.page_index)
-        sent_ids = [sent.get('id') for sent in sentences]
+        # 当前页已高亮的句子ID
+        _, highlighted_ids = self.highlight_manager.get_sentence_highlight_info(self.page_index)
         
-        # 移除当前页所有句子高亮
-        count = 0
-        for sent_id in sent_ids:
-            if sent_id and self.highlight_manager.unhighlight_sentence(sent_id):
-                count += 1
-        
-        self.update_tables()
-        self.update_thumbnail_previews()
+        # 一次事务移除当前页所有句子高亮
+        count = self.apply_highlight_batch([
+            ('unhighlight', 'sentences', self.page_index, sent_id, None) for sent_id in highlighted_ids
+        ])
         self.log(f"已清除当前页 {count} 个句子高亮")
 
     def highlight_all_pages_sentences(self):
@@ -1784,21 +2066,211 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         # 获取当前颜色
         color = self.table_manager.sentence_color_edit.text()
         
-        total = 0
+        # 按页分组，同一页的句子按顺序批量定位
+        page_sent_ids = {}
         for sent in self.highlight_manager.translations['sentences']:
             sent_id = sent.get('id')
             page_index = sent.get('page', self.page_index)
             if sent_id and not self.highlight_manager.is_sentence_highlighted(sent_id):
-                # 高亮句子 - 使用当前颜色
-                if self.highlight_manager.highlight_sentence(sent_id, page_index, color):
-                    total += 1
+                page_sent_ids.setdefault(page_index, []).append(sent_id)
         
-        # 如果当前页有更新，刷新表格
-        self.update_tables()
+        self.schedule_highlights("sentences", page_sent_ids, color)
+
+    def schedule_highlights(self, task_type, plan, color):
+        """批量高亮只记录每页的待高亮项和颜色：当前页立即定位，
+        其余页面在访问、刷新缩略图、导出时或空闲时逐页定位
+
+        plan 为 {page_index: [单词或句子ID, ...]}
+        """
+        total = 0
+        for page_index, keys in plan.items():
+            self.highlight_manager.defer_highlights(page_index, task_type, keys, color)
+            total += len(keys)
+        
+        if self.page_index in plan:
+            self.highlight_manager.realize_page(self.page_index)
+            self.update_tables()
+            self.update_thumbnail_previews([self.page_index])
+        
+        name = '单词' if task_type == 'words' else '句子'
+        self.log(f"已安排高亮所有页共 {total} 个{name}，其余页面在空闲时定位")
+        
+        # 需要定位的页面较多时由多进程定位服务预先定位，否则在空闲时逐页定位
+        if not self.start_parallel_locate(task_type, plan):
+            self.start_idle_realize()
+
+    def start_idle_realize(self):
+        """有待高亮项且没有进行中的定位任务时开始空闲定位"""
+        if self.highlight_manager.deferred and self.locate_job is None and self.idle_locate_future is None:
+            self.realize_timer.start()
+
+    def realize_deferred_page(self, page_index):
+        """定位一页的待高亮项并刷新该页缩略图"""
+        self.highlight_manager.realize_page(page_index)
+        if page_index == self.page_index:
+            self.update_tables()
+        self.update_thumbnail_previews([page_index])
+
+    def realize_next_deferred_page(self):
+        """空闲时处理一页待高亮项（离当前页最近的页面优先）
+
+        尚未定位的单词/句子交给定位进程，结果返回后再在界面线程添加高亮项；
+        位置都已知或文档没有定位服务时，在界面线程处理这一页后等待下一次空闲。
+        """
+        deferred = self.highlight_manager.deferred
+        if not deferred or self.locate_job is not None or self.idle_locate_future is not None:
+            return
+        page_index = min(deferred, key=lambda p: (abs(p - self.page_index), p))
+        job = self.pending_locate_job(page_index)
+        service = self.document_service() if job is not None else None
+        if service is None:
+            self.realize_deferred_page(page_index)
+            if self.highlight_manager.deferred:
+                self.realize_timer.start()
+            else:
+                self.log("所有页面的高亮已定位完成")
+            return
         
-        # 刷新预览 - 确保句子高亮显示在缩略图中
-        self.update_thumbnail_previews()
-        self.log(f"已高亮所有页共 {total} 个句子")
+        future = service.submit(locate_page, *job)
+        self.idle_locate_future = future
+        # 定位服务关闭后（切换或关闭文档）不再载入结果
+        future.add_done_callback(
+            lambda f: f is self.idle_locate_future and self.idle_page_located.emit(f, page_index)
+        )
+
+    def handle_idle_page_located(self, future, page_index):
+        """空闲定位的一页结果返回：记录几何结果，继续处理下一页"""
+        if future is not self.idle_locate_future:
+            return
+        self.idle_locate_future = None
+        try:
+            _, task_type, found = future.result()
+            geometry = {text: [fitz.Rect(r) for r in rects] for text, rects in found.items()}
+            self.highlight_manager.add_geometry(page_index, task_type, geometry)
+        except Exception as e:
+            # 定位进程出错时这一页在界面线程定位
+            self.log(f"定位错误: {str(e)}")
+            self.realize_deferred_page(page_index)
+        self.start_idle_realize()
+        if not self.highlight_manager.deferred:
+            self.log("所有页面的高亮已定位完成")
+
+    def pending_locate_texts(self, page_index, task_type, keys):
+        """一页中尚未定位的单词或句子原文（keys 为单词或句子ID）"""
+        if task_type == "sentences":
+            sentences = self.highlight_manager.sentence_ids
+            texts = [sentences[sent_id]['original'] for sent_id in keys if sent_id in sentences]
+        else:
+            texts = list(keys)
+        return self.highlight_manager.pending_geometry(page_index, task_type, texts)
+
+    def pending_locate_job(self, page_index):
+        """一页待高亮项中需要定位进程定位的任务 (page_index, task_type, texts)，都已定位时返回 None"""
+        pending = self.highlight_manager.deferred.get(page_index, {})
+        for task_type in ("words", "sentences"):
+            texts = self.pending_locate_texts(page_index, task_type, pending.get(task_type, ()))
+            if texts:
+                return page_index, task_type, texts
+        return None
+
+    def start_parallel_locate(self, task_type, plan):
+        """把"高亮所有页"的定位交给多进程定位服务，返回是否已由服务处理
+
+        plan 为 {page_index: [单词或句子ID, ...]}。只有尚未定位过的单词/句子需要提交，
+        每页定位完成后立即高亮该页的待高亮项；
+        需要定位的页面少于 PARALLEL_MIN_PAGES 或只有一个进程时返回False，由空闲定位处理。
+        """
+        if self.locate_job is not None:
+            # 进行中的定位任务结束后由空闲定位处理
+            return True
+        if not self.doc.name or pool_size(self.locate_processes) < 2:
+            return False
+        
+        jobs = []
+        for page_index, keys in plan.items():
+            texts = self.pending_locate_texts(page_index, task_type, keys)
+            if texts:
+                jobs.append((page_index, task_type, texts))
+        if len(jobs) < PARALLEL_MIN_PAGES:
+            return False
+        
+        worker = LocateWorker(self.document_service(), jobs)
+        worker_thread = QtCore.QThread()
+        worker.moveToThread(worker_thread)
+        worker.page_located.connect(self.handle_page_located)
+        worker.progress.connect(self.log)
+        worker.all_finished.connect(self.handle_locate_finished)
+        
+        self.locate_job = {"worker": worker, "thread": worker_thread}
+        
+        worker_thread.started.connect(worker.run)
+        worker_thread.start()
+        self.log(f"正在定位 {len(jobs)} 页（{self.locate_service.processes} 个进程）...")
+        return True
+
+    def handle_page_located(self, page_index, task_type, geometry):
+        """定位服务返回一页的结果：记录几何结果并立即高亮该页"""
+        job = self.locate_job
+        if job is None or job["worker"] is not self.sender():
+            return
+        self.highlight_manager.add_geometry(page_index, task_type, geometry)
+        self.realize_deferred_page(page_index)
+
+    def handle_locate_finished(self, completed, total):
+        """定位任务结束：清理线程，剩余的待高亮项交给空闲定位"""
+        worker = self.sender()
+        job = self.locate_job
+        if job is None or job["worker"] is not worker:
+            return
+        job["thread"].quit()
+        job["thread"].wait()
+        job["thread"].deleteLater()
+        if completed < total:
+            # 定位服务出错时剩余页面在空闲时定位，下次重新启动定位进程
+            self.log(f"多进程定位完成 {completed}/{total} 页，其余页面在空闲时定位")
+            if self.locate_service is not None:
+                self.locate_service.shutdown()
+                self.locate_service = None
+        self.locate_job = None
+        self.start_idle_realize()
+        if not self.highlight_manager.deferred:
+            self.log("所有页面的高亮已定位完成")
+
+    def document_service(self):
+        """当前文档的定位服务（首次使用时创建，子进程在第一次提交任务时启动）；文档没有路径时返回 None"""
+        if not self.doc.name:
+            return None
+        if self.locate_service is None or self.locate_service.doc_path != self.doc.name:
+            self.stop_locate_service()
+            self.locate_service = LocateService(self.doc.name, self.locate_processes)
+        return self.locate_service
+
+    def stop_locate_service(self):
+        """停止进行中的定位任务并关闭定位进程（关闭或切换文档时调用）"""
+        job = self.locate_job
+        self.locate_job = None
+        self.analysis_future = None
+        idle_future = self.idle_locate_future
+        self.idle_locate_future = None
+        if idle_future is not None:
+            idle_future.cancel()
+        if job is not None:
+            job["worker"].cancel()
+        if self.locate_service is not None:
+            self.locate_service.shutdown()
+            self.locate_service = None
+        if job is not None:
+            job["thread"].quit()
+            job["thread"].wait()
+            job["thread"].deleteLater()
+
+    def closeEvent(self, event):
+        """关闭窗口时停止后台任务并关闭定位进程"""
+        self.stop_batch_translation()
+        self.prefetch_manager.stop()
+        self.realize_timer.stop()
+        self.stop_locate_service()
+        super().closeEvent(event)
 
     def delete_selected_words(self):
         """删除选中的单词"""
@@ -1817,7 +2289,7 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         
         # 更新表格
         self.update_tables()
-        self.update_thumbnail_previews()
+        self.update_thumbnail_previews([self.page_index])
         self.log(f"已删除 {delete_count} 个单词（当前页）")
 
     def export_highlighted_pdf(self):
@@ -1828,6 +2300,13 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         if not path:
             return
         
+        # 导出需要所有高亮的位置：先定位尚未定位的待高亮项
+        if self.highlight_manager.deferred:
+            self.realize_timer.stop()
+            count = self.highlight_manager.realize_all()
+            self.update_thumbnail_previews()
+            self.log(f"已定位 {count} 个待高亮项")
+        
         # 创建新文档
         new_doc = fitz.open()
         
@@ -1990,20 +2469,32 @@ class PDFHighlighter(QtWidgets.QMainWindow):
             else:
                 self.table_manager.sentence_color_edit.setText("#ADD8E6")
 
-    def update_thumbnail_previews(self):
-        """更新缩略图预览（不重新创建整个dock）"""
-        # 重新生成缩略图
-        self.generate_thumbnails()
+    def update_thumbnail_previews(self, pages=None):
+        """更新缩略图预览（不重新创建整个dock）
+
+        pages 为需要刷新的页面索引列表；为 None 时刷新全部页面
+        """
+        if pages is None or len(self.thumbnails) != self.doc.page_count:
+            # 重新生成缩略图（先定位所有页面的待高亮项）
+            self.highlight_manager.realize_all()
+            self.generate_thumbnails()
+            pages = range(len(self.thumbnails))
+        else:
+            # 只重新渲染指定页面（先定位这些页面的待高亮项）
+            for page_num in pages:
+                if 0 <= page_num < len(self.thumbnails):
+                    self.highlight_manager.realize_page(page_num)
+                    self.thumbnails[page_num] = self.render_thumbnail(page_num)
         
         # 更新现有缩略图显示
-        for i, thumb in enumerate(self.thumbnails):
-            if i < len(self.thumbnail_labels):
+        for i in pages:
+            if i < len(self.thumbnails) and i < len(self.thumbnail_labels):
                 # 获取缩略图容器
                 container = self.thumbnail_labels[i]
                 # 找到容器中的QLabel
                 thumb_label = container.findChild(QtWidgets.QLabel)
                 if thumb_label:
-                    thumb_label.setPixmap(thumb)
+                    thumb_label.setPixmap(self.thumbnails[i])
         
         # 更新当前页高亮
         self.update_thumbnail_highlight()
@@ -2332,10 +2823,17 @@ class PDFHighlighter(QtWidgets.QMainWindow):
                 self.is_dark_mode = config.get("DARK_MODE", False)
                 self.invert_pdf_colors = config.get("INVERT_PDF", False)
                 self.contrast_level = config.get("CONTRAST_LEVEL", 0.7)
+                self.prefetch_enabled = config.get("PREFETCH_ENABLED", False)
+                self.prefetch_depth = config.get("PREFETCH_PAGES", 2)
+                self.locate_processes = config.get("LOCATE_PROCESSES", 0)
         except:
             self.is_dark_mode = False
             self.invert_pdf_colors = False
             self.contrast_level = 0.7
+            self.prefetch_enabled = False
+            self.prefetch_depth = 2
+            self.locate_processes = 0
+        self.prefetch_manager.depth = self.prefetch_depth
         
         # 应用模式
         self.apply_dark_mode()
@@ -2356,7 +2854,9 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         config = {
             "DARK_MODE": self.is_dark_mode,
             "INVERT_PDF": self.invert_pdf_colors,
-            "CONTRAST_LEVEL": self.contrast_level  # 新增
+            "CONTRAST_LEVEL": self.contrast_level,  # 新增
+            "PREFETCH_ENABLED": self.prefetch_enabled,
+            "PREFETCH_PAGES": self.prefetch_depth
         }
         
         try:
@@ -2407,6 +2907,12 @@ class PDFHighlighter(QtWidgets.QMainWindow):
         # 对比度滑块
         if hasattr(self, 'contrast_slider'):
             self.contrast_slider.setValue(int(self.contrast_level * 100))
+        
+        # 预读按钮
+        if hasattr(self, 'prefetch_action'):
+            self.prefetch_action.blockSignals(True)
+            self.prefetch_action.setChecked(self.prefetch_enabled)
+            self.prefetch_action.blockSignals(False)
 
     def final_layout_refresh(self):
         """最终布局刷新 - 确保间距稳定"""
@@ -2414,28 +2920,11 @@ class PDFHighlighter(QtWidgets.QMainWindow):
             self.toolbar.updateGeometry()
             self.toolbar.adjustSize()
 
-    def get_selection_with_context(self):
-        """获取带上下文的文本以改善句子匹配"""
-        if not self.selection_info:
-            return ""
-        
-        # 获取当前页面和选择矩形
-        page_index = self.selection_info.get("page_index", self.page_index)
-        page = self.doc[page_index]
-        
-        # 获取选择周围的文本（扩大区域）
-        context_rect = fitz.Rect(
-            self.selection_info.get("rect", {}).get("x0", 0) - 30,
-            self.selection_info.get("rect", {}).get("y0", 0) - 15,
-            self.selection_info.get("rect", {}).get("x1", 0) + 30,
-            self.selection_info.get("rect", {}).get("y1", 0) + 15
-        )
-        
-        # 确保矩形在页面范围内
-        page_rect = page.rect
-        context_rect.x0 = max(context_rect.x0, page_rect.x0)
-        context_rect.y0 = max(context_rect.y0, page_rect.y0)
-        context_rect.x1 = min(context_rect.x1, page_rect.x1)
-        context_rect.y1 = min(context_rect.y1, page_rect.y1)
-        
-        return clean_text(page.get_textbox(context_rect))
+    def selection_context(self, page_index):
+        """提交任务时随任务传递的选区信息（选区不在该页时为空）"""
+        if self.selection_info.get("page_index") != page_index:
+            return None
+        return {
+            "rect": self.selection_info.get("rect"),
+            "word_range": self.selection_info.get("word_range")
+        }
@@ -0,0 +1,106 @@
+from PyQt5 import QtCore
+from .thread_manager import BatchTranslationWorker, BatchCheckpoint
+
+class PrefetchManager(QtCore.QObject):
+    """预读翻译：在后台翻译即将阅读的页面，结果在访问该页时才高亮
+
+    预读请求作为后台请求使用全局请求名额，有用户请求进行或等待时不会开始新的请求。
+    """
+
+    def __init__(self, window, depth=2):
+        super().__init__()
+        self.window = window
+        self.depth = depth
+        self.jobs = {}      # {page_index: (worker, thread)}
+        self.results = {}   # {page_index: (result, context)}
+        self._retired = []  # 已取消但线程尚未结束的任务
+
+    def schedule(self, page_index):
+        """用户到达某页时，预读其后 depth 页，并取消窗口外的预读任务
+
+        当前页进行中的预读任务保留，结果到达时直接高亮。
+        """
+        doc = self.window.doc
+        wanted = list(range(page_index + 1, min(doc.page_count, page_index + 1 + self.depth)))
+
+        # 用户跳转到别处时，取消不再需要的预读
+        for p in list(self.jobs.keys()):
+            if p != page_index and p not in wanted:
+                self.cancel_page(p)
+
+        for p in wanted:
+            if p in self.jobs or p in self.results:
+                continue
+            # 已有翻译结果的页面无需预读
+            if self.window.highlight_manager.get_current_page_sentences(p):
+                continue
+            self._start(p)
+
+    def _start(self, page_index):
+        """启动单页预读任务"""
+        service = self.window.document_service()
+        if service is None:
+            return
+        checkpoint = BatchCheckpoint(self.window.doc.name, "sentences", persist=False)
+        checkpoint.reset([page_index])
+
+        worker = BatchTranslationWorker(
+            "sentences", checkpoint, service,
+            analyzer=self.window.doc_analyzer, background=True
+        )
+        thread = QtCore.QThread()
+        worker.moveToThread(thread)
+
+        worker.page_finished.connect(self._on_page_finished)
+        worker.all_finished.connect(lambda completed, total, w=worker: self._on_job_finished(w))
+        thread.started.connect(worker.run)
+
+        self.jobs[page_index] = (worker, thread)
+        thread.start(QtCore.QThread.LowPriority)
+
+    def _on_page_finished(self, result, page_index, task_type, context=None):
+        """保存预读结果及其定位结果（暂不高亮）"""
+        job = self.jobs.get(page_index)
+        if job is None or job[0] is not self.sender() or job[0].canceled:
+            return
+        if result:
+            self.results[page_index] = (result, context)
+            self.window.log(f"已预读页面 {page_index + 1}")
+            # 用户已翻到该页时立即高亮
+            if page_index == self.window.page_index:
+                self.window.apply_prefetched_result(page_index)
+
+    def _on_job_finished(self, worker):
+        """清理已结束的预读线程"""
+        for p, (w, thread) in list(self.jobs.items()):
+            if w is worker:
+                del self.jobs[p]
+                self._finish_thread(thread)
+                return
+        for job in list(self._retired):
+            if job[0] is worker:
+                self._retired.remove(job)
+                self._finish_thread(job[1])
+                return
+
+    def _finish_thread(self, thread):
+        thread.quit()
+        thread.wait()
+        thread.deleteLater()
+
+    def cancel_page(self, page_index):
+        """取消指定页面的预读"""
+        job = self.jobs.pop(page_index, None)
+        if job is not None:
+            job[0].cancel()
+            self._retired.append(job)
+
+    def take_result(self, page_index):
+        """取出已预读的 (结果, context)（取出后不再保留），没有时返回 (None, None)"""
+        return self.results.pop(page_index, (None, None))
+
+    def stop(self):
+        """停止所有预读并丢弃未使用的结果"""
+        for p in list(self.jobs.keys()):
+            self.cancel_page(p)
+        self.results.clear()
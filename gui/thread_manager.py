@@ -1,90 +1,194 @@
 import threading
 import re
+import os
+import json
+import hashlib
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+import fitz
 from PyQt5 import QtCore, QtWidgets
-from translator import translate_sentences, extract_and_translate_words
+from translator import (
+    translate_sentences, extract_and_translate_words, split_text, load_ai_config
+)
+from locate_service import locate_page, extract_page_text, wait_result
+
+class RequestScheduler:
+    """全局的LLM请求并发限制：用户任务与预读共用同一组名额，用户请求优先
+
+    后台（预读）请求只在没有用户请求进行或等待时开始，且同时最多 background_limit 个。
+    """
+
+    def __init__(self, capacity=4, background_limit=1):
+        self.capacity = capacity
+        self.background_limit = background_limit
+        self._cond = threading.Condition()
+        self._running = {False: 0, True: 0}  # {是否后台: 进行中的请求数}
+        self._waiting = 0  # 等待名额的用户请求数
+
+    def set_capacity(self, capacity):
+        """更新并发上限（任务开始时按当前配置设置）"""
+        with self._cond:
+            self.capacity = max(1, int(capacity))
+            self._cond.notify_all()
+
+    def _can_start(self, background):
+        if self._running[False] + self._running[True] >= self.capacity:
+            return False
+        if background:
+            return not self._waiting and not self._running[False] and self._running[True] < self.background_limit
+        return True
+
+    def acquire(self, background=False, canceled=None, interval=0.2):
+        """等待一个请求名额，任务被取消时返回False"""
+        with self._cond:
+            if not background:
+                self._waiting += 1
+            try:
+                while not self._can_start(background):
+                    if canceled is not None and canceled():
+                        return False
+                    self._cond.wait(interval)
+            finally:
+                if not background:
+                    self._waiting -= 1
+            self._running[background] += 1
+            return True
+
+    def release(self, background=False):
+        with self._cond:
+            self._running[background] -= 1
+            self._cond.notify_all()
+
+    def running(self, background=False):
+        """进行中的请求数"""
+        with self._cond:
+            return self._running[background]
+
+
+# 应用内所有翻译任务共用的请求名额
+request_slots = RequestScheduler()
+
 
 class TranslationWorker(QtCore.QObject):
-    finished = QtCore.pyqtSignal(object, int, str)  # result, page_index, task_type
+    finished = QtCore.pyqtSignal(object, int, str, object)  # result, page_index, task_type, context
     error = QtCore.pyqtSignal(str)
     progress = QtCore.pyqtSignal(str)
 
-    def __init__(self, task_type, text, page_index):
+    def __init__(self, task_type, text, page_index, context=None, service=None,
+                 raise_errors=False, background=False):
         super().__init__()
         self.task_type = task_type
         self.text = text
         self.page_index = page_index
+        # 选区信息（框选区域、覆盖的单词序号范围），随结果返回
+        self.context = context
+        # 文档的定位服务：给出时由定位进程定位结果，界面线程只需添加高亮项
+        self.service = service
         self.canceled = False
+        self.errors = []
+        # 为True时作为后台（预读）请求，只在用户请求空闲时占用名额
+        self._background = background
+        # 为True时请求或解析失败记入 errors（批量翻译不把失败的页面记为完成）
+        self._raise_errors = raise_errors
 
     def run(self):
         try:
             self.progress.emit(f"开始处理: {self.task_type} (页面 {self.page_index + 1})")
             
-            # 长文本拆分
-            chunks = self._split_text(self.text)
-            results = []
-            
-            # 多线程处理每个分块
-            threads = []
-            for i, chunk in enumerate(chunks):
-                if self.canceled:
-                    return
-                    
-                thread = threading.Thread(
-                    target=self._process_chunk,
-                    args=(chunk, i, results)
-                )
-                threads.append(thread)
-                thread.start()
-            
-            # 等待所有线程完成
-            for thread in threads:
-                thread.join()
-            
-            # 按顺序合并结果
-            results.sort(key=lambda x: x[0])
-            merged_result = self._merge_results([r[1] for r in results])
+            merged_result = self.process()
             
             if not self.canceled:
-                self.finished.emit(merged_result, self.page_index, self.task_type)
+                context = self.locate(merged_result)
+                self.finished.emit(merged_result, self.page_index, self.task_type, context)
                 self.progress.emit(f"完成: {self.task_type} (页面 {self.page_index + 1})")
         except Exception as e:
             self.error.emit(f"处理错误: {str(e)}")
 
-    def _split_text(self, text):
-        """智能拆分长文本"""
-        # 按句子拆分
-        sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s', text)
+    def process(self):
+        """在当前线程中完成拆分、并发请求和结果合并，返回合并后的结果"""
+        # 长文本拆分
+        chunks = self._split_text(self.text)
+        results = []
         
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        max_length = 1000  # 每个分块的最大字符数
+        # 所有任务共用的请求并发上限
+        request_slots.set_capacity(load_ai_config().get("MAX_CONCURRENCY", 4))
         
-        for sentence in sentences:
-            if current_length + len(sentence) > max_length and current_chunk:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = [sentence]
-                current_length = len(sentence)
-            else:
-                current_chunk.append(sentence)
-                current_length += len(sentence)
+        # 多线程处理每个分块
+        threads = []
+        for i, chunk in enumerate(chunks):
+            if self.canceled:
+                break
+                
+            thread = threading.Thread(
+                target=self._process_chunk,
+                args=(chunk, i, results)
+            )
+            threads.append(thread)
+            thread.start()
         
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+        # 等待所有线程完成
+        for thread in threads:
+            thread.join()
         
-        return chunks
+        # 按顺序合并结果
+        results.sort(key=lambda x: x[0])
+        return self._merge_results([r[1] for r in results])
+
+    def locate(self, result):
+        """由定位进程定位结果（当前线程只等待），返回附带定位结果的context
+
+        context["geometry"] 为 {句子原文或单词: 矩形列表}，界面线程据此直接添加高亮项；
+        没有定位服务、任务被取消或定位失败时返回原context，由界面线程自行定位。
+        """
+        if self.service is None or not result or self.canceled:
+            return self.context
+        context = dict(self.context or {})
+        if self.task_type == "sentences":
+            texts = [sent.get('original') for sent in result if sent.get('original')]
+        else:  # "words"
+            texts = list(result)
+        try:
+            future = self.service.submit(
+                locate_page, self.page_index, self.task_type, texts, context.get("word_range")
+            )
+            located = wait_result(future, lambda: self.canceled)
+        except Exception as e:
+            print(f"定位结果失败: {str(e)}")
+            return self.context
+        if located is None:
+            return self.context
+        _, _, found = located
+        context["geometry"] = {text: [fitz.Rect(r) for r in rects] for text, rects in found.items()}
+        return context
+
+    def _split_text(self, text):
+        """智能拆分长文本"""
+        return split_text(text)
 
     def _process_chunk(self, chunk, index, results):
         """处理单个文本分块"""
         try:
-            if self.task_type == "sentences":
-                result = translate_sentences(chunk)
-            else:  # "words"
-                result = extract_and_translate_words(chunk)
+            queued_at = time.time()
+            if not request_slots.acquire(self._background, lambda: self.canceled):
+                return
+            try:
+                if self.canceled:
+                    return
+                # 等待并发名额的时间计入请求日志
+                queue_wait = time.time() - queued_at
+                if self.task_type == "sentences":
+                    result = translate_sentences(chunk, queue_wait=queue_wait, raise_errors=self._raise_errors)
+                else:  # "words"
+                    result = extract_and_translate_words(
+                        chunk, queue_wait=queue_wait, raise_errors=self._raise_errors
+                    )
+            finally:
+                request_slots.release(self._background)
             
             with threading.Lock():
                 results.append((index, result))
         except Exception as e:
+            self.errors.append(str(e))
             self.error.emit(f"分块处理错误: {str(e)}")
 
     def _merge_results(self, results):
@@ -101,4 +205,226 @@ class TranslationWorker(QtCore.QObject):
             return merged
 
     def cancel(self):
-        self.canceled = True
\ No newline at end of file
+        self.canceled = True
+
+
+class BatchCheckpoint:
+    """批量翻译的断点记录：保存页面范围和已完成页面的结果"""
+
+    def __init__(self, pdf_path, task_type, persist=True):
+        self.pdf_path = os.path.abspath(pdf_path)
+        self.task_type = task_type
+        self.persist = persist  # 为False时只在内存中记录（用于预读等临时任务）
+        self.pages = []
+        self.completed = {}  # {page_index: result}
+        self._lock = threading.Lock()
+        
+        current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        key = hashlib.sha1(f"{self.pdf_path}|{task_type}".encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(current_dir, 'batch_checkpoints', f"{key}.json")
+
+    def load(self):
+        """加载已有断点，返回是否存在未完成的任务"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.pages = data.get("pages", [])
+            self.completed = {int(k): v for k, v in data.get("completed", {}).items()}
+        except Exception:
+            self.pages = []
+            self.completed = {}
+        return bool(self.pending_pages())
+
+    def reset(self, pages):
+        """开始新的批量任务"""
+        with self._lock:
+            self.pages = list(pages)
+            self.completed = {}
+        self.save()
+
+    def pending_pages(self):
+        """获取尚未完成的页面"""
+        return [p for p in self.pages if p not in self.completed]
+
+    def mark_done(self, page_index, result):
+        """记录一页已完成并立即写入磁盘"""
+        with self._lock:
+            self.completed[page_index] = result
+        self.save()
+
+    def save(self):
+        if not self.persist:
+            return
+        with self._lock:
+            data = {
+                "pdf": self.pdf_path,
+                "task_type": self.task_type,
+                "pages": self.pages,
+                "completed": {str(k): v for k, v in self.completed.items()}
+            }
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"保存批量翻译断点失败: {str(e)}")
+
+    def remove(self):
+        """任务全部完成后删除断点文件"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class BatchTranslationWorker(QtCore.QObject):
+    """页面范围批量翻译：逐页提取文本，限制并发，按页返回结果并记录断点
+
+    页面文本的提取和结果定位都在定位进程中完成，本对象的线程不访问文档。
+    """
+    page_started = QtCore.pyqtSignal(int)
+    page_finished = QtCore.pyqtSignal(object, int, str, object)  # result, page_index, task_type, context
+    page_error = QtCore.pyqtSignal(str, int)
+    page_canceled = QtCore.pyqtSignal(int)  # 已开始但因停止而放弃的页面
+    progress = QtCore.pyqtSignal(str)
+    all_finished = QtCore.pyqtSignal(int, int)  # completed, total
+
+    def __init__(self, task_type, checkpoint, service, analyzer=None, background=False):
+        super().__init__()
+        self.task_type = task_type
+        self.service = service  # 文档的定位服务：提取页面文本、定位每页的翻译结果
+        self.checkpoint = checkpoint
+        self.canceled = False
+        self.workers = []
+        self._background = background  # 为True时作为预读任务，请求让位于用户任务
+        # 界面共用的文档分析器（在后台分析，完成后只读使用）；为 None 时不跳过任何内容
+        self._analyzer = analyzer
+
+    def run(self):
+        total = len(self.checkpoint.pages)
+        try:
+            max_concurrency = max(1, int(load_ai_config().get("MAX_CONCURRENCY", 4)))
+            # 同时处理的页面数限制（请求数由全局的 request_slots 限制）
+            page_slots = threading.BoundedSemaphore(max_concurrency)
+            
+            # 等待界面的文档分析完成
+            suppressed = {}
+            if self._analyzer is not None:
+                while not self._analyzer.wait(0.2) and not self.canceled:
+                    pass
+                suppressed = self._analyzer.results()
+            
+            threads = []
+            for page_index in self.checkpoint.pending_pages():
+                page_slots.acquire()
+                if self.canceled:
+                    page_slots.release()
+                    break
+                
+                # 在定位进程中提取文本并按区域跳过页眉页脚、页码等
+                extracted = wait_result(
+                    self.service.submit(extract_page_text, page_index, suppressed.get(page_index, [])),
+                    lambda: self.canceled
+                )
+                if extracted is None:
+                    page_slots.release()
+                    break
+                text, _ = extracted
+                if not text:
+                    # 空白页直接记为完成
+                    self.checkpoint.mark_done(page_index, [] if self.task_type == "sentences" else {})
+                    page_slots.release()
+                    continue
+                
+                worker = TranslationWorker(self.task_type, text, page_index, service=self.service,
+                                           raise_errors=True, background=self._background)
+                self.workers.append(worker)
+                self.page_started.emit(page_index)
+                
+                thread = threading.Thread(
+                    target=self._process_page,
+                    args=(worker, page_slots, total)
+                )
+                threads.append(thread)
+                thread.start()
+            
+            for thread in threads:
+                thread.join()
+        except Exception as e:
+            self.progress.emit(f"批量翻译错误: {str(e)}")
+        
+        self.all_finished.emit(len(self.checkpoint.completed), total)
+
+    def _process_page(self, worker, page_slots, total):
+        """处理单个页面"""
+        try:
+            result = worker.process()
+            if self.canceled:
+                self.page_canceled.emit(worker.page_index)
+                return
+            if worker.errors:
+                # 出错的页面不记录断点，续传时重新处理
+                self.page_error.emit(worker.errors[0], worker.page_index)
+                return
+            
+            self.checkpoint.mark_done(worker.page_index, result)
+            context = worker.locate(result)
+            self.page_finished.emit(result, worker.page_index, self.task_type, context)
+            self.progress.emit(
+                f"批量翻译进度: {len(self.checkpoint.completed)}/{total} (页面 {worker.page_index + 1})"
+            )
+        except Exception as e:
+            self.page_error.emit(str(e), worker.page_index)
+        finally:
+            page_slots.release()
+
+    def cancel(self):
+        self.canceled = True
+        for worker in self.workers:
+            worker.cancel()
+
+
+class LocateWorker(QtCore.QObject):
+    """把多页的定位任务交给多进程定位服务，每完成一页发出一次结果"""
+    page_located = QtCore.pyqtSignal(int, str, object)  # page_index, task_type, {文本: 矩形列表}
+    progress = QtCore.pyqtSignal(str)
+    all_finished = QtCore.pyqtSignal(int, int)  # completed, total
+
+    def __init__(self, service, jobs):
+        super().__init__()
+        self.service = service
+        self.jobs = jobs  # [(page_index, task_type, [单词或句子原文, ...])]
+        self.canceled = False
+
+    def run(self):
+        completed = 0
+        futures = []
+        try:
+            for job in self.jobs:
+                futures.append(self.service.submit(locate_page, *job))
+            pending = set(futures)
+            # 分段等待，停止时能及时退出
+            while pending and not self.canceled:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if self.canceled:
+                        break
+                    try:
+                        page_index, task_type, found = future.result()
+                    except Exception as e:
+                        self.progress.emit(f"定位错误: {str(e)}")
+                        continue
+                    geometry = {text: [fitz.Rect(r) for r in rects] for text, rects in found.items()}
+                    self.page_located.emit(page_index, task_type, geometry)
+                    completed += 1
+        except Exception as e:
+            self.progress.emit(f"定位服务错误: {str(e)}")
+        finally:
+            for future in futures:
+                future.cancel()
+        self.all_finished.emit(completed, len(self.jobs))
+
+    def cancel(self):
+        self.canceled = True
@@ -0,0 +1,100 @@
+"""多进程定位服务：把多页的单词/句子定位分配到进程池
+
+每个子进程打开自己的文档对象，页面文本索引缓存在子进程内，
+按页提交任务，每页完成后即可取回结果（矩形以元组形式返回）。
+PyMuPDF 不支持多线程，界面线程以外需要访问文档的操作都提交到这里，线程之间只传递数据。
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+import fitz
+from translator import locate_words, find_sentences_in_page
+from doc_analysis import DocumentAnalyzer, page_text
+
+# 需要定位的页面数达到该值时才使用进程池（每个进程启动约需1秒）
+PARALLEL_MIN_PAGES = 8
+
+_doc = None  # 子进程中打开的文档
+
+
+def pool_size(processes=0):
+    """进程池大小：processes 为0时与CPU核数相同"""
+    return processes if processes > 0 else (os.cpu_count() or 1)
+
+
+def _open_document(doc_path):
+    """子进程初始化：打开文档"""
+    global _doc
+    _doc = fitz.open(doc_path)
+
+
+def locate_page(page_index, task_type, texts, word_range=None):
+    """在子进程中定位一页的单词或句子，返回 (page_index, task_type, {文本: [矩形元组, ...]})
+
+    句子按给出的顺序批量定位（与 find_sentences_in_page 相同），
+    word_range 为框选覆盖的页面单词序号范围。
+    """
+    page = _doc[page_index]
+    if task_type == "sentences":
+        found = dict(zip(texts, find_sentences_in_page(page, texts, word_range)))
+    else:  # "words"
+        found = locate_words(page, texts)
+    return page_index, task_type, {text: [tuple(r) for r in rects] for text, rects in found.items()}
+
+
+def wait_result(future, canceled, interval=0.2):
+    """在工作线程中等待任务结果，canceled() 为True时放弃等待并返回 None（任务出错时抛出异常）"""
+    while not wait([future], timeout=interval).done:
+        if canceled():
+            future.cancel()
+            return None
+    return future.result()
+
+
+def analyze_document():
+    """在子进程中分析整个文档，返回 DocumentAnalyzer.results()"""
+    analyzer = DocumentAnalyzer(_doc)
+    analyzer.analyze()
+    return analyzer.results()
+
+
+def extract_page_text(page_index, suppressed):
+    """在子进程中提取一页待翻译的文本，按区域跳过 suppressed 中的文本块，返回 (文本, [(类型, 被跳过的文本)])"""
+    return page_text(_doc[page_index], suppressed)
+
+
+class LocateService:
+    """按文档创建的定位进程池（首次提交时启动，关闭文档时调用 shutdown）"""
+
+    def __init__(self, doc_path, processes=0):
+        self.doc_path = doc_path
+        self.processes = pool_size(processes)
+        self._pool = None
+        self._closed = False
+        self._lock = threading.Lock()  # 可在多个工作线程中提交任务
+
+    def submit(self, fn, *args):
+        """提交在子进程中执行的任务（fn 为本模块的函数，如 locate_page），返回 Future
+
+        服务已关闭时抛出 RuntimeError。
+        """
+        with self._lock:
+            if self._pool is None:
+                if self._closed:
+                    raise RuntimeError("定位服务已关闭")
+                # 界面进程中有多个线程，使用spawn启动子进程
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_open_document,
+                    initargs=(self.doc_path,)
+                )
+            return self._pool.submit(fn, *args)
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -1,6 +1,7 @@
 import sys
 import traceback
 import os  # 导入os模块
+import multiprocessing
 from PyQt5 import QtWidgets, QtGui, QtCore
 from gui.main_window import PDFHighlighter
 
@@ -64,4 +65,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # 打包为exe时，多进程定位服务的子进程从这里启动
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""本地模拟的 OpenAI 兼容接口，用于压测翻译客户端（不消耗API额度）
+
+用法:
+    python mock_server.py --port 8000 --latency-ms 800 --latency-dist lognormal \
+        --tokens-per-second 40 --error-429 0.02 --error-500 0.01 --rpm 600
+
+然后把 ai.cfg 中的 API_URL 改为 http://127.0.0.1:8000/v1/chat/completions
+"""
+import re
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]+")
+
+
+def estimate_tokens(text):
+    """与客户端一致的粗略token估算"""
+    cjk = sum(1 for c in text if '\u2e80' <= c <= '\u9fff')
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class MockSettings:
+    """模拟接口的行为参数"""
+
+    def __init__(self, latency_ms=500, latency_jitter_ms=200, latency_dist="normal",
+                 tokens_per_second=50.0, error_429=0.0, error_500=0.0,
+                 rpm=0, max_concurrent=0, seed=None):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_dist = latency_dist
+        self.tokens_per_second = tokens_per_second
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.rpm = rpm
+        self.max_concurrent = max_concurrent
+        self.random = random.Random(seed)
+
+    def sample_latency(self):
+        """首字节延迟（秒）"""
+        mean = self.latency_ms / 1000
+        jitter = self.latency_jitter_ms / 1000
+        if self.latency_dist == "fixed":
+            value = mean
+        elif self.latency_dist == "uniform":
+            value = self.random.uniform(mean - jitter, mean + jitter)
+        elif self.latency_dist == "lognormal":
+            # 长尾分布：中位数为mean
+            sigma = jitter / mean if mean else 0
+            value = mean * math.exp(self.random.gauss(0, sigma))
+        else:
+            value = self.random.gauss(mean, jitter)
+        return max(0.0, value)
+
+
+class MockState:
+    """限流与统计（所有请求线程共享）"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.recent = deque()   # 最近60秒内的请求时间
+        self.active = 0
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "max_active": 0}
+
+    def admit(self):
+        """返回 None 表示接受请求，否则返回 (状态码, 说明)"""
+        s = self.settings
+        with self.lock:
+            self.stats["requests"] += 1
+            now = time.time()
+            while self.recent and now - self.recent[0] > 60:
+                self.recent.popleft()
+            if s.rpm and len(self.recent) >= s.rpm:
+                self.stats["rate_limited"] += 1
+                return 429, "rate limit exceeded"
+            if s.max_concurrent and self.active >= s.max_concurrent:
+                self.stats["rate_limited"] += 1
+                return 429, "too many concurrent requests"
+            roll = s.random.random()
+            if roll < s.error_429:
+                self.stats["rate_limited"] += 1
+                return 429, "injected rate limit"
+            if roll < s.error_429 + s.error_500:
+                self.stats["errors"] += 1
+                return 500, "injected server error"
+            self.recent.append(now)
+            self.active += 1
+            self.stats["max_active"] = max(self.stats["max_active"], self.active)
+            return None
+
+    def release(self, ok):
+        with self.lock:
+            self.active -= 1
+            if ok:
+                self.stats["ok"] += 1
+
+
+def fake_completion(content):
+    """根据prompt类型生成格式合理的回答"""
+    prompt, _, text = content.partition("\n")
+    if '"original"' in prompt or "逐句翻译" in prompt:
+        sentences = [s for s in SENTENCE_RE.split(text.strip()) if s]
+        return json.dumps(
+            [{"original": s, "translation": f"（译）{s}"} for s in sentences],
+            ensure_ascii=False
+        )
+    # 生词提取：取较长的单词
+    words = {}
+    for w in WORD_RE.findall(text):
+        if len(w) >= 8 and w.lower() not in words:
+            words[w.lower()] = f"{w.lower()}的释义"
+    return json.dumps(words, ensure_ascii=False)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None  # MockState
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.state.lock:
+                self._send_json(200, dict(self.state.stats, active=self.state.active))
+        elif self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        try:
+            payload = json.loads(raw)
+            content = payload["messages"][-1]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._send_json(400, {"error": {"message": "invalid request"}})
+            return
+
+        rejected = self.state.admit()
+        if rejected is not None:
+            status, message = rejected
+            headers = {"Retry-After": "1"} if status == 429 else {}
+            self._send_json(status, {"error": {"message": message}}, headers)
+            return
+
+        ok = False
+        try:
+            settings = self.state.settings
+            answer = fake_completion(content)
+            usage = {
+                "prompt_tokens": estimate_tokens(content),
+                "completion_tokens": estimate_tokens(answer)
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            time.sleep(settings.sample_latency())
+
+            if payload.get("stream"):
+                self._stream(payload, answer, usage)
+            else:
+                # 非流式：模拟生成全部token所需的时间后一次返回
+                if settings.tokens_per_second > 0:
+                    time.sleep(usage["completion_tokens"] / settings.tokens_per_second)
+                self._send_json(200, {
+                    "id": f"mock-{time.time_ns()}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": payload.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": answer},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": usage
+                })
+            ok = True
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.state.release(ok)
+
+    def _stream(self, payload, answer, usage):
+        """流式输出（SSE，分块传输编码），按tokens_per_second控制速度"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        settings = self.state.settings
+        step = 16  # 每个事件约4个token
+        base = {
+            "id": f"mock-{time.time_ns()}",
+            "object": "chat.completion.chunk",
+            "model": payload.get("model", "mock")
+        }
+        for i in range(0, len(answer), step):
+            piece = answer[i:i + step]
+            event = dict(base, choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+            self._write_chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n")
+            if settings.tokens_per_second > 0:
+                time.sleep(estimate_tokens(piece) / settings.tokens_per_second)
+        event = dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}], usage=usage)
+        self._write_chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, obj, headers=None):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # 支持数百个并发分块
+
+
+def create_server(host="127.0.0.1", port=8000, settings=None):
+    """创建模拟接口服务器（调用serve_forever()启动）"""
+    handler = type("BoundMockHandler", (MockHandler,), {"state": MockState(settings or MockSettings())})
+    return MockServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的 OpenAI 兼容接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=500, help="首字节延迟均值/中位数")
+    parser.add_argument("--latency-jitter-ms", type=float, default=200, help="延迟波动幅度")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "normal", "lognormal"], default="normal")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="输出速度，0表示不限")
+    parser.add_argument("--error-429", type=float, default=0.0, help="随机返回429的比例")
+    parser.add_argument("--error-500", type=float, default=0.0, help="随机返回500的比例")
+    parser.add_argument("--rpm", type=int, default=0, help="每分钟请求上限，0表示不限")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="并发上限，0表示不限")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms,
+        latency_dist=args.latency_dist, tokens_per_second=args.tokens_per_second,
+        error_429=args.error_429, error_500=args.error_500,
+        rpm=args.rpm, max_concurrent=args.max_concurrent, seed=args.seed
+    )
+    server = create_server(args.host, args.port, settings)
+    print(f"模拟接口已启动: http://{args.host}:{args.port}/v1/chat/completions (统计: /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
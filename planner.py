@@ -0,0 +1,146 @@
+import math
+import heapq
+from translator import (
+    load_ai_config, build_prompt, estimate_tokens, split_text, LATENCY_HISTORY
+)
+from utils import clean_text
+
+# 没有历史记录时使用的默认值
+DEFAULT_REQUEST_OVERHEAD = 2.0        # 每次请求的固定耗时（秒）
+DEFAULT_SECONDS_PER_OUTPUT_TOKEN = 0.04  # 约25 token/秒
+DEFAULT_OUTPUT_RATIO = {
+    "sentences": 1.8,  # 原文 + 中文译文 + JSON结构
+    "words": 0.5
+}
+
+
+def fit_latency_model(task_type, history=None):
+    """根据历史记录拟合耗时模型：latency = overhead + per_token * output_tokens
+
+    返回 (overhead, per_token, output_ratio, sample_count)
+    """
+    history = LATENCY_HISTORY if history is None else history
+    samples = [h for h in history if h["task_type"] == task_type]
+
+    output_ratio = DEFAULT_OUTPUT_RATIO.get(task_type, 1.0)
+    input_total = sum(h["input_tokens"] for h in samples)
+    if input_total:
+        output_ratio = sum(h["output_tokens"] for h in samples) / input_total
+
+    if len(samples) < 3:
+        if samples:
+            # 样本太少，只按平均速度估算
+            out_total = sum(h["output_tokens"] for h in samples) or 1
+            per_token = sum(h["latency"] for h in samples) / out_total
+            return 0.0, per_token, output_ratio, len(samples)
+        return DEFAULT_REQUEST_OVERHEAD, DEFAULT_SECONDS_PER_OUTPUT_TOKEN, output_ratio, 0
+
+    # 最小二乘拟合
+    n = len(samples)
+    xs = [h["output_tokens"] for h in samples]
+    ys = [h["latency"] for h in samples]
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        per_token = mean_y / mean_x if mean_x else DEFAULT_SECONDS_PER_OUTPUT_TOKEN
+        return 0.0, per_token, output_ratio, n
+
+    per_token = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+    per_token = max(0.0, per_token)
+    overhead = max(0.0, mean_y - per_token * mean_x)
+    return overhead, per_token, output_ratio, n
+
+
+def pool_wall_time(latencies, concurrency):
+    """按提交顺序把请求分配给最先空闲的并发槽位，返回全部完成的时间"""
+    slots = [0.0] * min(concurrency, len(latencies))
+    for latency in latencies:
+        heapq.heapreplace(slots, slots[0] + latency)
+    return max(slots, default=0.0)
+
+
+def forecast_job(texts, task_type, config=None, batch=False):
+    """预估一组文本（每个元素对应一个翻译任务）的请求数、token数和耗时
+
+    与TranslationWorker使用相同的分块方法，完全在本地计算，不访问网络。
+    batch 为True时按批量翻译估算：各页同时进行，所有请求共用同一组并发槽位。
+    """
+    config = config or load_ai_config()
+    prompt_tokens = estimate_tokens(build_prompt(task_type, config))
+    overhead, per_token, output_ratio, samples = fit_latency_model(task_type)
+
+    requests_count = 0
+    input_tokens = 0
+    output_tokens = 0
+    job_latencies = []
+
+    for text in texts:
+        cleaned = clean_text(text)
+        if not cleaned:
+            continue
+        chunk_latencies = []
+        for chunk in split_text(cleaned):
+            chunk_input = prompt_tokens + estimate_tokens(chunk)
+            chunk_output = math.ceil(estimate_tokens(chunk) * output_ratio)
+            requests_count += 1
+            input_tokens += chunk_input
+            output_tokens += chunk_output
+            chunk_latencies.append(overhead + per_token * chunk_output)
+        job_latencies.append(chunk_latencies)
+
+    concurrency = max(1, int(config.get("MAX_CONCURRENCY", 4)))
+    wall_time = 0.0
+    if batch:
+        # 批量翻译：全部请求作为一个请求池在 concurrency 个槽位上执行
+        wall_time = pool_wall_time([l for job in job_latencies for l in job], concurrency)
+    else:
+        # 单个任务的分块按并发上限分批执行，任务之间依次提交
+        for chunk_latencies in job_latencies:
+            if not chunk_latencies:
+                continue
+            waves = math.ceil(len(chunk_latencies) / concurrency)
+            wall_time += waves * max(chunk_latencies)
+
+    # 受接口限速约束的最短时间
+    rpm = config.get("RATE_LIMIT_RPM", 0) or 0
+    if rpm > 0:
+        wall_time = max(wall_time, requests_count / rpm * 60)
+
+    return {
+        "task_type": task_type,
+        "jobs": len(job_latencies),
+        "requests": requests_count,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "wall_time": wall_time,
+        "concurrency": concurrency,
+        "rate_limit_rpm": rpm,
+        "history_samples": samples
+    }
+
+
+def forecast_pages(doc, page_indices, task_type, analyzer=None, config=None):
+    """按页面预估翻译任务（每页一个任务）"""
+    texts = []
+    for page_index in page_indices:
+        if analyzer is not None:
+            # 按区域跳过页眉页脚、页码等文本块（与批量翻译相同）
+            text, _ = analyzer.page_text(page_index)
+        else:
+            text = clean_text(doc[page_index].get_text())
+        texts.append(text)
+    return forecast_job(texts, task_type, config, batch=True)
+
+
+def format_forecast(forecast):
+    """格式化预估结果用于显示"""
+    task_name = "整段翻译" if forecast["task_type"] == "sentences" else "生词提取"
+    minutes, seconds = divmod(int(round(forecast["wall_time"])), 60)
+    basis = (f"基于 {forecast['history_samples']} 条历史记录"
+             if forecast["history_samples"] else "无历史记录，使用默认速度")
+    return (
+        f"{task_name}预估：{forecast['jobs']} 个任务，{forecast['requests']} 次请求，"
+        f"输入约 {forecast['input_tokens']} tokens，输出约 {forecast['output_tokens']} tokens，"
+        f"预计耗时 {minutes}分{seconds}秒 (并发 {forecast['concurrency']}，{basis})"
+    )
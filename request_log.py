@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import threading
+from datetime import datetime
+
+# 默认日志位置：程序目录下的 logs/requests.jsonl
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+LOG_PATH = os.path.join(LOG_DIR, 'requests.jsonl')
+
+
+class RequestLogger:
+    """按行写入JSON的请求日志，超过大小后轮转"""
+
+    def __init__(self, path=LOG_PATH, max_bytes=5 * 1024 * 1024, backup_count=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        """写入一条请求记录"""
+        record = dict(record)
+        record.setdefault("time", datetime.now().isoformat(timespec="milliseconds"))
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except Exception as e:
+                print(f"写入请求日志失败: {str(e)}")
+
+    def _rotate(self):
+        """requests.jsonl -> requests.jsonl.1 -> ... -> requests.jsonl.N"""
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def files(self):
+        """按时间从旧到新列出所有日志文件"""
+        paths = [f"{self.path}.{i}" for i in range(self.backup_count, 0, -1)] + [self.path]
+        return [p for p in paths if os.path.exists(p)]
+
+
+request_logger = RequestLogger()
+
+
+def log_request(record):
+    """记录一次LLM请求"""
+    request_logger.write(record)
+
+
+def load_records(paths=None):
+    """读取日志记录（默认读取当前日志及其轮转文件）"""
+    records = []
+    for path in paths or request_logger.files():
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def percentile(values, pct):
+    """线性插值的百分位数"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    f = int(k)
+    c = min(f + 1, len(values) - 1)
+    return values[f] + (values[c] - values[f]) * (k - f)
+
+
+def aggregate(records):
+    """汇总请求日志：延迟分位数、吞吐量、错误率"""
+    summary = {}
+    groups = {}
+    for r in records:
+        groups.setdefault(r.get("task_type", "unknown"), []).append(r)
+    groups["all"] = records
+
+    for name, group in groups.items():
+        if not group:
+            continue
+        latencies = [r["total_ms"] for r in group if r.get("total_ms") is not None and r.get("ok")]
+        ttfbs = [r["ttfb_ms"] for r in group if r.get("ttfb_ms") is not None and r.get("ok")]
+        errors = sum(1 for r in group if not r.get("ok"))
+        parse_failures = sum(1 for r in group if r.get("ok") and not r.get("parse_ok"))
+        output_tokens = sum(r.get("output_tokens") or 0 for r in group)
+
+        # 吞吐量按首尾请求的时间跨度计算
+        span = 0.0
+        times = sorted(r["time"] for r in group if r.get("time"))
+        if len(times) > 1:
+            span = (datetime.fromisoformat(times[-1]) - datetime.fromisoformat(times[0])).total_seconds()
+
+        summary[name] = {
+            "requests": len(group),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "ttfb_p50_ms": percentile(ttfbs, 50),
+            "throughput_rps": len(group) / span if span else 0.0,
+            "output_tokens_per_s": output_tokens / span if span else 0.0,
+            "error_rate": errors / len(group),
+            "parse_failure_rate": parse_failures / len(group),
+            "retries": sum(r.get("retries") or 0 for r in group)
+        }
+    return summary
+
+
+def format_summary(summary):
+    """格式化汇总结果"""
+    lines = []
+    for name, s in summary.items():
+        lines.append(
+            f"[{name}] 请求 {s['requests']} 次 | "
+            f"延迟 p50/p95/p99: {s['p50_ms']:.0f}/{s['p95_ms']:.0f}/{s['p99_ms']:.0f} ms | "
+            f"TTFB p50: {s['ttfb_p50_ms']:.0f} ms | "
+            f"吞吐: {s['throughput_rps']:.2f} 请求/秒, {s['output_tokens_per_s']:.1f} tokens/秒 | "
+            f"错误率: {s['error_rate']:.1%} | 解析失败: {s['parse_failure_rate']:.1%} | "
+            f"重试: {s['retries']}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # 用法: python request_log.py [日志文件 ...]
+    records = load_records(sys.argv[1:] or None)
+    if not records:
+        print("没有请求日志")
+    else:
+        print(format_summary(aggregate(records)))
@@ -0,0 +1,146 @@
+"""基于规则的英语屈折词尾还原（Porter算法第1步）及常见不规则变化表
+
+stem_key(word) 只去掉复数、时态等屈折词尾，不处理派生后缀，
+如 studies/studied/study → studi，ran/running/runs → run，
+而 experiment/experience、general/generation 仍是不同的键。
+"""
+import re
+from functools import lru_cache
+
+# 常见不规则变化：变化形式 → 原形（原形再去掉屈折词尾）
+# 只收录不会与其他常用词混淆的动词变化形式和名词复数
+IRREGULAR_FORMS = {
+    # 动词
+    "went": "go", "gone": "go", "goes": "go",
+    "ran": "run", "began": "begin", "begun": "begin",
+    "came": "come", "became": "become", "seen": "see",
+    "took": "take", "taken": "take", "gave": "give", "given": "give",
+    "made": "make", "said": "say", "told": "tell", "thought": "think",
+    "brought": "bring", "bought": "buy", "caught": "catch", "taught": "teach",
+    "sought": "seek", "fought": "fight", "held": "hold",
+    "kept": "keep", "felt": "feel", "meant": "mean",
+    "met": "meet", "sent": "send", "spent": "spend", "built": "build",
+    "lost": "lose", "paid": "pay",
+    "knew": "know", "known": "know", "grew": "grow", "grown": "grow",
+    "drew": "draw", "drawn": "draw", "threw": "throw", "thrown": "throw",
+    "shown": "show", "wrote": "write", "written": "write",
+    "drove": "drive", "driven": "drive", "chose": "choose", "chosen": "choose",
+    "spoke": "speak", "spoken": "speak", "broke": "break", "broken": "break",
+    "forgot": "forget", "forgotten": "forget", "got": "get", "gotten": "get",
+    "stood": "stand", "understood": "understand",
+    "ate": "eat", "eaten": "eat", "fallen": "fall", "hidden": "hide", "shaken": "shake",
+    "heard": "hear", "sold": "sell", "slept": "sleep", "dealt": "deal",
+    # 名词复数
+    "men": "man", "women": "woman", "children": "child",
+    "feet": "foot", "teeth": "tooth", "geese": "goose", "mice": "mouse",
+    "criteria": "criterion", "phenomena": "phenomenon",
+    "analyses": "analysis", "hypotheses": "hypothesis", "theses": "thesis",
+    "crises": "crisis", "indices": "index", "matrices": "matrix", "vertices": "vertex",
+    "knives": "knife", "wives": "wife", "wolves": "wolf", "halves": "half",
+    "shelves": "shelf",
+}
+
+# 以 s 结尾但不是复数的常用词，保持原样
+INVARIANT_WORDS = {
+    "news", "series", "species", "means", "physics", "mathematics", "economics",
+    "politics", "statistics", "ethics", "lens", "gas", "bus", "plus", "thus",
+    "always", "perhaps", "whereas", "various", "previous", "analysis", "basis",
+    "this", "his", "its", "hers", "ours", "yours", "theirs", "was", "has", "does",
+}
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _cons(word, i):
+    """word[i] 是否为辅音（Porter算法的定义：y 在辅音之后视为元音）"""
+    c = word[i]
+    if c in "aeiou":
+        return False
+    if c == "y":
+        return i == 0 or not _cons(word, i - 1)
+    return True
+
+
+def _measure(stem):
+    """[C](VC)^m[V] 中的 m"""
+    m = 0
+    i = 0
+    n = len(stem)
+    while i < n and _cons(stem, i):
+        i += 1
+    while i < n:
+        while i < n and not _cons(stem, i):
+            i += 1
+        if i >= n:
+            break
+        while i < n and _cons(stem, i):
+            i += 1
+        m += 1
+    return m
+
+
+def _has_vowel(stem):
+    return any(not _cons(stem, i) for i in range(len(stem)))
+
+
+def _double_cons(word):
+    return len(word) >= 2 and word[-1] == word[-2] and _cons(word, len(word) - 1)
+
+
+def _cvc(word):
+    """以 辅音-元音-辅音 结尾，且最后的辅音不是 w/x/y"""
+    if len(word) < 3:
+        return False
+    n = len(word)
+    return (_cons(word, n - 3) and not _cons(word, n - 2) and _cons(word, n - 1)
+            and word[-1] not in "wxy")
+
+
+def porter_stem(word):
+    """Porter算法第1步：去掉复数、-ed/-ing 词尾并把词尾 y 变为 i（输入为小写字母组成的单词）"""
+    if len(word) <= 2:
+        return word
+
+    # 第1a步：复数
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies"):
+        word = word[:-2]
+    elif word.endswith("ss"):
+        pass
+    elif word.endswith("s"):
+        word = word[:-1]
+
+    # 第1b步：-ed / -ing
+    if word.endswith("eed"):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ("ed", "ing"):
+            if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]):
+                word = word[:-len(suffix)]
+                if word.endswith(("at", "bl", "iz")):
+                    word += "e"
+                elif _double_cons(word) and word[-1] not in "lsz":
+                    word = word[:-1]
+                elif _measure(word) == 1 and _cvc(word):
+                    word += "e"
+                break
+
+    # 第1c步：y → i
+    if word.endswith("y") and _has_vowel(word[:-1]):
+        word = word[:-1] + "i"
+
+    return word
+
+
+@lru_cache(maxsize=65536)
+def stem_key(word):
+    """单词的词干键：小写、去掉所有格和屈折词尾，不规则形式先还原为原形；不是英文单词时返回原词"""
+    word = word.lower()
+    if word.endswith(("'s", "’s")):
+        word = word[:-2]
+    word = IRREGULAR_FORMS.get(word, word)
+    if word in INVARIANT_WORDS or not _WORD_RE.fullmatch(word):
+        return word
+    return porter_stem(word)
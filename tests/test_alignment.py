@@ -0,0 +1,90 @@
+"""句子对齐：向量化的局部对齐、批量相似度与逐格/逐对计算的参考实现一致"""
+import random
+
+import numpy as np
+import pytest
+
+from alignment import GAP_PENALTY, similarity_matrix, smith_waterman
+from utils import calculate_word_similarity, batch_word_similarity
+
+
+def naive_smith_waterman(scores, gap_penalty=GAP_PENALTY):
+    """参考实现：逐格填充，按行优先顺序取第一个最高分"""
+    m, n = scores.shape
+    H = np.zeros((m + 1, n + 1))
+    best_score, best_position = 0, (0, 0)
+    for i in range(1, m + 1):
+        for j in range(1, n + 1):
+            H[i, j] = max(
+                0,
+                H[i - 1, j - 1] + scores[i - 1, j - 1],
+                H[i - 1, j] - gap_penalty,
+                H[i, j - 1] - gap_penalty
+            )
+            if H[i, j] > best_score:
+                best_score, best_position = H[i, j], (i, j)
+    return H, best_score, best_position
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_smith_waterman_matches_naive_dp(seed):
+    rnd = np.random.default_rng(seed)
+    m, n = rnd.integers(1, 25), rnd.integers(1, 80)
+    # 1/64 的整数倍：与跳词惩罚相加减没有舍入误差，结果应逐位相同
+    scores = rnd.integers(0, 65, size=(m, n)) / 64
+    H, best_score, best_position = smith_waterman(scores)
+    ref_H, ref_score, ref_position = naive_smith_waterman(scores)
+    assert np.array_equal(H, ref_H)
+    assert best_score == ref_score
+    assert best_position == ref_position
+
+
+def test_smith_waterman_with_real_valued_scores():
+    rnd = np.random.default_rng(100)
+    for _ in range(10):
+        scores = rnd.random((12, 40))
+        H, best_score, _ = smith_waterman(scores)
+        ref_H, ref_score, _ = naive_smith_waterman(scores)
+        assert np.allclose(H, ref_H)
+        assert best_score == pytest.approx(ref_score)
+
+
+def test_smith_waterman_empty_and_zero_scores():
+    for shape in ((0, 5), (5, 0)):
+        H, best_score, best_position = smith_waterman(np.zeros(shape))
+        assert H.shape == (shape[0] + 1, shape[1] + 1)
+        assert (best_score, best_position) == (0, (0, 0))
+    assert smith_waterman(np.zeros((3, 4)))[1:] == (0, (0, 0))
+
+
+def random_words(rnd, count):
+    """带复数、所有格、连字符、重音和超长单词的随机单词"""
+    base = ["colour", "color", "model", "modelling", "analysis", "data", "co-operate",
+            "cooperate", "résumé", "resume", "naïve", "a", "", "x" * 70, "x" * 69 + "y"]
+    words = []
+    for _ in range(count):
+        word = rnd.choice(base + ["".join(rnd.choice("abcdeio") for _ in range(rnd.randint(1, 9)))])
+        roll = rnd.random()
+        if roll < 0.15:
+            word += "s"
+        elif roll < 0.25:
+            word += "'s"
+        elif roll < 0.3 and len(word) > 2:
+            word = word[:2] + "-" + word[2:]
+        words.append(word)
+    return words
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_similarity_matches_pairwise(seed):
+    rnd = random.Random(seed)
+    words1, words2 = random_words(rnd, 40), random_words(rnd, 60)
+    expected = np.array([[calculate_word_similarity(a, b) for b in words2] for a in words1])
+    assert np.array_equal(batch_word_similarity(words1, words2), expected)
+
+
+def test_similarity_matrix_expands_duplicates():
+    sent = ["the", "model", "the", "models"]
+    page = ["a", "model", "the", "model", "modal"]
+    expected = np.array([[calculate_word_similarity(a, b) for b in page] for a in sent])
+    assert np.array_equal(similarity_matrix(sent, page), expected)
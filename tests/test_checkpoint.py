@@ -0,0 +1,130 @@
+"""批量翻译断点：保存后重新加载能从未完成的页面继续，失败的页面不记为完成"""
+import json
+from concurrent.futures import Future
+
+import pytest
+import requests
+from PyQt5 import QtCore
+
+import translator
+from gui.thread_manager import BatchCheckpoint, BatchTranslationWorker
+from locate_service import extract_page_text
+
+
+def make_checkpoint(tmp_path, task_type="sentences", persist=True):
+    checkpoint = BatchCheckpoint(str(tmp_path / "doc.pdf"), task_type, persist=persist)
+    checkpoint.path = str(tmp_path / "batch_checkpoints" / "doc.json")
+    return checkpoint
+
+
+def test_save_and_resume_round_trip(tmp_path):
+    checkpoint = make_checkpoint(tmp_path)
+    checkpoint.reset([3, 4, 5, 6])
+    sentences = [{"original": "Hello world.", "translation": "你好，世界。"}]
+    checkpoint.mark_done(4, sentences)
+    checkpoint.mark_done(6, [])
+
+    resumed = make_checkpoint(tmp_path)
+    assert resumed.load()
+    assert resumed.pages == [3, 4, 5, 6]
+    assert resumed.completed == {4: sentences, 6: []}
+    assert resumed.pending_pages() == [3, 5]
+
+    # 续传完成剩余页面后不再有未完成的任务
+    resumed.mark_done(3, [])
+    resumed.mark_done(5, [])
+    assert not make_checkpoint(tmp_path).load()
+
+
+def test_word_results_keep_page_keys_as_ints(tmp_path):
+    checkpoint = make_checkpoint(tmp_path, "words")
+    checkpoint.reset([0, 10])
+    checkpoint.mark_done(10, {"lexicon": "词典"})
+
+    with open(checkpoint.path, encoding="utf-8") as f:
+        assert json.load(f)["completed"] == {"10": {"lexicon": "词典"}}
+
+    resumed = make_checkpoint(tmp_path, "words")
+    assert resumed.load()
+    assert resumed.completed == {10: {"lexicon": "词典"}}
+    assert resumed.pending_pages() == [0]
+
+
+def test_missing_or_removed_checkpoint_has_no_pending_pages(tmp_path):
+    checkpoint = make_checkpoint(tmp_path)
+    assert not checkpoint.load()
+
+    checkpoint.reset([1, 2])
+    checkpoint.remove()
+    assert not make_checkpoint(tmp_path).load()
+
+
+def test_memory_only_checkpoint_writes_nothing(tmp_path):
+    checkpoint = make_checkpoint(tmp_path, persist=False)
+    checkpoint.reset([7])
+    checkpoint.mark_done(7, [])
+    assert checkpoint.pending_pages() == []
+    assert not (tmp_path / "batch_checkpoints").exists()
+
+
+class FakeService:
+    """代替定位服务：直接返回每页的文本和空的定位结果"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        if fn is extract_page_text:
+            future.set_result((f"Sentence on page {args[0]}.", []))
+        else:
+            future.set_result((args[0], args[1], {}))
+        return future
+
+
+def run_batch(tmp_path, monkeypatch, reply):
+    """用 reply(文本) 代替模型请求运行一次批量翻译，返回 (断点, 出错的页面)"""
+    config = dict(translator.load_ai_config(), REQUEST_LOG=False)
+    monkeypatch.setattr(translator, "load_ai_config", lambda: config)
+    monkeypatch.setattr(translator, "request_completion", lambda task_type, text, config, record: reply(text))
+    checkpoint = make_checkpoint(tmp_path)
+    checkpoint.reset([0, 1, 2])
+    worker = BatchTranslationWorker("sentences", checkpoint, FakeService())
+    errors = []
+    # 信号在页面线程中发出，直接调用以免依赖事件循环
+    worker.page_error.connect(lambda message, page_index: errors.append(page_index), QtCore.Qt.DirectConnection)
+    worker.run()
+    return checkpoint, sorted(errors)
+
+
+def sentence_reply(text):
+    return json.dumps([{"original": text.strip(), "translation": "译文"}])
+
+
+@pytest.mark.parametrize("failure", [
+    requests.ConnectionError("connection refused"),
+    requests.HTTPError("429 Too Many Requests"),
+])
+def test_failed_requests_are_not_marked_done(tmp_path, monkeypatch, failure):
+    def reply(text):
+        raise failure
+
+    checkpoint, errors = run_batch(tmp_path, monkeypatch, reply)
+    assert checkpoint.completed == {}
+    assert checkpoint.pending_pages() == [0, 1, 2]
+    assert errors == [0, 1, 2]
+    assert make_checkpoint(tmp_path).load()
+
+
+def test_only_successful_pages_are_marked_done(tmp_path, monkeypatch):
+    def reply(text):
+        if "page 1" in text:
+            return "not a JSON array"  # 解析失败
+        return sentence_reply(text)
+
+    checkpoint, errors = run_batch(tmp_path, monkeypatch, reply)
+    assert sorted(checkpoint.completed) == [0, 2]
+    assert checkpoint.completed[0] == [{"original": "Sentence on page 0.", "translation": "译文"}]
+    assert errors == [1]
+
+    # 续传只重新处理失败的页面
+    resumed = make_checkpoint(tmp_path)
+    assert resumed.load()
+    assert resumed.pending_pages() == [1]
@@ -0,0 +1,119 @@
+"""文档分析：跨页识别页眉页脚、页码、图表标签和参考文献区，正文中相同的文字保留"""
+import fitz
+import pytest
+
+from doc_analysis import DocumentAnalyzer, page_text
+
+HEADER = "Journal of Synthetic Results, Vol. 3"
+PAGES = 6
+
+
+def body(page_index):
+    return f"Body paragraph {page_index} discusses experiment {page_index} with 12 samples measured in 2019."
+
+
+def make_doc():
+    """每页有相同的页眉和页码；第3页有坐标轴刻度，第5页开始参考文献，第6页是附录"""
+    doc = fitz.open()
+    for page_index in range(PAGES):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((72, 40), HEADER, fontsize=9)
+        page.insert_text((290, 815), str(page_index + 1), fontsize=9)
+        paragraphs = [body(page_index)]
+        if page_index == 1:
+            paragraphs.append(f"The {HEADER} is cited here in the body.")
+        elif page_index == 2:
+            paragraphs.append("0 10 20 30 40")
+        elif page_index == 4:
+            paragraphs += ["References", "[1] Smith, J. Synthetic methods. 2018.", "[2] Doe, A. Results. 2020."]
+        elif page_index == 5:
+            paragraphs = ["[3] Roe, B. Late reference. 2021.", "Appendix A", "Appendix body text survives here."]
+        for k, text in enumerate(paragraphs):
+            page.insert_text((72, 150 + k * 60), text, fontsize=10)
+    return doc
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    analyzer = DocumentAnalyzer(make_doc())
+    analyzer.analyze()
+    return analyzer
+
+
+def kinds(analyzer, page_index):
+    return [(kind, text) for kind, text, _ in analyzer.get_suppressed_blocks(page_index)]
+
+
+def test_repeated_header_and_page_numbers_on_every_page(analyzer):
+    for page_index in range(PAGES):
+        found = kinds(analyzer, page_index)
+        assert ("header_footer", HEADER) in found
+        assert ("page_number", str(page_index + 1)) in found
+
+
+def test_figure_label_only_where_present(analyzer):
+    assert ("figure_label", "0 10 20 30 40") in kinds(analyzer, 2)
+    for page_index in (0, 1, 3):
+        assert all(kind != "figure_label" for kind, _ in kinds(analyzer, page_index))
+
+
+def test_reference_section_ends_at_appendix(analyzer):
+    references = [text for kind, text in kinds(analyzer, 4) if kind == "reference"]
+    assert len(references) == 2
+    assert "Smith" in references[0] and "Doe" in references[1]
+    references = [text for kind, text in kinds(analyzer, 5) if kind == "reference"]
+    assert len(references) == 1 and "Roe" in references[0]
+
+    text, _ = analyzer.page_text(4)
+    # 标题本身和它之前的正文保留
+    assert body(4) in text and "References" in text
+    assert "Smith" not in text
+
+    text, _ = analyzer.page_text(5)
+    assert "Roe" not in text
+    assert "Appendix A" in text and "Appendix body text survives here." in text
+
+
+def test_body_text_survives(analyzer):
+    for page_index in range(PAGES - 1):
+        text, spans = analyzer.page_text(page_index)
+        assert body(page_index) in text
+        assert HEADER not in text.replace(f"The {HEADER} is cited", "")
+        assert {kind for kind, _ in spans} >= {"header_footer", "page_number"}
+
+    # 与页眉相同的文字出现在正文区域时按区域判断，不会被跳过
+    text, _ = analyzer.page_text(1)
+    assert f"The {HEADER} is cited here in the body." in text
+    assert all("cited here" not in block for _, block in kinds(analyzer, 1))
+
+
+def test_strip_boilerplate_keeps_numbers_inside_body(analyzer):
+    selection = f"{HEADER}\n2\n{body(1)}\n2"
+    text, spans = analyzer.strip_boilerplate(selection, 1)
+    assert text == body(1)
+    assert {kind for kind, _ in spans} == {"header_footer", "page_number"}
+
+    # 页码只在首尾移除，正文中的 2 和 2019 保留
+    text, _ = analyzer.strip_boilerplate("measured 2 times in 2019", 1)
+    assert text == "measured 2 times in 2019"
+
+
+def test_results_round_trip_to_another_process(analyzer):
+    doc = make_doc()
+    loaded = DocumentAnalyzer(doc)
+    assert not loaded.is_ready()
+    loaded.load(analyzer.results())
+    assert loaded.is_ready() and loaded.wait(0)
+    for page_index in range(PAGES):
+        assert loaded.page_text(page_index) == analyzer.page_text(page_index)
+        assert page_text(doc[page_index], analyzer.results()[page_index]) == analyzer.page_text(page_index)
+
+
+def test_single_page_has_no_header_footer():
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    page.insert_text((72, 40), HEADER, fontsize=9)
+    page.insert_text((72, 150), body(0), fontsize=10)
+    analyzer = DocumentAnalyzer(doc)
+    assert kinds(analyzer, 0) == []
+    assert HEADER in analyzer.page_text(0)[0]
@@ -0,0 +1,119 @@
+"""模糊匹配索引：BK树和位并行编辑距离与逐个比较的参考实现一致，候选集合不漏掉任何可匹配的单词"""
+import random
+from types import SimpleNamespace
+
+import fitz
+import pytest
+
+from fuzzy_index import BKTree, FuzzyWordIndex, FUZZY_THRESHOLD
+from text_index import get_page_index, clear_text_index
+from translator import find_word_in_page, find_words_in_page
+from utils import edit_distance, calculate_word_similarity, clean_word
+
+
+def levenshtein(a, b):
+    """参考实现：逐格计算的编辑距离"""
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = current
+    return prev[-1]
+
+
+def random_word(rnd, alphabet="abcde", max_len=10):
+    return "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, max_len)))
+
+
+def mutate(rnd, word):
+    """随机替换、插入或删除一个字符"""
+    k = rnd.randint(0, len(word))
+    op = rnd.choice("sid")
+    if op == "s" and k < len(word):
+        return word[:k] + rnd.choice("aeioux") + word[k + 1:]
+    if op == "d" and k < len(word):
+        return word[:k] + word[k + 1:]
+    return word[:k] + rnd.choice("aeioux") + word[k:]
+
+
+def test_edit_distance_matches_levenshtein():
+    rnd = random.Random(0)
+    for _ in range(2000):
+        a, b = random_word(rnd), random_word(rnd)
+        assert edit_distance(a, b) == levenshtein(a, b), (a, b)
+    # 超过64个字符的单词
+    long_word = "ab" * 50
+    assert edit_distance(long_word, long_word[1:] + "c") == levenshtein(long_word, long_word[1:] + "c")
+
+
+def test_bk_tree_query_matches_scan():
+    rnd = random.Random(1)
+    words = list({random_word(rnd, max_len=8) for _ in range(300)})
+    tree = BKTree(words)
+    for _ in range(200):
+        query = random_word(rnd, max_len=8)
+        distances = {w: levenshtein(w, query) for w in words}
+        for radius in (0, 1, 2, 3):
+            expected = {w for w, d in distances.items() if d <= radius}
+            assert set(tree.query(query, radius)) == expected
+
+
+def test_candidates_include_every_word_above_threshold():
+    rnd = random.Random(2)
+    tokens = [random_word(rnd, "abcdeio", 12) for _ in range(300)]
+    tokens += [t + "s" for t in tokens[:30]] + [t + "'s" for t in tokens[30:50]]
+    tokens += [t[:2] + "-" + t[2:] for t in tokens[50:70] if len(t) > 2]
+    fuzzy = FuzzyWordIndex(SimpleNamespace(token_spans={t: [(0, 0)] for t in tokens if t}))
+    targets = tokens[:100] + [mutate(rnd, t) for t in tokens[:200]] + ["résumé", "colour"]
+    for target in targets:
+        expected = {t for t in fuzzy.spans if calculate_word_similarity(target, t) > FUZZY_THRESHOLD}
+        assert expected <= fuzzy.candidates(target), target
+
+
+def reference_find_word(index, word):
+    """参考实现：精确匹配，否则扫描页面全部单词取按页面顺序第一个最高分的模糊匹配"""
+    target = clean_word(word)
+    occurrences = sorted(
+        ((span, token) for token, spans in index.token_spans.items() for span in spans),
+        key=lambda item: (item[0][0], -item[0][1])
+    )
+    exact = [index.span_rect(*span) for span, token in occurrences if token == target]
+    if exact:
+        return exact
+    best_sim, best = 0, None
+    for span, token in occurrences:
+        sim = calculate_word_similarity(target, token)
+        if sim > best_sim and sim > FUZZY_THRESHOLD:
+            best_sim, best = sim, span
+    return [index.span_rect(*best)] if best is not None else []
+
+
+@pytest.fixture
+def page():
+    rnd = random.Random(3)
+    vocab = ["".join(rnd.choice("abcdefghilmnorstu") for _ in range(rnd.randint(3, 11))) for _ in range(150)]
+    doc = fitz.open()
+    page = doc.new_page()
+    for line in range(40):
+        words = [rnd.choice(vocab) for _ in range(9)]
+        if rnd.random() < 0.25:
+            words[-1] = words[-1][:3] + "-"
+        page.insert_text((40, 40 + 15 * line), " ".join(words), fontsize=9)
+    yield page
+    clear_text_index(doc)
+    doc.close()
+
+
+def test_find_words_matches_full_scan(page):
+    index = get_page_index(page)
+    rnd = random.Random(4)
+    words = [w for w in index.merged_cleaned]
+    targets = list(dict.fromkeys(
+        words[:40] + [mutate(rnd, w) for w in words[:300]] + ["zzzzzz", "", "Tests"]
+    ))
+    found = find_words_in_page(page, targets)
+    for target in targets:
+        expected = reference_find_word(index, target)
+        assert found[target] == expected, target
+        assert find_word_in_page(page, target) == expected
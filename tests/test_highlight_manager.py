@@ -0,0 +1,174 @@
+"""高亮管理：定位结果缓存复用、原地换色，批量操作分组定位并只绘制一次"""
+import os
+
+import fitz
+import pytest
+from PyQt5 import QtWidgets
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from gui import highlight_manager as highlight_module  # noqa: E402
+from gui.highlight_manager import HighlightManager  # noqa: E402
+from text_index import clear_text_index  # noqa: E402
+
+LINES = [
+    "Neural networks learn useful representations from data.",
+    "Training requires careful tuning of the learning rate.",
+    "Evaluation uses held out samples and several metrics.",
+]
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class FakeView:
+    def __init__(self):
+        self.scene = QtWidgets.QGraphicsScene()
+        self.current_page_index = 0
+
+
+@pytest.fixture
+def manager(app, monkeypatch):
+    doc = fitz.open()
+    for _ in range(2):
+        page = doc.new_page()
+        for row, line in enumerate(LINES):
+            page.insert_text((40, 40 + 14 * row), line, fontsize=9)
+    manager = HighlightManager(doc, FakeView())
+    for page_index in range(2):
+        manager.add_sentences([{"original": line, "translation": "译文"} for line in LINES], page_index)
+        for word in ("networks", "learning", "samples"):
+            manager.add_word_translation(word, "词", page_index)
+
+    # 记录每次调用定位器时的页面和条目
+    manager.located = []
+    find_words_rects = manager.find_words_rects
+    find_sentences = highlight_module.find_sentences_in_page
+
+    def record_words(page, words):
+        manager.located.append((page.number, "words", tuple(words)))
+        return find_words_rects(page, words)
+
+    def record_sentences(page, texts, word_range=None):
+        manager.located.append((page.number, "sentences", tuple(texts)))
+        return find_sentences(page, texts, word_range)
+
+    monkeypatch.setattr(manager, "find_words_rects", record_words)
+    monkeypatch.setattr(highlight_module, "find_sentences_in_page", record_sentences)
+    yield manager
+    clear_text_index(doc)
+    doc.close()
+
+
+def sentence_ids(manager, page_index):
+    return [s["id"] for s in manager.get_current_page_sentences(page_index)]
+
+
+def scene_items(manager):
+    return len(manager.view.scene.items())
+
+
+def test_toggling_reuses_the_located_geometry(manager):
+    ids = sentence_ids(manager, 0)
+    assert manager.highlight_words(["networks", "learning"], 0) == 2
+    assert manager.highlight_sentences(ids, 0) == 3
+    assert len(manager.located) == 2
+    for _ in range(50):
+        manager.unhighlight_word("networks", 0)
+        manager.unhighlight_sentence(ids[1])
+        assert manager.highlight_word("networks", 0)
+        assert manager.highlight_sentence(ids[1], 0)
+    manager.highlight_words(["networks", "learning", "samples"], 0)
+    # 只有新单词需要定位
+    assert manager.located[2:] == [(0, "words", ("samples",))]
+    assert scene_items(manager) == sum(
+        len(info["items"]) for data in manager.page_highlights.values()
+        for items in data.values() for info in items.values()
+    )
+
+
+def test_recolor_updates_the_existing_items(manager):
+    ids = sentence_ids(manager, 0)
+    manager.highlight_word("networks", 0)
+    manager.highlight_sentence(ids[0], 0)
+    word_items = list(manager.page_highlights[0]["words"]["networks"]["items"])
+    sent_info = manager.page_highlights[0]["sentences"][ids[0]]
+    sent_items = list(sent_info["items"])
+    located = len(manager.located)
+
+    assert manager.highlight_word("networks", 0, "#ff000080")
+    assert manager.highlight_sentence(ids[0], 0, "#00ff0080")
+    assert not manager.highlight_word("networks", 0, "#ff000080")
+    assert len(manager.located) == located
+    assert manager.page_highlights[0]["words"]["networks"]["items"] == word_items
+    assert sent_info["items"] == sent_items
+    assert all(item.default_color.red() == 255 for item in word_items)
+    # 句子首单词保持较深的颜色
+    green = manager.parse_color("#00ff0080", for_word=False)
+    assert sent_items[0].default_color == green.darker(180)
+    assert all(item.default_color == green for item in sent_items[1:])
+
+
+@pytest.fixture
+def draws(manager, monkeypatch):
+    """记录绘制调用"""
+    calls = []
+    for name in ("draw_word_highlight", "draw_sentence_highlight", "draw_page_highlights"):
+        method = getattr(manager, name)
+
+        def record(*args, method=method, name=name):
+            calls.append((name,) + args)
+            return method(*args)
+        monkeypatch.setattr(manager, name, record)
+    return calls
+
+
+def test_batch_groups_lookups_and_draws_once(manager, draws):
+    ids = sentence_ids(manager, 0)
+    operations = [("highlight", "words", page_index, word, color)
+                  for page_index in (0, 1) for word, color in
+                  (("networks", None), ("learning", "#ff000080"), ("samples", None))]
+    operations += [("highlight", "sentences", 0, sent_id, None) for sent_id in ids]
+    count, dirty = manager.apply_batch(operations)
+    assert count == 9 and dirty == {0, 1}
+    # 每组（页面、类型、颜色）只定位一次
+    assert sorted(manager.located) == [
+        (0, "sentences", tuple(LINES)), (0, "words", ("learning",)), (0, "words", ("networks", "samples")),
+        (1, "words", ("learning",)), (1, "words", ("networks", "samples")),
+    ]
+    # 只绘制当前页，每项一次
+    drawn = sorted(call[1] for call in draws)
+    assert drawn == sorted(["networks", "learning", "samples"] + ids)
+    assert all(call[2] == 0 for call in draws)
+
+
+def test_batch_unhighlight_skips_page_redraw(manager, draws):
+    ids = sentence_ids(manager, 0)
+    manager.highlight_sentences(ids, 0)
+    manager.highlight_words(["networks"], 0)
+    draws.clear()
+    count, dirty = manager.apply_batch(
+        [("unhighlight", "sentences", None, sent_id, None) for sent_id in ids]
+        + [("unhighlight", "words", 0, "networks", None), ("unhighlight", "words", 0, "absent", None)]
+    )
+    assert count == 4 and dirty == {0}
+    assert draws == [] and scene_items(manager) == 0
+
+
+def test_dropping_deferred_items_does_not_dirty_the_page(manager):
+    manager.defer_highlights(1, "words", ["networks", "samples"])
+    count, dirty = manager.apply_batch([("unhighlight", "words", 1, "networks", None)])
+    assert count == 1 and dirty == set()
+    assert manager.deferred == {1: {"words": {"samples": None}, "sentences": {}}}
+    assert manager.located == []
+
+
+def test_clearing_a_page_drops_its_deferred_items(manager):
+    manager.defer_highlights(1, "words", ["networks", "samples"])
+    manager.defer_highlights(1, "sentences", sentence_ids(manager, 1))
+    manager.clear_page_word_highlights(1)
+    assert list(manager.deferred[1]["words"]) == []
+    manager.clear_page_sentence_highlights(1)
+    assert manager.deferred == {} and manager.located == []
@@ -0,0 +1,55 @@
+"""跨行连字符拼接表：每页合并一次，单词定位和句子定位共用同一份结果"""
+import fitz
+import pytest
+
+from text_index import get_page_index, clear_text_index
+from translator import find_word_in_page
+from utils import clean_word
+
+
+@pytest.fixture
+def page():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((40, 40), "The committee reviewed the inter-", fontsize=9)
+    page.insert_text((40, 54), "national agreement and the national law.", fontsize=9)
+    yield page
+    clear_text_index(doc)
+    doc.close()
+
+
+def as_tuples(rects):
+    return [tuple(r) for r in rects]
+
+
+def test_joined_word_points_at_both_halves(page):
+    index = get_page_index(page)
+    start = index.texts.index("inter-")
+    joined = clean_word("inter-national")
+    assert index.joined_cleaned[start] == joined
+    assert index.token_spans[joined] == [(start, start + 1)]
+    # 拆开的两半也各自收录
+    assert (start, start) in index.token_spans["inter"]
+    assert index.token_spans["national"][0] == (start + 1, start + 1)
+    # 合并序列中整词只出现一次
+    assert index.merged_cleaned.count(joined) == 1
+    assert "inter" not in index.merged_cleaned
+
+
+def test_span_rect_is_the_union_of_both_halves(page):
+    index = get_page_index(page)
+    start = index.texts.index("inter-")
+    assert index.span_rect(start, start + 1) == index.word_rect(start) | index.word_rect(start + 1)
+
+
+def test_word_lookup_uses_the_join_table(page):
+    index = get_page_index(page)
+    start = index.texts.index("inter-")
+    joined_rect = tuple(index.span_rect(start, start + 1))
+    assert as_tuples(find_word_in_page(page, "international")) == [joined_rect]
+    # 模糊匹配同样落在拼接后的整词上
+    assert as_tuples(find_word_in_page(page, "internationl")) == [joined_rect]
+    # 拆开的后半部分与其他位置的同一单词一起返回
+    assert as_tuples(find_word_in_page(page, "national")) == [
+        tuple(index.word_rect(i)) for i in (start + 1, index.texts.index("national", start + 2))
+    ]
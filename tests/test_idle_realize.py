@@ -0,0 +1,175 @@
+"""空闲定位：待高亮项由定位进程定位后在界面线程添加，结果与直接高亮一致"""
+import os
+import random
+import string
+import time
+
+import fitz
+import pytest
+from PyQt5 import QtCore, QtWidgets
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from gui import highlight_manager as highlight_module  # noqa: E402
+from gui.highlight_manager import HighlightManager  # noqa: E402
+from gui.main_window import PDFHighlighter  # noqa: E402
+from text_index import get_page_index  # noqa: E402
+
+PAGES = 5
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    rnd = random.Random(7)
+    vocab = ["".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(3, 10))) for _ in range(300)]
+    doc = fitz.open()
+    for _ in range(PAGES):
+        page = doc.new_page()
+        for line in range(40):
+            page.insert_text((30, 40 + line * 18), " ".join(rnd.choice(vocab) for _ in range(10)), fontsize=9)
+    path = str(tmp_path / "doc.pdf")
+    doc.save(path)
+    return path
+
+
+@pytest.fixture
+def window(app, pdf_path, monkeypatch):
+    # 不改写仓库中的界面配置
+    monkeypatch.setattr(PDFHighlighter, "save_config", lambda self: None)
+    window = PDFHighlighter(pdf_path)
+    window.locate_processes = 1
+    window.log = lambda message: None
+    yield window
+    window.close()
+    window.deleteLater()
+
+
+def add_translations(manager):
+    for page_index in range(PAGES):
+        words = [w["text"] for w in get_page_index(manager.doc[page_index]).merged]
+        sentences = [{"original": " ".join(words[i:i + 10]), "translation": "译文"} for i in range(0, 300, 41)]
+        manager.add_sentences(sentences, page_index)
+        for word in words[3:200:17]:
+            manager.add_word_translation(word, "词", page_index)
+
+
+def drain(app, window, timeout=60):
+    deadline = time.time() + timeout
+    while window.highlight_manager.deferred or window.idle_locate_future is not None:
+        assert time.time() < deadline, "空闲定位没有完成"
+        app.processEvents(QtCore.QEventLoop.AllEvents, 50)
+
+
+def highlight_state(manager):
+    return {
+        (page_index, kind, key): (info["highlighted"], [tuple(r) for r in info["rects"]])
+        for page_index, page_data in manager.page_highlights.items()
+        for kind, items in page_data.items()
+        for key, info in items.items()
+    }
+
+
+def eager_state(window):
+    """同样的翻译结果在界面线程逐页直接高亮"""
+    manager = window.highlight_manager
+    reference = HighlightManager(window.doc, window.view)
+    reference.translations = manager.translations
+    reference.sentence_ids = manager.sentence_ids
+    for page_index in range(PAGES):
+        reference.highlight_sentences([s["id"] for s in manager.get_current_page_sentences(page_index)], page_index)
+        reference.highlight_words(list(manager.translations["words"][page_index]), page_index)
+    return highlight_state(reference)
+
+
+def test_deferred_items_are_realized_like_eager_highlights(app, window):
+    manager = window.highlight_manager
+    add_translations(manager)
+    for page_index in range(PAGES):
+        manager.defer_highlights(page_index, "sentences", [s["id"] for s in manager.get_current_page_sentences(page_index)])
+        manager.defer_highlights(page_index, "words", list(manager.translations["words"][page_index]))
+    assert not any(highlighted for highlighted, _ in highlight_state(manager).values())
+
+    # 取消的待高亮项不再定位
+    word = next(iter(manager.translations["words"][2]))
+    assert manager.discard_deferred(2, "words", word)
+    assert not manager.discard_deferred(2, "words", word)
+    manager.defer_highlights(2, "words", [word])
+
+    assert manager.realize_page(1) > 0 and 1 not in manager.deferred
+    assert manager.realize_all() > 0 and manager.deferred == {}
+    assert highlight_state(manager) == eager_state(window)
+
+
+@pytest.fixture
+def gui_locates(monkeypatch, window):
+    """记录在界面线程中定位的页面"""
+    calls = []
+    manager = window.highlight_manager
+    find_words_rects = manager.find_words_rects
+    find_sentences = highlight_module.find_sentences_in_page
+
+    def record_words(page, words):
+        calls.append(page.number)
+        return find_words_rects(page, words)
+
+    def record_sentences(page, texts, word_range=None):
+        calls.append(page.number)
+        return find_sentences(page, texts, word_range)
+
+    monkeypatch.setattr(manager, "find_words_rects", record_words)
+    monkeypatch.setattr(highlight_module, "find_sentences_in_page", record_sentences)
+    return calls
+
+
+def test_idle_pages_are_located_in_the_service(app, window, gui_locates):
+    add_translations(window.highlight_manager)
+    window.highlight_all_pages_sentences()
+    window.highlight_all_pages_words()
+    assert sorted(window.highlight_manager.deferred) == list(range(1, PAGES))
+
+    # 只有当前页在界面线程定位
+    assert set(gui_locates) == {0}
+    gui_locates.clear()
+    drain(app, window)
+    assert gui_locates == []
+    assert highlight_state(window.highlight_manager) == eager_state(window)
+
+
+def test_without_service_pages_are_realized_one_per_idle_tick(app, window, gui_locates, monkeypatch):
+    monkeypatch.setattr(window, "document_service", lambda: None)
+    add_translations(window.highlight_manager)
+    window.highlight_all_pages_words()
+    assert window.realize_timer.isSingleShot() and window.realize_timer.interval() > 0
+
+    remaining = len(window.highlight_manager.deferred)
+    while window.highlight_manager.deferred:
+        window.realize_next_deferred_page()
+        # 每次只处理一页，然后等待下一次空闲
+        assert len(window.highlight_manager.deferred) == remaining - 1
+        remaining -= 1
+    assert sorted(set(gui_locates)) == list(range(PAGES))
+
+
+def test_closing_document_drops_pending_idle_result(app, window):
+    add_translations(window.highlight_manager)
+    window.highlight_all_pages_words()
+    deadline = time.time() + 60
+    while window.idle_locate_future is None:
+        assert time.time() < deadline
+        app.processEvents(QtCore.QEventLoop.AllEvents, 50)
+
+    future = window.idle_locate_future
+    window.stop_locate_service()
+    assert window.idle_locate_future is None
+    # 关闭后返回的结果不再处理
+    manager = window.highlight_manager
+    pending, located = sorted(manager.deferred), len(manager.geometry)
+    window.handle_idle_page_located(future, 1)
+    assert sorted(manager.deferred) == pending
+    assert len(manager.geometry) == located
+    assert not window.realize_timer.isActive()
@@ -0,0 +1,98 @@
+"""多进程定位服务：子进程中定位的结果与界面线程逐页定位的结果相同"""
+import random
+import string
+
+import fitz
+import pytest
+
+from gui.thread_manager import LocateWorker
+from locate_service import LocateService, locate_page, pool_size
+from text_index import clear_text_index
+from translator import find_sentences_in_page, locate_words
+
+PAGES = 3
+
+
+@pytest.fixture(scope="module")
+def pdf(tmp_path_factory):
+    """写入临时文件的文档，以及每页的单词和句子"""
+    rnd = random.Random(5)
+    vocab = ["".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(3, 9))) for _ in range(200)]
+    doc = fitz.open()
+    pages = []
+    for _ in range(PAGES):
+        page = doc.new_page()
+        lines = [" ".join(rnd.choice(vocab) for _ in range(9)) + "." for _ in range(12)]
+        for row, line in enumerate(lines):
+            page.insert_text((40, 40 + 16 * row), line, fontsize=9)
+        pages.append((rnd.sample(vocab, 15) + ["missingword"], lines[2:6]))
+    path = str(tmp_path_factory.mktemp("locate") / "doc.pdf")
+    doc.save(path)
+    doc.close()
+    return path, pages
+
+
+@pytest.fixture(scope="module")
+def service(pdf):
+    service = LocateService(pdf[0], processes=1)
+    yield service
+    service.shutdown()
+
+
+def expected_geometry(path, pages):
+    """在当前进程中逐页定位"""
+    doc = fitz.open(path)
+    geometry = {}
+    for page_index, (words, sentences) in enumerate(pages):
+        page = doc[page_index]
+        geometry[(page_index, "words")] = {
+            word: [tuple(r) for r in rects] for word, rects in locate_words(page, words).items()
+        }
+        geometry[(page_index, "sentences")] = {
+            text: [tuple(r) for r in rects]
+            for text, rects in zip(sentences, find_sentences_in_page(page, sentences))
+        }
+    clear_text_index(doc)
+    doc.close()
+    return geometry
+
+
+def test_pool_size():
+    assert pool_size(3) == 3
+    assert pool_size(0) >= 1
+
+
+def test_pages_located_in_the_pool_match_local_lookup(pdf, service):
+    path, pages = pdf
+    futures = [service.submit(locate_page, page_index, kind, texts)
+               for page_index, (words, sentences) in enumerate(pages)
+               for kind, texts in (("words", words), ("sentences", sentences))]
+    located = {(page_index, kind): found for page_index, kind, found in (f.result(timeout=60) for f in futures)}
+    assert located == expected_geometry(path, pages)
+
+
+def test_locate_worker_emits_each_page(pdf, service):
+    path, pages = pdf
+    worker = LocateWorker(service, [(page_index, "words", words) for page_index, (words, _) in enumerate(pages)])
+    located, finished = {}, []
+    worker.page_located.connect(lambda page_index, kind, geometry: located.update({(page_index, kind): geometry}))
+    worker.all_finished.connect(lambda completed, total: finished.append((completed, total)))
+    worker.run()
+    assert finished == [(PAGES, PAGES)]
+    expected = expected_geometry(path, pages)
+    for key, geometry in located.items():
+        assert all(isinstance(r, fitz.Rect) for rects in geometry.values() for r in rects)
+        assert {text: [tuple(r) for r in rects] for text, rects in geometry.items()} == expected[key]
+
+
+def test_closed_service_rejects_jobs(pdf):
+    service = LocateService(pdf[0], processes=1)
+    service.shutdown()
+    with pytest.raises(RuntimeError):
+        service.submit(locate_page, 0, "words", ["x"])
+    worker = LocateWorker(service, [(0, "words", ["x"])])
+    errors, finished = [], []
+    worker.progress.connect(errors.append)
+    worker.all_finished.connect(lambda completed, total: finished.append((completed, total)))
+    worker.run()
+    assert finished == [(0, 1)] and errors
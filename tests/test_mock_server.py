@@ -0,0 +1,124 @@
+"""模拟接口：返回客户端能解析的回答，按设置注入错误、限流并统计请求"""
+import json
+import threading
+
+import pytest
+import requests
+
+from mock_server import MockSettings, MockState, create_server, fake_completion, estimate_tokens
+from translator import SENTENCE_PROMPT, build_word_prompt, estimate_tokens as client_estimate_tokens
+
+
+@pytest.fixture
+def server():
+    """在随机端口启动无延迟的模拟接口，返回接口根地址"""
+    def start(**kwargs):
+        settings = MockSettings(latency_ms=0, latency_jitter_ms=0, latency_dist="fixed",
+                                tokens_per_second=0, seed=1, **kwargs)
+        srv = create_server("127.0.0.1", 0, settings)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+        return f"http://127.0.0.1:{srv.server_address[1]}"
+
+    servers = []
+    yield start
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
+
+
+def chat(base, content, **extra):
+    payload = {"model": "mock", "messages": [{"role": "user", "content": content}]}
+    payload.update(extra)
+    return requests.post(base + "/v1/chat/completions", json=payload, timeout=5)
+
+
+def test_sentence_and_word_answers_follow_the_prompts():
+    text = "The first sentence is short. The second sentence mentions photosynthesis!"
+    sentences = json.loads(fake_completion(SENTENCE_PROMPT + text))
+    assert [s["original"] for s in sentences] == [
+        "The first sentence is short.", "The second sentence mentions photosynthesis!"
+    ]
+    assert all(s["translation"] for s in sentences)
+
+    words = json.loads(fake_completion(build_word_prompt({}) + text))
+    assert words == {"sentence": "sentence的释义", "mentions": "mentions的释义",
+                     "photosynthesis": "photosynthesis的释义"}
+
+
+def test_token_estimate_matches_client():
+    for text in ("", "plain ascii text", "中文和 English 混合", "x" * 1001):
+        assert estimate_tokens(text) == client_estimate_tokens(text)
+
+
+def test_completion_response_shape(server):
+    base = server()
+    response = chat(base, SENTENCE_PROMPT + "One. Two.")
+    assert response.status_code == 200
+    data = response.json()
+    content = data["choices"][0]["message"]["content"]
+    assert [s["original"] for s in json.loads(content)] == ["One.", "Two."]
+    usage = data["usage"]
+    assert usage["completion_tokens"] == estimate_tokens(content)
+    assert usage["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"]
+
+
+def test_stream_reassembles_to_the_same_answer(server):
+    base = server()
+    content = SENTENCE_PROMPT + "Streaming works. Really."
+    expected = chat(base, content).json()["choices"][0]["message"]["content"]
+
+    pieces, usage = [], None
+    with requests.post(base + "/v1/chat/completions", stream=True, timeout=5, json={
+        "model": "mock", "stream": True, "messages": [{"role": "user", "content": content}]
+    }) as response:
+        # SSE 固定使用 UTF-8
+        for line in (raw.decode("utf-8") for raw in response.iter_lines()):
+            if not line or line == "data: [DONE]":
+                continue
+            event = json.loads(line[len("data: "):])
+            pieces.append(event["choices"][0]["delta"].get("content", ""))
+            usage = event.get("usage", usage)
+    assert "".join(pieces) == expected
+    assert usage["completion_tokens"] == estimate_tokens(expected)
+
+
+def test_injected_errors_and_stats(server):
+    base = server(error_429=1.0)
+    response = chat(base, SENTENCE_PROMPT + "Limited.")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+    base = server(error_500=1.0)
+    assert chat(base, SENTENCE_PROMPT + "Broken.").status_code == 500
+    stats = requests.get(base + "/stats", timeout=5).json()
+    assert stats["requests"] == 1 and stats["errors"] == 1 and stats["ok"] == 0
+
+
+def test_bad_requests(server):
+    base = server()
+    assert requests.post(base + "/v1/chat/completions", data=b"not json", timeout=5).status_code == 400
+    assert requests.post(base + "/v1/other", json={}, timeout=5).status_code == 404
+    assert requests.get(base + "/v1/models", timeout=5).json()["data"][0]["id"] == "mock"
+
+
+def test_rpm_and_concurrency_limits():
+    state = MockState(MockSettings(rpm=3, seed=0))
+    assert [state.admit() for _ in range(3)] == [None, None, None]
+    assert state.admit() == (429, "rate limit exceeded")
+
+    state = MockState(MockSettings(max_concurrent=2, seed=0))
+    assert state.admit() is None and state.admit() is None
+    assert state.admit() == (429, "too many concurrent requests")
+    state.release(True)
+    assert state.admit() is None
+    assert state.stats["max_active"] == 2 and state.stats["ok"] == 1
+
+
+@pytest.mark.parametrize("dist", ["fixed", "uniform", "normal", "lognormal"])
+def test_latency_samples_are_non_negative_and_centered(dist):
+    settings = MockSettings(latency_ms=400, latency_jitter_ms=100, latency_dist=dist, seed=3)
+    samples = sorted(settings.sample_latency() for _ in range(2001))
+    assert samples[0] >= 0
+    # 各分布的中位数都接近设置的延迟
+    assert samples[1000] == pytest.approx(0.4, abs=0.02)
@@ -0,0 +1,174 @@
+"""任务预估：耗时模型拟合、单任务分批与批量请求池的耗时计算、限速下限、从请求日志载入历史"""
+import fitz
+import pytest
+
+import translator
+from planner import fit_latency_model, forecast_job, forecast_pages, pool_wall_time
+from request_log import RequestLogger
+from translator import LATENCY_HISTORY, load_latency_history, split_text
+from utils import clean_text
+
+LATENCY = 3.0
+
+
+@pytest.fixture
+def history():
+    """替换全局耗时记录，测试结束后恢复"""
+    saved = list(LATENCY_HISTORY)
+    LATENCY_HISTORY.clear()
+    yield LATENCY_HISTORY
+    LATENCY_HISTORY.clear()
+    LATENCY_HISTORY.extend(saved)
+
+
+@pytest.fixture
+def constant_latency(history):
+    """耗时与输出长度无关的历史记录：拟合后每次请求都是 LATENCY 秒"""
+    for output_tokens in (10, 20, 30, 40):
+        history.append({"task_type": "sentences", "input_tokens": 100,
+                        "output_tokens": output_tokens, "latency": LATENCY})
+    return history
+
+
+def make_config(concurrency=4, rpm=0):
+    return dict(translator.load_ai_config(), MAX_CONCURRENCY=concurrency, RATE_LIMIT_RPM=rpm)
+
+
+def long_text(chunks):
+    """每句接近分块上限，拆分后每句一个分块"""
+    sentence = "word " * 180 + "end."
+    return " ".join([sentence] * chunks)
+
+
+def sample(task_type, output_tokens, latency, input_tokens=100):
+    return {"task_type": task_type, "input_tokens": input_tokens,
+            "output_tokens": output_tokens, "latency": latency}
+
+
+def test_fit_recovers_linear_model():
+    history = [sample("sentences", x, 1.5 + 0.02 * x, input_tokens=x // 2) for x in (50, 120, 300, 800)]
+    history.append(sample("words", 999, 100.0))
+    overhead, per_token, output_ratio, n = fit_latency_model("sentences", history)
+    assert n == 4
+    assert overhead == pytest.approx(1.5)
+    assert per_token == pytest.approx(0.02)
+    assert output_ratio == pytest.approx(2.0)
+
+
+def test_fit_with_few_samples_uses_average_speed():
+    history = [sample("words", 100, 2.0), sample("words", 300, 6.0)]
+    overhead, per_token, output_ratio, n = fit_latency_model("words", history)
+    assert (overhead, n) == (0.0, 2)
+    assert per_token == pytest.approx(8.0 / 400)
+    assert output_ratio == pytest.approx(2.0)
+
+
+def test_fit_without_samples_uses_defaults():
+    overhead, per_token, output_ratio, n = fit_latency_model("sentences", [])
+    assert n == 0
+    assert overhead > 0 and per_token > 0
+    assert output_ratio == pytest.approx(1.8)
+
+
+def test_constant_latency_history_fits_zero_slope(constant_latency):
+    overhead, per_token, _, _ = fit_latency_model("sentences")
+    assert overhead == pytest.approx(LATENCY)
+    assert per_token == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize("chunks,concurrency,waves", [(1, 4, 1), (4, 4, 1), (5, 4, 2), (10, 4, 3), (10, 1, 10)])
+def test_single_job_runs_in_waves(constant_latency, chunks, concurrency, waves):
+    text = long_text(chunks)
+    assert len(split_text(clean_text(text))) == chunks
+    forecast = forecast_job([text], "sentences", make_config(concurrency))
+    assert forecast["requests"] == chunks
+    assert forecast["wall_time"] == pytest.approx(waves * LATENCY)
+
+
+def test_single_jobs_are_sequential(constant_latency):
+    forecast = forecast_job([long_text(5), long_text(2)], "sentences", make_config(4))
+    assert forecast["jobs"] == 2
+    assert forecast["wall_time"] == pytest.approx((2 + 1) * LATENCY)
+
+
+def test_batch_shares_one_request_pool(constant_latency):
+    texts = ["A short page of text."] * 20
+    config = make_config(4)
+    batch = forecast_job(texts, "sentences", config, batch=True)
+    assert batch["requests"] == 20
+    assert batch["wall_time"] == pytest.approx(5 * LATENCY)
+    # 按任务依次执行的模型会把耗时高估为每页一轮
+    assert forecast_job(texts, "sentences", config)["wall_time"] == pytest.approx(20 * LATENCY)
+
+
+def test_batch_pool_fills_slots_across_pages(constant_latency):
+    # 一页10个分块 + 两页各1个分块 = 12个请求，4个槽位 -> 3轮
+    texts = [long_text(10), "Short page.", "Another short page."]
+    forecast = forecast_job(texts, "sentences", make_config(4), batch=True)
+    assert forecast["requests"] == 12
+    assert forecast["wall_time"] == pytest.approx(3 * LATENCY)
+
+
+def test_pool_wall_time_schedules_on_first_free_slot():
+    assert pool_wall_time([], 4) == 0.0
+    assert pool_wall_time([2.0, 1.0], 4) == 2.0
+    assert pool_wall_time([5.0, 1.0, 1.0, 1.0, 1.0, 1.0], 2) == 5.0
+    assert pool_wall_time([1.0, 1.0, 1.0, 5.0], 2) == 6.0
+    assert pool_wall_time([1.0] * 9, 3) == 3.0
+
+
+def test_rate_limit_sets_lower_bound(constant_latency):
+    texts = ["A short page of text."] * 20
+    forecast = forecast_job(texts, "sentences", make_config(4, rpm=30), batch=True)
+    assert forecast["wall_time"] == pytest.approx(20 / 30 * 60)
+    # 限速足够宽松时不影响结果
+    forecast = forecast_job(texts, "sentences", make_config(4, rpm=6000), batch=True)
+    assert forecast["wall_time"] == pytest.approx(5 * LATENCY)
+
+
+def test_forecast_pages_uses_pool_model(constant_latency):
+    doc = fitz.open()
+    for k in range(8):
+        doc.new_page().insert_text((72, 72), f"Page {k} has one short sentence.")
+    forecast = forecast_pages(doc, range(8), "sentences", config=make_config(4))
+    assert forecast["jobs"] == 8
+    assert forecast["wall_time"] == pytest.approx(2 * LATENCY)
+
+
+def log_record(seq, **fields):
+    record = {"seq": seq, "task_type": "sentences", "input_tokens": 100, "output_tokens": 10 + seq,
+              "total_ms": 1000.0 + seq, "retries": 0, "ok": True, "transport": "live"}
+    record.update(fields)
+    return record
+
+
+def test_load_latency_history_keeps_clean_live_requests(tmp_path, history):
+    logger = RequestLogger(str(tmp_path / "requests.jsonl"))
+    logger.write(log_record(1))
+    logger.write(log_record(2, ok=False, total_ms=30000.0, output_tokens=None))
+    logger.write(log_record(3, retries=2))
+    logger.write(log_record(4, transport="replay"))
+    logger.write(log_record(5, task_type="words"))
+
+    assert load_latency_history(logger.files()) == 2
+    assert list(history) == [
+        {"task_type": "sentences", "input_tokens": 100, "output_tokens": 11, "latency": pytest.approx(1.001)},
+        {"task_type": "words", "input_tokens": 100, "output_tokens": 15, "latency": pytest.approx(1.005)},
+    ]
+
+
+def test_load_latency_history_keeps_most_recent_across_rotation(tmp_path, history):
+    logger = RequestLogger(str(tmp_path / "requests.jsonl"), max_bytes=4000, backup_count=100)
+    total = history.maxlen + 50
+    for seq in range(total):
+        logger.write(log_record(seq))
+    assert len(logger.files()) > 2
+
+    assert load_latency_history(logger.files()) == history.maxlen
+    assert [h["output_tokens"] - 10 for h in history] == list(range(total - history.maxlen, total))
+    assert fit_latency_model("sentences")[3] == history.maxlen
+
+
+def test_load_latency_history_without_log(tmp_path, history):
+    assert load_latency_history([str(tmp_path / "missing.jsonl")]) == 0
+    assert not history
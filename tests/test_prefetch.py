@@ -0,0 +1,113 @@
+"""预读翻译：只预读当前页之后的页面，跳转时取消窗口外的任务，结果取出一次后不再保留"""
+import pytest
+
+from gui.prefetch_manager import PrefetchManager
+
+
+class FakeJob:
+    def __init__(self):
+        self.canceled = False
+
+    def cancel(self):
+        self.canceled = True
+
+
+class FakeWindow:
+    def __init__(self, page_count, translated=()):
+        self.doc = type("Doc", (), {"page_count": page_count, "name": "doc.pdf"})()
+        self.translated = set(translated)
+        self.highlight_manager = self
+        self.page_index = 0
+        self.applied = []
+        self.messages = []
+
+    def get_current_page_sentences(self, page_index):
+        return [{"id": "s"}] if page_index in self.translated else []
+
+    def apply_prefetched_result(self, page_index):
+        self.applied.append(page_index)
+
+    def log(self, message):
+        self.messages.append(message)
+
+
+@pytest.fixture
+def manager():
+    def make(page_count=10, translated=(), depth=2):
+        manager = PrefetchManager(FakeWindow(page_count, translated), depth)
+        # 不启动真正的翻译线程，只记录启动的页面
+        manager.started = []
+
+        def start(page_index):
+            manager.started.append(page_index)
+            manager.jobs[page_index] = (FakeJob(), None)
+        manager._start = start
+        return manager
+    return make
+
+
+def test_schedules_following_pages_only(manager):
+    m = manager(page_count=6, translated={4})
+    m.schedule(2)
+    assert m.started == [3]  # 第5页已有翻译结果
+    m.schedule(4)
+    assert m.started == [3, 5]
+    m.schedule(5)
+    assert m.started == [3, 5]  # 最后一页之后没有页面
+
+
+def test_jump_cancels_jobs_outside_the_window(manager):
+    m = manager(depth=2)
+    m.schedule(0)
+    jobs = {p: m.jobs[p][0] for p in (1, 2)}
+    m.schedule(1)
+    # 翻到的页面保留进行中的任务，结果到达时直接高亮
+    assert sorted(m.jobs) == [1, 2, 3]
+    assert not jobs[1].canceled and not jobs[2].canceled
+
+    m.schedule(7)
+    assert sorted(m.jobs) == [8, 9]
+    assert jobs[1].canceled and jobs[2].canceled
+    assert len(m._retired) == 3
+
+
+def test_results_are_kept_until_taken(manager):
+    m = manager()
+    m.schedule(0)
+    worker = m.jobs[2][0]
+    m.sender = lambda: worker
+    result = [{"original": "A.", "translation": "甲。"}]
+    m._on_page_finished(result, 2, "sentences", {"geometry": {}})
+    assert m.window.applied == []
+
+    # 已有结果的页面不再预读
+    m.schedule(1)
+    assert m.started == [1, 2, 3]
+    assert m.take_result(2) == (result, {"geometry": {}})
+    assert m.take_result(2) == (None, None)
+
+
+def test_result_for_current_page_is_applied_at_once(manager):
+    m = manager()
+    m.schedule(0)
+    worker = m.jobs[1][0]
+    m.window.page_index = 1
+    m.schedule(1)
+    m.sender = lambda: worker
+    m._on_page_finished([{"original": "B.", "translation": "乙。"}], 1, "sentences", None)
+    assert m.window.applied == [1]
+
+
+def test_canceled_or_stale_results_are_dropped(manager):
+    m = manager()
+    m.schedule(0)
+    worker = m.jobs[1][0]
+    m.sender = lambda: FakeJob()
+    m._on_page_finished([{"original": "C."}], 1, "sentences", None)
+    m.cancel_page(1)
+    m.sender = lambda: worker
+    m._on_page_finished([{"original": "C."}], 1, "sentences", None)
+    assert m.take_result(1) == (None, None)
+
+    m.stop()
+    assert m.jobs == {} and m.results == {}
@@ -0,0 +1,78 @@
+"""分栏阅读顺序：按通栏区域、栏、块的顺序排列单词，句子定位不跨栏取词"""
+import fitz
+import pytest
+
+from text_index import get_page_index, clear_text_index, reading_order
+from translator import find_sentence_in_page
+
+
+def word(x0, y0, text, block):
+    return (x0, y0, x0 + 40, y0 + 10, text, block, 0, 0)
+
+
+def test_single_column_keeps_extraction_order():
+    words = [word(40, 40 + 14 * i, f"w{i}", i // 3) for i in range(9)]
+    assert reading_order(words) == (list(range(9)), [0] * 9)
+    assert reading_order([]) == ([], [])
+
+
+def test_two_columns_between_spanning_blocks():
+    # 提取顺序按行交错：左栏、右栏、左栏、右栏……
+    title = (40, 20, 560, 30, "Title", 0, 0, 0)
+    words = [title]
+    for row in range(3):
+        words.append(word(40, 40 + 14 * row, f"L{row}", 1 + 2 * row))
+        words.append(word(320, 40 + 14 * row, f"R{row}", 2 + 2 * row))
+    words.append((40, 100, 560, 110, "Footer", 7, 0, 0))
+    order, segments = reading_order(words)
+    assert [words[i][4] for i in order] == ["Title", "L0", "L1", "L2", "R0", "R1", "R2", "Footer"]
+    assert [segments[i] for i in order] == [0, 1, 1, 1, 2, 2, 2, 3]
+
+
+LEFT = ["Alpha beta gamma delta epsilon.", "Zeta eta theta iota kappa", "lambda mu nu xi omicron"]
+RIGHT = ["quartz river maple cobalt.", "Granite willow ember harbor", "saffron lantern meadow."]
+
+
+@pytest.fixture
+def page():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((40, 40), "A Study Of Columns Spanning The Whole Text Width Of The Page Here", fontsize=9)
+    # 先写右栏，提取顺序中右栏在左栏之前
+    page.insert_text((320, 70), "\n".join(RIGHT), fontsize=9)
+    page.insert_text((40, 70), "\n".join(LEFT), fontsize=9)
+    yield page
+    clear_text_index(doc)
+    doc.close()
+
+
+def test_page_index_reads_column_by_column(page):
+    index = get_page_index(page)
+    body = index.texts[index.texts.index("Alpha"):]
+    assert body == " ".join(LEFT + RIGHT).split()
+    left_end = index.texts.index("omicron")
+    assert index.segments[left_end] != index.segments[left_end + 1]
+
+
+def word_range_rects(index, first, last):
+    start, end = index.texts.index(first), index.texts.index(last)
+    return [tuple(index.word_rect(i)) for i in range(start, end + 1)]
+
+
+def test_sentences_follow_the_columns(page):
+    index = get_page_index(page)
+    rects = find_sentence_in_page(page, "Alpha beta gamma delta epsilon.")
+    assert [tuple(r) for r in rects] == word_range_rects(index, "Alpha", "epsilon.")
+    # 从左栏延续到右栏的句子是连续的一段
+    text = "Zeta eta theta iota kappa lambda mu nu xi omicron quartz river maple cobalt."
+    rects = find_sentence_in_page(page, text)
+    assert [tuple(r) for r in rects] == word_range_rects(index, "Zeta", "cobalt.")
+
+
+def test_modified_sentence_is_aligned_within_the_columns(page):
+    index = get_page_index(page)
+    text = "Zeta eta theta iota changed lambda mu nu xi omicron quartz river maple cobalt."
+    found = {tuple(r) for r in find_sentence_in_page(page, text)}
+    expected = word_range_rects(index, "Zeta", "cobalt.")
+    assert found <= set(expected)
+    assert set(expected) - found <= {tuple(index.word_rect(index.texts.index("kappa")))}
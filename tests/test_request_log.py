@@ -0,0 +1,74 @@
+"""请求日志：轮转后按时间顺序读回全部记录，汇总统计与直接计算的结果一致"""
+import random
+
+import numpy as np
+import pytest
+
+from request_log import RequestLogger, load_records, percentile, aggregate
+
+
+def test_rotation_keeps_every_record_in_order(tmp_path):
+    logger = RequestLogger(str(tmp_path / "requests.jsonl"), max_bytes=400, backup_count=50)
+    for k in range(40):
+        logger.write({"seq": k, "task_type": "sentences", "ok": True})
+
+    files = logger.files()
+    assert len(files) > 1
+    records = load_records(files)
+    assert [r["seq"] for r in records] == list(range(40))
+    assert all("time" in r for r in records)
+
+
+def test_rotation_drops_oldest_files_beyond_backup_count(tmp_path):
+    logger = RequestLogger(str(tmp_path / "requests.jsonl"), max_bytes=200, backup_count=2)
+    for k in range(40):
+        logger.write({"seq": k})
+
+    assert len(logger.files()) == 3
+    seqs = [r["seq"] for r in load_records(logger.files())]
+    # 保留的是最新的一段连续记录
+    assert seqs == list(range(seqs[0], 40))
+
+
+def test_load_records_skips_blank_and_broken_lines(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    path.write_text('{"seq": 1}\n\nnot json\n{"seq": 2}\n', encoding="utf-8")
+    assert load_records([str(path)]) == [{"seq": 1}, {"seq": 2}]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 100])
+def test_percentile_matches_numpy_linear(size):
+    rnd = random.Random(size)
+    values = [rnd.uniform(0, 5000) for _ in range(size)]
+    for pct in (0, 50, 90, 95, 99, 100):
+        assert percentile(values, pct) == pytest.approx(np.percentile(values, pct))
+    assert percentile([], 50) == 0.0
+
+
+def test_aggregate_counts_per_task_type():
+    records = [
+        {"task_type": "sentences", "ok": True, "parse_ok": True, "total_ms": 100.0, "ttfb_ms": 40.0,
+         "output_tokens": 10, "retries": 0, "time": "2026-01-01T00:00:00.000"},
+        {"task_type": "sentences", "ok": True, "parse_ok": False, "total_ms": 300.0, "ttfb_ms": 60.0,
+         "output_tokens": 30, "retries": 1, "time": "2026-01-01T00:00:01.000"},
+        {"task_type": "words", "ok": False, "parse_ok": False, "total_ms": 50.0, "ttfb_ms": None,
+         "output_tokens": None, "retries": 2, "time": "2026-01-01T00:00:02.000"},
+    ]
+    summary = aggregate(records)
+
+    sentences = summary["sentences"]
+    assert sentences["requests"] == 2
+    assert sentences["p50_ms"] == pytest.approx(200.0)
+    assert sentences["ttfb_p50_ms"] == pytest.approx(50.0)
+    assert sentences["throughput_rps"] == pytest.approx(2.0)
+    assert sentences["output_tokens_per_s"] == pytest.approx(40.0)
+    assert sentences["parse_failure_rate"] == pytest.approx(0.5)
+    assert sentences["retries"] == 1
+
+    # 失败的请求计入错误率，不计入延迟
+    words = summary["words"]
+    assert words["error_rate"] == 1.0
+    assert words["p50_ms"] == 0.0
+
+    assert summary["all"]["requests"] == 3
+    assert summary["all"]["retries"] == 3
@@ -0,0 +1,102 @@
+"""全局请求名额：并发上限、用户请求优先于预读、取消等待"""
+import threading
+import time
+
+from gui.thread_manager import RequestScheduler
+
+
+def start_acquire(scheduler, background, order, name):
+    """在线程中等待名额，拿到后记录名字"""
+    def run():
+        if scheduler.acquire(background):
+            order.append(name)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def settle():
+    time.sleep(0.1)
+
+
+def test_capacity_limits_running_requests():
+    scheduler = RequestScheduler(capacity=2)
+    order = []
+    threads = [start_acquire(scheduler, False, order, k) for k in range(3)]
+    settle()
+    assert len(order) == 2
+    scheduler.release()
+    for thread in threads:
+        thread.join(1)
+    assert sorted(order) == [0, 1, 2]
+    assert scheduler.running() == 2
+
+
+def test_background_waits_while_user_requests_run():
+    scheduler = RequestScheduler(capacity=4)
+    assert scheduler.acquire()
+    order = []
+    thread = start_acquire(scheduler, True, order, "prefetch")
+    settle()
+    # 仍有空闲名额，但用户请求进行中，预读不开始
+    assert order == []
+    scheduler.release()
+    thread.join(1)
+    assert order == ["prefetch"]
+    assert scheduler.running(background=True) == 1
+
+
+def test_freed_slot_goes_to_waiting_user_request():
+    scheduler = RequestScheduler(capacity=1)
+    assert scheduler.acquire(background=True)
+    order = []
+    prefetch = start_acquire(scheduler, True, order, "prefetch")
+    settle()
+    user = start_acquire(scheduler, False, order, "user")
+    settle()
+    assert order == []
+    scheduler.release(background=True)
+    user.join(1)
+    settle()
+    assert order == ["user"]
+    scheduler.release()
+    prefetch.join(1)
+    assert order == ["user", "prefetch"]
+
+
+def test_background_limit():
+    scheduler = RequestScheduler(capacity=4, background_limit=1)
+    assert scheduler.acquire(background=True)
+    assert not scheduler.acquire(background=True, canceled=lambda: True)
+    # 用户请求不受预读影响
+    assert scheduler.acquire()
+    assert scheduler.running() == 1 and scheduler.running(background=True) == 1
+
+
+def test_canceled_wait_gives_up_without_taking_a_slot():
+    scheduler = RequestScheduler(capacity=1)
+    assert scheduler.acquire()
+    canceled = threading.Event()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(scheduler.acquire(False, canceled.is_set, 0.05)))
+    thread.start()
+    settle()
+    canceled.set()
+    thread.join(1)
+    assert result == [False]
+    assert scheduler.running() == 1
+    # 放弃等待的用户请求不再阻挡预读
+    scheduler.release()
+    assert scheduler.acquire(background=True, canceled=lambda: True)
+
+
+def test_set_capacity_wakes_waiters():
+    scheduler = RequestScheduler(capacity=1)
+    assert scheduler.acquire()
+    order = []
+    thread = start_acquire(scheduler, False, order, "user")
+    settle()
+    assert order == []
+    scheduler.set_capacity(2)
+    thread.join(1)
+    assert order == ["user"]
@@ -0,0 +1,197 @@
+"""句子定位：锚点窗口、连续句子续接、按选区定位和按字符偏移直接取出，结果落在句子真实所在的单词上"""
+import random
+import string
+
+import fitz
+import pytest
+
+import translator
+from alignment import anchor_window, find_anchors, MAX_ANCHOR_HITS
+from text_index import get_page_index, clear_text_index
+from translator import find_sentence_in_page, find_sentences_in_page
+from utils import clean_word
+
+COMMON = ["the", "of", "and", "to", "in", "is", "that", "for"]
+WORDS_PER_LINE = 12
+
+
+def make_sentences(seed, count, repeat=None):
+    """生成句子（单词列表）；repeat=(k, j) 时第 j 句与第 k 句相同"""
+    rnd = random.Random(seed)
+    rare = ["".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(5, 9))) for _ in range(400)]
+    sentences = []
+    for _ in range(count):
+        words = [rnd.choice(COMMON) if rnd.random() < 0.3 else rnd.choice(rare) for _ in range(rnd.randint(8, 14))]
+        words[0] = words[0].capitalize()
+        words[-1] += "."
+        sentences.append(words)
+    if repeat:
+        k, j = repeat
+        sentences[j] = list(sentences[k])
+    return sentences
+
+
+def make_page(sentences):
+    """按固定行宽排版，返回 (doc, page, 每句的单词序号区间)"""
+    doc = fitz.open()
+    page = doc.new_page()
+    words = [w for s in sentences for w in s]
+    for line in range(0, len(words), WORDS_PER_LINE):
+        page.insert_text((40, 40 + 14 * (line // WORDS_PER_LINE)),
+                         " ".join(words[line:line + WORDS_PER_LINE]), fontsize=9)
+    spans, start = [], 0
+    for s in sentences:
+        spans.append((start, start + len(s) - 1))
+        start += len(s)
+    return doc, page, spans
+
+
+def modified(words, position=3):
+    """模型改动过的原文：替换其中一个单词"""
+    words = list(words)
+    words[position] = "changed"
+    return " ".join(words)
+
+
+def true_rects(page, span, skip=()):
+    index = get_page_index(page)
+    return [tuple(index.word_rect(i)) for i in range(span[0], span[1] + 1) if i - span[0] not in skip]
+
+
+def as_tuples(rects):
+    return [tuple(r) for r in rects]
+
+
+def assert_located(page, rects, span, skip=()):
+    """定位结果落在句子所在的单词上，且覆盖未被改动的单词"""
+    found = as_tuples(rects)
+    expected = true_rects(page, span)
+    assert found and set(found) <= set(expected)
+    assert set(true_rects(page, span, skip)) <= set(found)
+
+
+class Sample:
+    """排版好的页面及其中每句的单词和单词序号区间"""
+
+    def __init__(self, sentences):
+        self.sentences = sentences
+        self.doc, self.page, self.spans = make_page(sentences)
+
+    def close(self):
+        clear_text_index(self.doc)
+        self.doc.close()
+
+
+@pytest.fixture
+def sample():
+    sample = Sample(make_sentences(1, 30))
+    yield sample
+    sample.close()
+
+
+def test_anchor_window_contains_the_sentence(sample):
+    page = sample.page
+    index = get_page_index(page)
+    for k in (0, 7, 15, 29):
+        tokens = [clean_word(w) for w in modified(sample.sentences[k]).split()]
+        lo, hi = anchor_window(tokens, index)
+        start, end = sample.spans[k]
+        assert lo <= start and end < hi
+        # 窗口只比句子多出两侧各 m 个单词
+        assert hi - lo <= 4 * len(tokens)
+
+
+def test_common_words_are_not_anchors(sample):
+    page = sample.page
+    index = get_page_index(page)
+    tokens = [clean_word(w) for w in sample.sentences[5]]
+    anchors = find_anchors(tokens, index)
+    start, _ = sample.spans[5]
+    assert (0, start) in anchors or tokens[0] in COMMON
+    for i, j in anchors:
+        token = tokens[i]
+        if len(index.merged_positions[token]) > MAX_ANCHOR_HITS:
+            # 常见单词只以罕见的二元词组作为锚点
+            assert index.merged_cleaned[j + 1] == tokens[i + 1]
+
+
+def test_modified_sentence_is_located(sample):
+    page = sample.page
+    for k in (2, 11, 23):
+        rects = find_sentence_in_page(page, modified(sample.sentences[k]))
+        assert_located(page, rects, sample.spans[k], skip={3})
+
+
+def test_consecutive_sentences_are_located_in_one_pass(sample):
+    page = sample.page
+    texts = [modified(sample.sentences[k]) for k in range(10, 15)]
+    results = find_sentences_in_page(page, texts)
+    assert len(results) == len(texts)
+    for k, rects in zip(range(10, 15), results):
+        assert_located(page, rects, sample.spans[k], skip={3})
+    assert [as_tuples(r) for r in results] == [as_tuples(find_sentence_in_page(page, t)) for t in texts]
+
+
+@pytest.fixture
+def repeated():
+    """第20句与第5句相同"""
+    sample = Sample(make_sentences(2, 30, repeat=(5, 20)))
+    yield sample
+    sample.close()
+
+
+def test_repeated_sentence_follows_the_previous_one(repeated):
+    page = repeated.page
+    texts = [modified(repeated.sentences[19]), modified(repeated.sentences[20])]
+    previous, second = find_sentences_in_page(page, texts)
+    assert_located(page, previous, repeated.spans[19], skip={3})
+    # 单独定位取页面中第一次出现的位置，续接上一句时取紧随其后的那一次
+    assert_located(page, find_sentence_in_page(page, texts[1]), repeated.spans[5], skip={3})
+    assert_located(page, second, repeated.spans[20], skip={3})
+
+
+def test_selection_region_picks_the_selected_occurrence(repeated):
+    page = repeated.page
+    for k in (5, 20):
+        text = modified(repeated.sentences[k])
+        rects, = find_sentences_in_page(page, [text], word_range=repeated.spans[k])
+        assert_located(page, rects, repeated.spans[k], skip={3})
+        rects, = find_sentences_in_page(page, [" ".join(repeated.sentences[k])], word_range=repeated.spans[k])
+        assert as_tuples(rects) == true_rects(page, repeated.spans[k])
+
+
+def test_unmodified_sentences_are_taken_by_offset(sample, monkeypatch):
+    page = sample.page
+
+    def no_alignment(*args, **kwargs):
+        raise AssertionError("原文未改动的句子不需要对齐")
+    monkeypatch.setattr(translator, "align_sentence", no_alignment)
+
+    texts = [" ".join(sample.sentences[k]) for k in range(3, 9)]
+    for k, rects in zip(range(3, 9), find_sentences_in_page(page, texts)):
+        assert as_tuples(rects) == true_rects(page, sample.spans[k])
+    # 空白和大小写差异不影响
+    text = "  " + "\n".join(sample.sentences[12]).upper()
+    assert as_tuples(find_sentence_in_page(page, text)) == true_rects(page, sample.spans[12])
+
+
+def test_offset_match_must_cover_whole_words(sample):
+    page = sample.page
+    index = get_page_index(page)
+    start, end = sample.spans[4]
+    words = sample.sentences[4]
+    assert index.find_span(" ".join(words)) == (start, end)
+    # 截断首尾单词的文本不算完全一致
+    assert index.find_span(" ".join(words)[1:]) is None
+    assert index.find_span(" ".join(words)[:-3]) is None
+
+
+def test_offset_match_joins_hyphenated_line_breaks():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((40, 40), "The committee reviewed the inter-", fontsize=9)
+    page.insert_text((40, 54), "national agreement on Tuesday.", fontsize=9)
+    rects = find_sentence_in_page(page, "The committee reviewed the international agreement on Tuesday.")
+    index = get_page_index(page)
+    assert as_tuples(rects) == [tuple(index.word_rect(i)) for i in range(len(index.words))]
+    clear_text_index(doc)
@@ -0,0 +1,74 @@
+"""词干键：Porter算法第1步与原论文的示例一致，不规则变化和非复数词按表处理"""
+import fitz
+import pytest
+
+from stemmer import porter_stem, stem_key
+from text_index import clear_text_index
+from translator import locate_words
+
+
+# Porter (1980) 第1a、1b、1c步的示例
+PORTER_STEP1 = {
+    "caresses": "caress", "ponies": "poni", "ties": "ti", "caress": "caress", "cats": "cat",
+    "feed": "feed", "agreed": "agree", "plastered": "plaster", "bled": "bled",
+    "motoring": "motor", "sing": "sing",
+    "conflated": "conflate", "troubled": "trouble", "sized": "size", "hopping": "hop",
+    "tanned": "tan", "falling": "fall", "hissing": "hiss", "fizzed": "fizz",
+    "failing": "fail", "filing": "file",
+    "happy": "happi", "sky": "sky",
+}
+
+
+@pytest.mark.parametrize("word, stem", sorted(PORTER_STEP1.items()))
+def test_porter_step1_examples(word, stem):
+    assert porter_stem(word) == stem
+
+
+@pytest.mark.parametrize("forms", [
+    ("study", "studies", "studied", "Study's"),
+    ("run", "runs", "running", "ran"),
+    ("result", "results", "resulted", "resulting"),
+    ("go", "goes", "went", "gone"),
+    ("mouse", "mice"),
+    ("analysis", "analyses"),
+    ("knife", "knives"),
+])
+def test_inflections_share_a_key(forms):
+    assert len({stem_key(form) for form in forms}) == 1
+
+
+@pytest.mark.parametrize("a, b", [
+    ("experiment", "experience"),
+    ("general", "generation"),
+    ("news", "new"),
+    ("series", "sery"),
+    ("this", "thi"),
+    ("was", "wa"),
+    ("means", "mean"),
+])
+def test_distinct_words_keep_distinct_keys(a, b):
+    assert stem_key(a) != stem_key(b)
+
+
+def test_non_words_are_returned_unchanged():
+    for token in ("3.14", "covid-19", "e.g", "x2"):
+        assert stem_key(token) == token
+
+
+@pytest.fixture
+def page():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((40, 60), "The model and two models were studied with mice.", fontsize=11)
+    yield page
+    clear_text_index(doc)
+    doc.close()
+
+
+def test_stem_lookup_only_after_exact_match(page):
+    found = locate_words(page, ["models", "study", "mouse"])
+    # 精确匹配存在时不再加入其他屈折形式
+    assert found["models"] == page.search_for("models")
+    assert found["study"] == page.search_for("studied")
+    # 词干匹配返回整个单词的矩形（含句末标点）
+    assert len(found["mouse"]) == 1 and found["mouse"][0].contains(page.search_for("mice")[0])
@@ -0,0 +1,134 @@
+"""页面文本索引：与直接从页面提取、逐词扫描的结果一致"""
+import random
+
+import fitz
+import pytest
+
+from text_index import get_page_index, clear_text_index, index_key, KEY_PUNCTUATION
+
+
+VOCAB = ["the", "of", "model", "models", "running", "ran", "data", "analysis", "inter",
+         "national", "study", "studies", "paper", "results", "result", "bank", "banks"]
+
+
+def make_page(seed=0, lines=30, per_line=10):
+    """生成一页随机正文：部分单词带标点，部分行以连字符断词结尾"""
+    rnd = random.Random(seed)
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 40
+    for _ in range(lines):
+        words = [rnd.choice(VOCAB) for _ in range(per_line)]
+        if rnd.random() < 0.3:
+            words[2] += rnd.choice(",.;")
+        if rnd.random() < 0.3:
+            words[-1] = words[-1][:3] + "-"
+        page.insert_text((40, y), " ".join(words), fontsize=9)
+        y += 14
+    return doc, page
+
+
+@pytest.fixture
+def page():
+    doc, page = make_page()
+    yield page
+    clear_text_index(doc)
+    doc.close()
+
+
+def test_words_match_page_extraction(page):
+    index = get_page_index(page)
+    words = page.get_text("words")
+    assert index.texts == [w[4] for w in words]
+    assert [tuple(index.word_rect(i)) for i in range(len(words))] == [tuple(fitz.Rect(w[:4])) for w in words]
+
+
+def test_index_is_cached_per_page_until_cleared(page):
+    index = get_page_index(page)
+    assert get_page_index(page) is index
+    clear_text_index(page.parent)
+    assert get_page_index(page) is not index
+
+
+def test_closed_document_invalidates_index():
+    doc, page = make_page(seed=1)
+    index = get_page_index(page)
+    assert index.is_valid(doc)
+    doc.close()
+    assert not index.is_valid(doc)
+    clear_text_index(doc)
+
+
+def test_search_and_textbox_match_page(page):
+    index = get_page_index(page)
+    for text in ("model", "the data", "studies"):
+        assert index.search_for(text) == page.search_for(text)
+    clip = fitz.Rect(40, 60, 300, 120)
+    assert index.get_textbox(clip) == page.get_textbox(clip)
+
+
+def test_words_in_rect_matches_scan(page):
+    index = get_page_index(page)
+    rnd = random.Random(2)
+    for _ in range(50):
+        x0, y0 = rnd.uniform(0, 500), rnd.uniform(0, 500)
+        rect = fitz.Rect(x0, y0, x0 + rnd.uniform(1, 200), y0 + rnd.uniform(1, 100))
+        hits = [i for i in range(len(index.words)) if index.word_rect(i).intersects(rect)]
+        expected = (hits[0], hits[-1]) if hits else None
+        assert index.words_in_rect(rect) == expected
+
+
+def scan_lookup(index, text):
+    """参考实现：从每个起始单词向后逐词比较（跨行连字符单词可拼接下一个单词）"""
+    keys = [k for k in (index_key(t) for t in text.split()) if k]
+
+    def end_of(i, key):
+        if i >= len(index.cleaned):
+            return None
+        if index.cleaned[i].strip(KEY_PUNCTUATION) == key:
+            return i
+        joined = index.joined_cleaned[i]
+        if joined:
+            joined = joined.strip(KEY_PUNCTUATION)
+            if key in (joined, joined.replace('-', '')):
+                return i + 1
+        return None
+
+    spans = []
+    if not keys:
+        return spans
+    for start in range(len(index.cleaned)):
+        end = start - 1
+        for key in keys:
+            end = end_of(end + 1, key)
+            if end is None:
+                break
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def test_lookup_matches_scan(page):
+    index = get_page_index(page)
+    rnd = random.Random(3)
+    queries = VOCAB + ["Model,", "missing", "", "the the", "of the model"]
+    # 页面中实际出现的一到三个连续单词（含标点和连字符断词）
+    for _ in range(200):
+        start = rnd.randrange(len(index.texts) - 3)
+        queries.append(" ".join(index.texts[start:start + rnd.randint(1, 3)]))
+    # 跨行连字符单词的拼接形式
+    joined = [j for j in index.joined_cleaned if j]
+    assert joined
+    queries += joined
+    for text in queries:
+        assert sorted(index.lookup(text)) == scan_lookup(index, text), text
+
+
+def test_find_rects_covers_every_occurrence(page):
+    index = get_page_index(page)
+    for word in VOCAB:
+        expected = [index.word_rect(i) for i, cleaned in enumerate(index.cleaned)
+                    if cleaned.strip(KEY_PUNCTUATION) == word]
+        rects = index.find_rects(word)
+        assert len(rects) == len(expected)
+        assert all(any(rect.contains(e) for rect in rects) for e in expected)
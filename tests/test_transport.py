@@ -0,0 +1,118 @@
+"""录制/回放传输：回放录制文件得到与录制时相同的响应，不访问网络"""
+import json
+import socket
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from transport import Transport, ReplayMissError
+from translator import request_completion, new_request_record
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    """最小的对话接口：原样返回消息内容，rate_limited 为True时总是返回429"""
+    rate_limited = False
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.rate_limited:
+            status, headers, body = 429, {"Retry-After": "1"}, {"error": {"message": "rate limit"}}
+        else:
+            content = payload["messages"][-1]["content"]
+            status, headers, body = 200, {}, {
+                "choices": [{"message": {"role": "assistant", "content": json.dumps([content])}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5}
+            }
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def server():
+    """在随机端口启动本地接口，返回接口地址"""
+    def start(rate_limited=False):
+        handler = type("Handler", (CompletionHandler,), {"rate_limited": rate_limited})
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+        return f"http://127.0.0.1:{srv.server_address[1]}/v1/chat/completions"
+
+    servers = []
+    yield start
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
+
+
+def payload(text):
+    return {"model": "mock", "messages": [{"role": "user", "content": "逐句翻译：\n" + text}]}
+
+
+def closed_port_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1/chat/completions"
+
+
+def test_replay_returns_recorded_responses_in_order(server, tmp_path):
+    path = str(tmp_path / "requests.jsonl")
+    recorder = Transport("record", path)
+    body = payload("One. Two.")
+
+    # 同一请求先被限流、再成功
+    limited, _ = recorder.post(server(rate_limited=True), body, {}, 5)
+    ok, _ = recorder.post(server(), body, {}, 5)
+    other, _ = recorder.post(server(), payload("Three."), {}, 5)
+    assert (limited.status_code, ok.status_code) == (429, 200)
+
+    player = Transport("replay", path, latency_scale=0)
+    replayed = [player.post("http://unused", body, {}, 5)[0] for _ in range(3)]
+    assert [r.status_code for r in replayed] == [429, 200, 429]
+    assert replayed[0].headers == {"Retry-After": "1"}
+    with pytest.raises(requests.HTTPError):
+        replayed[0].raise_for_status()
+    assert replayed[1].json() == ok.json()
+    assert player.post("http://unused", payload("Three."), {}, 5)[0].json() == other.json()
+
+    with pytest.raises(ReplayMissError):
+        player.post("http://unused", payload("Never recorded."), {}, 5)
+
+
+def test_connection_errors_are_recorded_and_replayed(tmp_path):
+    path = str(tmp_path / "requests.jsonl")
+    with pytest.raises(requests.ConnectionError):
+        Transport("record", path).post(closed_port_url(), payload("Lost."), {}, 5)
+    with pytest.raises(requests.ConnectionError):
+        Transport("replay", path, latency_scale=0).post("http://unused", payload("Lost."), {}, 5)
+
+
+def test_request_completion_replay_matches_recording(server, tmp_path):
+    config = {
+        "API_URL": server(),
+        "API_KEY": "test",
+        "MODEL_NAME": "mock",
+        "REQUEST_TIMEOUT": 5,
+        "MAX_RETRIES": 0,
+        "TRANSPORT_FILE": str(tmp_path / "requests.jsonl"),
+        "REPLAY_LATENCY_SCALE": 0
+    }
+    text = "The first sentence. The second sentence."
+    recorded = request_completion("sentences", text, dict(config, TRANSPORT_MODE="record"))
+
+    # 回放时接口地址不可达也能得到相同结果
+    replay_config = dict(config, TRANSPORT_MODE="replay", API_URL=closed_port_url())
+    record = new_request_record("sentences", text, replay_config)
+    assert request_completion("sentences", text, replay_config, record) == recorded
+    assert record["ok"] and record["status"] == 200 and record["transport"] == "replay"
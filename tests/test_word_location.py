@@ -0,0 +1,66 @@
+"""批量单词定位：逐阶段处理整组单词，结果与逐个单词按相同顺序查找一致"""
+import random
+
+import fitz
+import pytest
+
+from gui.highlight_manager import HighlightManager
+from text_index import clear_text_index
+from translator import find_word_in_page, find_words_in_page
+
+VOCAB = ["network", "networks", "training", "trained", "analysis", "analyses", "model", "colour",
+         "the", "of", "and", "data", "international", "cooperation", "results", "study", "studies"]
+
+
+@pytest.fixture
+def page():
+    rnd = random.Random(4)
+    doc = fitz.open()
+    page = doc.new_page()
+    for line in range(40):
+        words = [rnd.choice(VOCAB) for _ in range(10)]
+        if line % 7 == 3:
+            words[-1] = words[-1][:4] + "-"
+            page.insert_text((40, 40 + 14 * line), " ".join(words), fontsize=9)
+            continue
+        if line % 7 == 4:
+            words[0] = "national"
+        page.insert_text((40, 40 + 14 * line), " ".join(words), fontsize=9)
+    yield page
+    clear_text_index(doc)
+    doc.close()
+
+
+WORDS = [
+    "network", "Network.", "the data", "trains", "analysis", "colours", "color",
+    "internatonal", "cooperaton", "missingword", "xyzzy", "studied", "results", "network",
+]
+
+
+def as_tuples(result):
+    return {word: [tuple(r) for r in rects] for word, rects in result.items()}
+
+
+def test_bulk_lookup_matches_per_word_lookup(page):
+    manager = HighlightManager(page.parent, None)
+    bulk = manager.find_words_rects(page, WORDS)
+    assert list(bulk) == list(dict.fromkeys(WORDS))
+    assert as_tuples(bulk) == as_tuples({word: manager.find_word_rects(page, word) for word in WORDS})
+    assert bulk["network"] and bulk["the data"] and not bulk["xyzzy"]
+
+
+def test_bulk_fuzzy_fallback_matches_per_word(page):
+    words = ["internatonal", "cooperaton", "analysys", "colour", "missingword", "nation", "inter"]
+    assert as_tuples(find_words_in_page(page, words)) == as_tuples(
+        {word: find_word_in_page(page, word) for word in words}
+    )
+
+
+def test_empty_page_and_empty_word_list():
+    doc = fitz.open()
+    page = doc.new_page()
+    manager = HighlightManager(doc, None)
+    assert manager.find_words_rects(page, ["model"]) == {"model": []}
+    assert find_words_in_page(page, ["model"]) == {"model": []}
+    assert manager.find_words_rects(page, []) == {}
+    clear_text_index(doc)
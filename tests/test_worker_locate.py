@@ -0,0 +1,88 @@
+"""翻译结果在工作线程一侧定位：context["geometry"] 与界面线程直接定位的结果一致"""
+from concurrent.futures import Future
+
+import fitz
+import pytest
+
+import locate_service
+from gui.thread_manager import TranslationWorker
+from text_index import clear_text_index
+from translator import find_sentences_in_page, locate_words
+
+LINES = [
+    "Neural networks learn useful representations from data.",
+    "Training requires careful tuning of the learning rate.",
+    "Evaluation uses held out samples and several metrics.",
+]
+
+
+class InlineService:
+    """在当前进程中立即执行任务的定位服务"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.calls = 0
+
+    def submit(self, fn, *args):
+        self.calls += 1
+        locate_service._doc = self.doc
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+@pytest.fixture
+def doc(monkeypatch):
+    doc = fitz.open()
+    for _ in range(2):
+        page = doc.new_page()
+        for row, line in enumerate(LINES):
+            page.insert_text((40, 40 + 14 * row), line, fontsize=9)
+    monkeypatch.setattr(locate_service, "_doc", None)
+    yield doc
+    clear_text_index(doc)
+    doc.close()
+
+
+def as_tuples(rects):
+    return [tuple(r) for r in rects]
+
+
+def test_sentences_are_located_for_the_gui(doc):
+    context = {"word_range": (0, 100)}
+    worker = TranslationWorker("sentences", "", 1, context=context, service=InlineService(doc))
+    result = [{"original": line, "translation": "译文"} for line in LINES] + [{"translation": "空"}]
+    located = worker.locate(result)
+    expected = find_sentences_in_page(doc[1], LINES, (0, 100))
+    assert located["word_range"] == (0, 100) and "geometry" not in context
+    assert list(located["geometry"]) == LINES
+    assert [as_tuples(rects) for rects in located["geometry"].values()] == [as_tuples(r) for r in expected]
+    assert all(isinstance(r, fitz.Rect) for rects in located["geometry"].values() for r in rects)
+
+
+def test_words_are_located_for_the_gui(doc):
+    worker = TranslationWorker("words", "", 0, service=InlineService(doc))
+    words = {"networks": "网络", "learning": "学习", "absent": "缺失"}
+    geometry = worker.locate(words)["geometry"]
+    expected = locate_words(doc[0], list(words))
+    assert {w: as_tuples(r) for w, r in geometry.items()} == {w: as_tuples(r) for w, r in expected.items()}
+    assert geometry["networks"] and not geometry["absent"]
+
+
+def test_falls_back_to_the_gui_thread(doc):
+    context = {"word_range": None}
+    result = [{"original": LINES[0]}]
+    assert TranslationWorker("sentences", "", 0, context=context).locate(result) is context
+
+    service = InlineService(doc)
+    worker = TranslationWorker("sentences", "", 0, context=context, service=service)
+    worker.canceled = True
+    assert worker.locate(result) is context
+    assert service.calls == 0
+
+    # 定位出错时由界面线程自行定位
+    worker = TranslationWorker("sentences", "", 5, context=context, service=service)
+    assert worker.locate(result) is context
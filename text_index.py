@@ -0,0 +1,400 @@
+import threading
+import unicodedata
+from collections import OrderedDict
+import fitz
+import numpy as np
+from utils import clean_word
+from stemmer import stem_key
+
+# 连字符类型（与定位函数中的判断一致）
+HYPHENS = ('-', '‐', '‑', '–', '—')
+
+# 最多缓存的页面数
+MAX_CACHED_PAGES = 32
+
+# 建立倒排索引时忽略的首尾标点
+KEY_PUNCTUATION = ".,;:!?'\""
+
+
+def index_key(token):
+    """倒排索引的键：清理后的单词去掉首尾标点"""
+    return clean_word(token).strip(KEY_PUNCTUATION)
+
+
+def offset_key(text):
+    """按字符偏移定位时使用的键：兼容分解后只保留字母和数字并转为小写
+
+    忽略空格、标点和连字符，因此跨行断词和排版差异不影响匹配。
+    """
+    return ''.join(c for c in unicodedata.normalize('NFKC', text).lower() if c.isalnum())
+
+
+# 宽度超过正文宽度该比例的文本块视为通栏（标题、摘要、跨栏图表说明等）
+SPANNING_BLOCK_RATIO = 0.6
+
+
+def reading_order(words):
+    """按分栏排版计算单词的阅读顺序，返回 (单词序号列表, 每个单词的分段编号)
+
+    以文本块为单位：通栏块把页面分成上下若干区域，区域内水平方向互不重叠的块归为不同的栏，
+    按 区域自上而下 → 栏自左向右 → 栏内块自上而下 排列。每个通栏块和每一栏为一个分段。
+    页面没有多栏区域时保持原顺序（整页为一个分段）。
+    """
+    n = len(words)
+    if not n:
+        return [], []
+    blocks = {}  # {块号: [单词序号, ...]}（按首次出现的顺序）
+    for i, w in enumerate(words):
+        blocks.setdefault(w[5], []).append(i)
+    if len(blocks) < 2:
+        return list(range(n)), [0] * n
+
+    bounds = {}
+    for b, members in blocks.items():
+        bounds[b] = (min(words[i][0] for i in members), min(words[i][1] for i in members),
+                     max(words[i][2] for i in members), max(words[i][3] for i in members))
+    left = min(r[0] for r in bounds.values())
+    right = max(r[2] for r in bounds.values())
+    spanning_width = (right - left) * SPANNING_BLOCK_RATIO
+
+    # 按通栏块划分区域
+    spanning = sorted((b for b, r in bounds.items() if r[2] - r[0] > spanning_width),
+                      key=lambda b: bounds[b][1])
+    bands = [[] for _ in range(len(spanning) + 1)]
+    for b, r in bounds.items():
+        if b in spanning:
+            continue
+        center = (r[1] + r[3]) / 2
+        k = sum(1 for s in spanning if bounds[s][3] <= center)
+        bands[k].append(b)
+
+    # 区域内按水平方向是否重叠把块归栏
+    sections = []  # [(排序用的上边界, [[块号, ...], ...])]
+    multi_column = False
+    for k, band in enumerate(bands):
+        columns = []  # [[x0, x1, [块号, ...]]]
+        for b in sorted(band, key=lambda b: bounds[b][0]):
+            x0, _, x1, _ = bounds[b]
+            if columns and x0 < columns[-1][1]:
+                columns[-1][1] = max(columns[-1][1], x1)
+                columns[-1][2].append(b)
+            else:
+                columns.append([x0, x1, [b]])
+        multi_column = multi_column or len(columns) > 1
+        top = bounds[spanning[k - 1]][3] if k else float('-inf')
+        sections.append((top, [sorted(c[2], key=lambda b: bounds[b][1]) for c in columns]))
+        if k < len(spanning):
+            sections.append((bounds[spanning[k]][1], [[spanning[k]]]))
+
+    if not multi_column:
+        return list(range(n)), [0] * n
+
+    order, segments = [], [0] * n
+    segment = 0
+    for _, columns in sorted(sections, key=lambda s: s[0]):
+        for column in columns:
+            for b in column:
+                for i in blocks[b]:
+                    order.append(i)
+                    segments[i] = segment
+            segment += 1
+    return order, segments
+
+
+class PageTextIndex:
+    """单页文本索引：一次提取，供单词定位、句子定位、搜索和框选取词共用
+
+    words/texts/cleaned/rects 按阅读顺序（分栏排版时逐栏）排列，segments 为每个单词所在的分段（栏）；
+    merged_* 为合并跨行连字符单词后的序列（句子定位使用）。
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.doc = page.parent
+        self.page_number = page.number
+        self._textpages = {}
+        self.derived = {}  # 由索引派生、可复用的数据（如句子对齐的空间得分）
+
+        # 单词列表（page.get_text("words") 按阅读顺序重排）
+        words = page.get_text("words", textpage=self.textpage(fitz.TEXTFLAGS_WORDS))
+        order, segments = reading_order(words)
+        self.words = [words[i] for i in order]
+        self.segments = np.array([segments[i] for i in order], dtype=int)
+        self.texts = [w[4] for w in self.words]
+        self.cleaned = [clean_word(t) for t in self.texts]
+        self.rects = np.array([w[:4] for w in self.words], dtype=float).reshape(-1, 4)
+        self.hyphen = np.array([t.endswith(HYPHENS) for t in self.texts], dtype=bool)
+
+        # 以连字符结尾的单词与下一个单词拼接后的清理结果
+        self.joined_cleaned = [
+            clean_word(self.texts[i].rstrip('‐‑–—') + self.texts[i + 1])
+            if self.hyphen[i] and i < len(self.texts) - 1 else None
+            for i in range(len(self.texts))
+        ]
+
+        self._build_merged()
+        self._build_inverted()
+        self._build_stems()
+        self._build_offsets()
+
+    def _build_merged(self):
+        """合并跨行连字符单词，跳过清理后为空的单词"""
+        merged = []
+        i = 0
+        n = len(self.texts)
+        while i < n:
+            rect = fitz.Rect(self.words[i][:4])
+            if i < n - 1 and self.hyphen[i]:
+                merged.append({
+                    "text": self.texts[i].rstrip('‐‑–—') + self.texts[i + 1],
+                    "cleaned": self.joined_cleaned[i],
+                    "rect": rect | fitz.Rect(self.words[i + 1][:4]),
+                    "start": i,
+                    "end": i + 1
+                })
+                i += 2
+                continue
+            if self.cleaned[i]:
+                merged.append({
+                    "text": self.texts[i],
+                    "cleaned": self.cleaned[i],
+                    "rect": rect,
+                    "start": i,
+                    "end": i
+                })
+            i += 1
+
+        self.merged = merged
+        self.merged_cleaned = [w["cleaned"] for w in merged]
+        # 合并序列的位置表 {清理后的单词: [序号, ...]}，句子定位用于选取锚点
+        self.merged_positions = {}
+        for j, token in enumerate(self.merged_cleaned):
+            self.merged_positions.setdefault(token, []).append(j)
+        self.merged_spans = np.array(
+            [(w["start"], w["end"]) for w in merged], dtype=int
+        ).reshape(-1, 2)
+        self.merged_segments = self.segments[self.merged_spans[:, 0]]
+        self.merged_rects = np.array(
+            [tuple(w["rect"]) for w in merged], dtype=float
+        ).reshape(-1, 4)
+        # 连字符拼接表 {清理后的单词: [(起始单词序号, 结束单词序号), ...]}（按页面顺序）：
+        # 合并后的整词指向两个单词，拆开的两半也各自收录，单词定位与句子定位使用同一份合并结果
+        self.token_spans = {}
+        for w in merged:
+            start, end = w["start"], w["end"]
+            self.token_spans.setdefault(w["cleaned"], []).append((start, end))
+            if start != end:
+                for i in (start, end):
+                    if self.cleaned[i]:
+                        self.token_spans.setdefault(self.cleaned[i], []).append((i, i))
+        if merged:
+            # 与原实现相同的求和顺序，保证得分完全一致
+            self.avg_width = sum(w["rect"].width for w in merged) / len(merged)
+            self.avg_height = sum(w["rect"].height for w in merged) / len(merged)
+        else:
+            self.avg_width = self.avg_height = 0.0
+
+    def _build_inverted(self):
+        """倒排索引 {键: {起始单词序号: 结束单词序号}}，同时收录跨行连字符拼接后的形式"""
+        positions = {}
+        for i, cleaned in enumerate(self.cleaned):
+            key = cleaned.strip(KEY_PUNCTUATION)
+            if key:
+                positions.setdefault(key, {})[i] = i
+            joined = self.joined_cleaned[i]
+            if joined:
+                joined = joined.strip(KEY_PUNCTUATION)
+                # 保留连字符的复合词形式和去掉连字符的整词形式
+                for form in (joined, joined.replace('-', '')):
+                    if form and form != key:
+                        positions.setdefault(form, {}).setdefault(i, i + 1)
+        self.positions = positions
+
+    def _build_stems(self):
+        """词干索引 {词干键: {起始单词序号: 结束单词序号}}，由倒排索引的各个键合并而成，
+        同一单词的各种屈折形式（复数、时态、不规则变化）落在同一个键下；
+        同一起始单词有多个结束序号时（跨行连字符拼接）取较长的区间"""
+        stems = {}
+        for key, spans in self.positions.items():
+            stem = stem_key(key)
+            if stem in stems:
+                table = stems[stem]
+                for start, end in spans.items():
+                    if end > table.get(start, -1):
+                        table[start] = end
+            else:
+                stems[stem] = dict(spans)
+        self.stems = stems
+
+    def _build_offsets(self):
+        """字符偏移表：所有单词的键首尾相接为 char_stream，
+        第 i 个单词占 char_stream[char_starts[i]:char_starts[i+1]]"""
+        self.offset_keys = [offset_key(t) for t in self.texts]
+        self.char_stream = ''.join(self.offset_keys)
+        self.char_starts = np.zeros(len(self.texts) + 1, dtype=int)
+        np.cumsum([len(k) for k in self.offset_keys], out=self.char_starts[1:])
+
+    def char_range(self, word_range, margin=0):
+        """单词序号范围对应的字符偏移范围 [lo, hi)，两侧各扩展 margin 个单词"""
+        start, end = word_range
+        n = len(self.texts)
+        return (int(self.char_starts[max(0, start - margin)]),
+                int(self.char_starts[min(n, end + 1 + margin)]))
+
+    def find_span(self, text, lo=0, hi=None):
+        """在字符偏移范围 [lo, hi) 内查找与文本完全一致的单词区间 (起始, 结束)
+
+        匹配必须从单词开头开始、在单词结尾结束；找不到时返回 None。
+        """
+        key = offset_key(text)
+        if not key:
+            return None
+        starts = self.char_starts
+        hi = len(self.char_stream) if hi is None else hi
+        pos = self.char_stream.find(key, lo, hi)
+        while pos != -1:
+            first = int(np.searchsorted(starts, pos, side='right')) - 1
+            last = int(np.searchsorted(starts, pos + len(key) - 1, side='right')) - 1
+            if starts[first] == pos and starts[last + 1] == pos + len(key):
+                return first, last
+            pos = self.char_stream.find(key, pos + 1, hi)
+        return None
+
+    def span_word_rects(self, start, end):
+        """单词区间内每个单词的矩形（跳过没有字母数字的单词）"""
+        return [self.word_rect(i) for i in range(start, end + 1) if self.offset_keys[i]]
+
+    def merged_position(self, i):
+        """页面单词序号 i 在合并序列中对应（或之后第一个）的位置"""
+        return int(np.searchsorted(self.merged_spans[:, 0], i, side='left'))
+
+    def lookup(self, text):
+        """精确查找单词或词组，返回 [(起始单词序号, 结束单词序号)]
+
+        词组通过相邻位置表逐词连接：上一个词的结束序号+1必须是下一个词的起始序号。
+        """
+        keys = [k for k in (index_key(t) for t in text.split()) if k]
+        return self._chain(keys, self.positions)
+
+    def lookup_stem(self, text):
+        """按词干查找单词或词组的所有屈折形式，返回 [(起始单词序号, 结束单词序号)]"""
+        keys = [stem_key(k) for k in (index_key(t) for t in text.split()) if k]
+        return self._chain(keys, self.stems)
+
+    @staticmethod
+    def _chain(keys, table):
+        if not keys:
+            return []
+        spans = list(table.get(keys[0], {}).items())
+        for key in keys[1:]:
+            starts = table.get(key)
+            if not starts or not spans:
+                return []
+            spans = [(s, starts[e + 1]) for s, e in spans if e + 1 in starts]
+        return spans
+
+    def span_rect(self, start, end):
+        """单词区间的外接矩形（跨行连字符单词为两半的并集）"""
+        rect = self.word_rect(start)
+        for i in range(start + 1, end + 1):
+            rect |= self.word_rect(i)
+        return rect
+
+    def span_rects(self, start, end):
+        """单词序号区间对应的矩形（同一行的单词合并为一个矩形）"""
+        rects = []
+        for i in range(start, end + 1):
+            rect = self.word_rect(i)
+            if rects and abs(rect.y0 - rects[-1].y0) < rect.height * 0.5:
+                rects[-1] |= rect
+            else:
+                rects.append(rect)
+        return rects
+
+    def find_rects(self, text):
+        """精确查找单词或词组在页面中的所有矩形"""
+        rects = []
+        for start, end in self.lookup(text):
+            rects.extend(self.span_rects(start, end))
+        return rects
+
+    def find_stem_rects(self, text):
+        """查找单词或词组所有屈折形式在页面中的矩形（按页面顺序）"""
+        rects = []
+        for start, end in sorted(self.lookup_stem(text)):
+            rects.extend(self.span_rects(start, end))
+        return rects
+
+    def words_in_rect(self, rect):
+        """与矩形相交的单词序号范围 (起始, 结束)，没有单词时返回 None"""
+        if not len(self.rects):
+            return None
+        r = self.rects
+        hits = np.nonzero(
+            (r[:, 2] > rect.x0) & (r[:, 0] < rect.x1) & (r[:, 3] > rect.y0) & (r[:, 1] < rect.y1)
+        )[0]
+        if not hits.size:
+            return None
+        return int(hits[0]), int(hits[-1])
+
+    def merged_window(self, word_range, margin=0):
+        """单词序号范围对应的合并序列窗口 [lo, hi)，两侧各扩展 margin 个单词"""
+        start, end = word_range
+        lo = int(np.searchsorted(self.merged_spans[:, 1], start, side='left'))
+        hi = int(np.searchsorted(self.merged_spans[:, 0], end, side='right'))
+        return max(0, lo - margin), min(len(self.merged), max(lo, hi) + margin)
+
+    def textpage(self, flags):
+        """按提取参数缓存TextPage（单词、搜索、框选的默认参数不同）"""
+        tp = self._textpages.get(flags)
+        if tp is None:
+            tp = self.page.get_textpage(flags=flags)
+            self._textpages[flags] = tp
+        return tp
+
+    def word_rect(self, i):
+        return fitz.Rect(self.words[i][:4])
+
+    def search_for(self, text):
+        """等同于 page.search_for(text)"""
+        return self.page.search_for(text, textpage=self.textpage(fitz.TEXTFLAGS_SEARCH))
+
+    def get_textbox(self, rect):
+        """等同于 page.get_textbox(rect)"""
+        return self.page.get_textbox(rect, textpage=self.textpage(0))
+
+    def is_valid(self, doc):
+        return self.doc is doc and not doc.is_closed
+
+
+_indexes = OrderedDict()  # {(id(doc), page_number): PageTextIndex}
+_lock = threading.Lock()
+
+
+def get_page_index(page):
+    """获取页面文本索引（LRU缓存，首次访问时构建）"""
+    doc = page.parent
+    key = (id(doc), page.number)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None and index.is_valid(doc):
+            _indexes.move_to_end(key)
+            return index
+
+    index = PageTextIndex(page)
+    with _lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_CACHED_PAGES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def clear_text_index(doc=None):
+    """清除文本索引缓存（关闭或切换文档时调用）"""
+    with _lock:
+        if doc is None:
+            _indexes.clear()
+            return
+        for key in [k for k, v in _indexes.items() if v.doc is doc]:
+            del _indexes[key]
@@ -3,11 +3,20 @@ import requests
 import os
 import re  # 添加缺失的导入
 import fitz
-import numpy as np
 import unicodedata
-from math import exp
+import math
+import time
+from collections import deque
 from PyQt5 import QtWidgets
-from utils import clean_text, calculate_word_similarity
+from utils import clean_text, clean_word, word_similarities
+from request_log import log_request, load_records, request_logger
+from transport import get_transport
+from text_index import get_page_index
+from fuzzy_index import get_fuzzy_index
+from alignment import (
+    GAP_PENALTY, similarity_matrix, page_spatial_scores, score_matrix, smith_waterman,
+    anchor_window, SimilarityTable
+)
 
 def load_ai_config():
     """从ai.cfg加载API配置"""
@@ -28,385 +37,536 @@ def load_ai_config():
             "API_URL": "https://api.siliconflow.cn/v1/chat/completions",
             "API_KEY": "sk-lrqadizsgudymkesgkcfzaxlyqdjmdogmrewslzbxoqxaotm",
             "MODEL_NAME": "deepseek-ai/DeepSeek-V3",
-            "REQUEST_TIMEOUT": 60
+            "REQUEST_TIMEOUT": 60,
+            "MAX_CONCURRENCY": 4,
+            "RATE_LIMIT_RPM": 0,
+            "MAX_RETRIES": 2,
+            "REQUEST_LOG": True,
+            "TRANSPORT_MODE": "live",
+            "TRANSPORT_FILE": "recordings/requests.jsonl",
+            "REPLAY_LATENCY_SCALE": 1.0
         }
-def translate_sentences(text, parent=None):
-    """翻译整段文本并分句 - 使用固定prompt"""
-    config = load_ai_config()
+
+# 固定句子翻译prompt
+SENTENCE_PROMPT = (
+    "你是一名英语专家，请将以下英文文本按句子分割，并逐句翻译成中文。"
+    "返回一个JSON数组，数组的每个元素是一个对象，包含两个字段：\"original\"和\"translation\"。"
+    "不要返回其他任何内容。文本如下：\n"
+)
+
+# 每个分块的最大字符数
+MAX_CHUNK_LENGTH = 1000
+
+# 最近请求的耗时记录，用于任务预估
+LATENCY_HISTORY = deque(maxlen=200)
+
+# 遇到这些状态码时重试
+RETRY_STATUS = (429, 500, 502, 503, 504)
+RETRY_BACKOFF = 1.0  # 秒，每次重试翻倍
+
+def build_word_prompt(config):
+    """根据用户设置的提取条件组合生词提取prompt"""
+    # 获取用户设置的提取条件，如果没有则使用默认值
+    word_prompt = config.get("WORD_PROMPT", "初中水平以上的生词、难词、专业用词、冷门词组和重点词")
+    return (
+        f"你是一名英语专家，请根据下面提供的文本，找出所有{word_prompt}。"
+        "按照词组/单词：翻译的格式返回 JSON {word:translation}，禁止返回其他任何文本：\n"
+    )
+
+def build_prompt(task_type, config):
+    """获取任务类型对应的prompt"""
+    return SENTENCE_PROMPT if task_type == "sentences" else build_word_prompt(config)
+
+def estimate_tokens(text):
+    """粗略估算文本的token数：英文约4字符1个token，中日韩字符约1字1个token"""
+    if not text:
+        return 0
+    cjk = sum(1 for c in text if '\u2e80' <= c <= '\u9fff' or '\uf900' <= c <= '\ufaff')
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+def split_text(text, max_length=MAX_CHUNK_LENGTH):
+    """智能拆分长文本（TranslationWorker与任务预估共用）"""
+    # 按句子拆分
+    sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s', text)
+    
+    chunks = []
+    current_chunk = []
+    current_length = 0
+    
+    for sentence in sentences:
+        if current_length + len(sentence) > max_length and current_chunk:
+            chunks.append(" ".join(current_chunk))
+            current_chunk = [sentence]
+            current_length = len(sentence)
+        else:
+            current_chunk.append(sentence)
+            current_length += len(sentence)
+    
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+    
+    return chunks
+
+def record_latency(task_type, input_tokens, output_tokens, latency):
+    """记录一次请求的token数和耗时"""
+    LATENCY_HISTORY.append({
+        "task_type": task_type,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "latency": latency
+    })
+
+def load_latency_history(paths=None):
+    """启动时从请求日志载入最近的请求耗时，返回载入的条数
+
+    只使用一次成功、没有重试的实时请求（重试等待和回放耗时不代表接口速度）
+    """
+    samples = []
+    # 从最新的日志文件往前读，够用即停
+    for path in reversed(paths or request_logger.files()):
+        try:
+            records = load_records([path])
+        except OSError as e:
+            print(f"读取请求日志失败: {str(e)}")
+            continue
+        usable = [
+            r for r in records
+            if r.get("ok") and not r.get("retries")
+            and r.get("transport", "live") == "live"
+            and r.get("task_type") and r.get("total_ms") is not None
+            and r.get("input_tokens") is not None and r.get("output_tokens") is not None
+        ]
+        samples = usable + samples
+        if len(samples) >= LATENCY_HISTORY.maxlen:
+            break
+
+    samples = samples[-LATENCY_HISTORY.maxlen:]
+    for r in samples:
+        record_latency(r["task_type"], r["input_tokens"], r["output_tokens"], r["total_ms"] / 1000)
+    return len(samples)
+
+def new_request_record(task_type, text, config, queue_wait=0.0):
+    """创建一条请求日志记录"""
+    return {
+        "endpoint": config["API_URL"],
+        "model": config["MODEL_NAME"],
+        "task_type": task_type,
+        "chunk_chars": len(text),
+        "input_tokens": None,
+        "output_tokens": None,
+        "queue_wait_ms": round(queue_wait * 1000, 1),
+        "connect_ms": None,
+        "ttfb_ms": None,
+        "total_ms": None,
+        "retries": 0,
+        "status": None,
+        "ok": False,
+        "parse_ok": False,
+        "error": None,
+        "transport": config.get("TRANSPORT_MODE", "live")
+    }
+
+def _retry_delay(response, attempt):
+    """计算重试等待时间，优先使用Retry-After"""
+    if response is not None:
+        try:
+            return float(response.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            pass
+    return RETRY_BACKOFF * (2 ** attempt)
+
+def request_completion(task_type, text, config, record=None):
+    """发送一次对话请求并返回模型输出文本
+
+    record: 请求日志记录，请求过程中填入耗时、token用量、重试次数等
+    """
+    record = record if record is not None else new_request_record(task_type, text, config)
     headers = {
         "Authorization": f"Bearer {config['API_KEY']}",
         "Content-Type": "application/json"
     }
-    
-    # 清理文本
-    cleaned_text = clean_text(text)
-    
-    # 固定句子翻译prompt
-    fixed_sentence_prompt = (
-        "你是一名英语专家，请将以下英文文本按句子分割，并逐句翻译成中文。"
-        "返回一个JSON数组，数组的每个元素是一个对象，包含两个字段：\"original\"和\"translation\"。"
-        "不要返回其他任何内容。文本如下：\n"
-    )
-    
+    content = build_prompt(task_type, config) + text
     payload = {
         "model": config["MODEL_NAME"],
         "messages": [{
             "role": "user",
-            "content": fixed_sentence_prompt + cleaned_text
+            "content": content
         }]
     }
     
+    start = time.time()
+    transport = get_transport(config)
+    max_retries = max(0, int(config.get("MAX_RETRIES", 2)))
+    attempt = 0
+    while True:
+        attempt_start = time.time()
+        response = None
+        try:
+            response, connect_ms = transport.post(
+                config["API_URL"],
+                payload,
+                headers,
+                config["REQUEST_TIMEOUT"]
+            )
+            # elapsed为发送请求到收到响应头的时间
+            record["ttfb_ms"] = round(response.elapsed.total_seconds() * 1000, 1)
+            record["connect_ms"] = round(connect_ms, 1)
+            record["status"] = response.status_code
+            response.raise_for_status()
+            data = response.json()
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            retryable = response is None or response.status_code in RETRY_STATUS
+            if not retryable or attempt >= max_retries:
+                record["error"] = str(e)
+                record["total_ms"] = round((time.time() - start) * 1000, 1)
+                raise
+            delay = _retry_delay(response, attempt)
+            print(f"请求失败，{delay:.1f}秒后重试: {str(e)}")
+            attempt += 1
+            record["retries"] = attempt
+        finally:
+            # 响应体已读完或不再需要，先归还连接再等待重试
+            if response is not None:
+                response.close()
+        time.sleep(delay)
+    
+    cont = data["choices"][0]["message"]["content"]
+    
+    # 优先使用接口返回的token用量
+    usage = data.get("usage") or {}
+    input_tokens = usage.get("prompt_tokens") or estimate_tokens(content)
+    output_tokens = usage.get("completion_tokens") or estimate_tokens(cont)
+    record_latency(task_type, input_tokens, output_tokens, time.time() - attempt_start)
+    record.update(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        total_ms=round((time.time() - start) * 1000, 1),
+        ok=True
+    )
+    return cont
+
+def translate_sentences(text, parent=None, queue_wait=0.0, raise_errors=False):
+    """翻译整段文本并分句 - 使用固定prompt
+
+    raise_errors 为True时请求或解析失败直接抛出异常（批量翻译据此不记录断点），否则返回空列表
+    """
+    config = load_ai_config()
+    
+    # 清理文本
+    cleaned_text = clean_text(text)
+    record = new_request_record("sentences", cleaned_text, config, queue_wait)
+    
     try:
-        r = requests.post(
-            config["API_URL"],
-            json=payload,
-            headers=headers,
-            timeout=config["REQUEST_TIMEOUT"]
-        )
-        r.raise_for_status()
-        cont = r.json()["choices"][0]["message"]["content"]
+        cont = request_completion("sentences", cleaned_text, config, record)
         
         # 解析JSON数组
         start = cont.find("[")
         end = cont.rfind("]") + 1
         if start == -1 or end == 0:
             raise ValueError("Response does not contain a valid JSON array")
-        return json.loads(cont[start:end])
+        result = json.loads(cont[start:end])
+        record["parse_ok"] = True
+        return result
     except Exception as e:
+        record["error"] = str(e)
+        if raise_errors:
+            raise
         if parent:
             QtWidgets.QMessageBox.warning(parent, "Translation Error", str(e))
         return []
+    finally:
+        if config.get("REQUEST_LOG", True):
+            log_request(record)
 
-def extract_and_translate_words(text, parent=None):
-    """提取并翻译生词 - 使用用户设置的提取条件"""
+def extract_and_translate_words(text, parent=None, queue_wait=0.0, raise_errors=False):
+    """提取并翻译生词 - 使用用户设置的提取条件
+
+    raise_errors 同 translate_sentences
+    """
     config = load_ai_config()
-    headers = {
-        "Authorization": f"Bearer {config['API_KEY']}",
-        "Content-Type": "application/json"
-    }
     
     # 清理文本
     cleaned_text = clean_text(text)
-    
-    # 获取用户设置的提取条件，如果没有则使用默认值
-    word_prompt = config.get("WORD_PROMPT", "初中水平以上的生词、难词、专业用词、冷门词组和重点词")
-    
-    # 组合完整的prompt
-    full_word_prompt = (
-        f"你是一名英语专家，请根据下面提供的文本，找出所有{word_prompt}。"
-        "按照词组/单词：翻译的格式返回 JSON {word:translation}，禁止返回其他任何文本：\n"
-    )
-    
-    payload = {
-        "model": config["MODEL_NAME"],
-        "messages": [{
-            "role": "user",
-            "content": full_word_prompt + cleaned_text
-        }]
-    }
+    record = new_request_record("words", cleaned_text, config, queue_wait)
     
     try:
-        r = requests.post(
-            config["API_URL"],
-            json=payload,
-            headers=headers,
-            timeout=config["REQUEST_TIMEOUT"]
-        )
-        r.raise_for_status()
-        cont = r.json()["choices"][0]["message"]["content"]
+        cont = request_completion("words", cleaned_text, config, record)
         json_start = cont.find("{")
         json_end = cont.rfind("}") + 1
-        return json.loads(cont[json_start:json_end])
+        result = json.loads(cont[json_start:json_end])
+        record["parse_ok"] = True
+        return result
     except Exception as e:
+        record["error"] = str(e)
+        if raise_errors:
+            raise
         if parent:
             QtWidgets.QMessageBox.warning(parent, "Translation Error", str(e))
         return {}
+    finally:
+        if config.get("REQUEST_LOG", True):
+            log_request(record)
     
-def clean_word(w):
-    """
-    清理单词：移除非字母数字字符，保留连字符、撇号和基本标点，
-    同时规范化Unicode字符，特别优化跨行单词处理
-    """
-    # 规范化Unicode：将特殊字符转换为基础形式
-    w = unicodedata.normalize('NFKD', w).encode('ascii', 'ignore').decode('ascii')
-    
-    # 特殊处理跨行连字符情况
-    # 如果单词以连字符开头（可能是跨行单词的第二部分）
-    if w.startswith(('-', '‐', '‑', '–', '—')) and len(w) > 1:
-        w = w[1:]  # 移除开头的连字符
-    
-    # 保留字母、数字、连字符、撇号和基本标点
-    # 注意：保留多种连字符类型以便后续处理
-    cleaned = ''.join(
-        c for c in w 
-        if c.isalnum() or c in ['-', '‐', '‑', '–', '—', "'", '.', ',', ';', ':', '!', '?']
-    ).lower()
-    
-    # 处理常见的OCR错误
-    # 移除结尾的连字符（跨行单词的第一部分）
-    if cleaned.endswith(('-', '‐', '‑', '–', '—')):
-        cleaned = cleaned[:-1]
-    
-    # 统一各种连字符为普通连字符
-    cleaned = cleaned.replace('‐', '-').replace('‑', '-').replace('–', '-').replace('—', '-')
-    
-    # 处理常见缩写
-    if cleaned == "dont": cleaned = "don't"
-    elif cleaned == "cant": cleaned = "can't"
-    elif cleaned == "wont": cleaned = "won't"
-    elif cleaned == "isnt": cleaned = "isn't"
-    elif cleaned == "wasnt": cleaned = "wasn't"
-    elif cleaned == "doesnt": cleaned = "doesn't"
-    elif cleaned == "couldnt": cleaned = "couldn't"
-    elif cleaned == "shouldnt": cleaned = "shouldn't"
-    elif cleaned == "wouldnt": cleaned = "wouldn't"
-    elif cleaned == "arent": cleaned = "aren't"
-    elif cleaned == "havent": cleaned = "haven't"
-    
-    # 特殊处理跨行单词的常见情况
-    # 如果单词以连字符结尾（跨行单词的第一部分）
-    if cleaned.endswith('-') and len(cleaned) > 1:
-        # 保留单词主体部分（去除连字符）
-        cleaned = cleaned[:-1]
-    
-    return cleaned
 def find_word_in_page(page, word):
     """查找单词在页面中的位置，处理被拆分的单词 - 改进版"""
-    # 清理目标单词
-    target_word = clean_word(word)
-    
-    # 获取页面所有单词及其位置
-    page_words = page.get_text("words")
-    if not page_words:
-        return []
-    
-    # 创建页面单词列表，合并被连字符拆分的单词
-    cleaned_page_words = []
-    i = 0
-    while i < len(page_words):
-        text = page_words[i][4]
-        rect = fitz.Rect(page_words[i][:4])
-        
-        # 检查当前单词是否以连字符结尾 - 新增：支持多种连字符类型
-        if i < len(page_words) - 1:
-            next_text = page_words[i+1][4]
-            
-            # 检查连字符情况（包括软连字符和普通连字符）
-            has_hyphen = (
-                text.endswith('-') or 
-                text.endswith('‐') or  # U+2010 连字符
-                text.endswith('‑') or  # U+2011 不间断连字符
-                text.endswith('–') or  # U+2013 短破折号
-                text.endswith('—')     # U+2014 长破折号
-            )
-            
-            # 改进：检查下一个单词是否以当前单词结尾开始
-            if has_hyphen and next_text:
-                # 尝试合并单词
-                base_word = text.rstrip('‐‑–—')  # 移除所有类型的连字符
-                
-                # 检查合并后的单词是否更接近目标单词
-                merged_word = base_word + next_text
-                merged_cleaned = clean_word(merged_word)
-                
-                # 计算相似度
-                original_sim = calculate_word_similarity(target_word, clean_word(text))
-                merged_sim = calculate_word_similarity(target_word, merged_cleaned)
-                
-                # 如果合并后相似度更高，则合并单词
-                if merged_sim > original_sim and merged_sim > 0.7:
-                    # 合并单词
-                    text = merged_word
-                    # 合并矩形
-                    rect = rect | fitz.Rect(page_words[i+1][:4])
-                    # 跳过下一个单词
-                    i += 1
-        
-        # 清理单词（移除非字母数字字符并转为小写）
-        cleaned = clean_word(text)
-        if cleaned:  # 跳过空单词
-            cleaned_page_words.append({
-                "text": text,
-                "cleaned": cleaned,
-                "rect": rect
-            })
-        i += 1
+    return find_words_in_page(page, [word])[word]
+
+def find_words_in_page(page, words):
+    """批量查找多个单词，返回 {单词: 矩形列表}
+
+    页面索引和模糊匹配索引只取一次；没有精确匹配的单词由BK树给出候选单词，
+    再一次算出目标单词与全部候选的相似度。清理后相同的单词只匹配一次。
+    """
+    # 使用缓存的页面文本索引，避免每次重新提取
+    index = get_page_index(page)
+    if not index.words:
+        return {word: [] for word in words}
+    
+    # 模糊匹配索引：只需检查相似度可能超过阈值的候选单词
+    fuzzy = get_fuzzy_index(index)
+    
+    results = {}
+    matched = {}  # {清理后的单词: 矩形列表}
+    for word in words:
+        target_word = clean_word(word)
+        if target_word not in matched:
+            matched[target_word] = _match_word(index, fuzzy, target_word)
+        results[word] = list(matched[target_word])
+    return results
+
+def _match_word(index, fuzzy, target_word):
+    """在页面中匹配清理后的目标单词：先精确匹配，没有时按页面顺序取第一个最高分的模糊匹配"""
+    def occurrences(tokens):
+        """页面单词（含跨行连字符合并后的整词）中为给定单词之一的位置 [(区间, 单词)]，
+        按页面顺序排列，同一起点的整词排在拆开的前半之前"""
+        found = [(span, token) for token in tokens for span in fuzzy.spans.get(token, ())]
+        return sorted(found, key=lambda item: (item[0][0], -item[0][1]))
     
     # 查找匹配的单词
-    matches = []
-    for page_word in cleaned_page_words:
-        if page_word["cleaned"] == target_word:
-            matches.append(page_word["rect"])
+    matches = [index.span_rect(*span) for span, _ in occurrences({target_word})]
     
-    # 改进：如果没有找到精确匹配，尝试模糊匹配
+    # 改进：如果没有找到精确匹配，尝试模糊匹配（按页面顺序取第一个最高分）
     if not matches:
+        tokens = list(fuzzy.candidates(target_word))
+        sims = dict(zip(tokens, word_similarities(target_word, tokens)))
         best_sim = 0
         best_match = None
-        for page_word in cleaned_page_words:
-            sim = calculate_word_similarity(target_word, page_word["cleaned"])
+        for span, token in occurrences(tokens):
+            sim = sims[token]
             if sim > best_sim and sim > 0.8:  # 相似度阈值设为80%
                 best_sim = sim
-                best_match = page_word["rect"]
+                best_match = span
         
-        if best_match:
-            matches.append(best_match)
+        if best_match is not None:
+            matches.append(index.span_rect(*best_match))
     
     return matches
 
+def locate_words(page, words):
+    """批量查找多个单词在页面中的位置，返回 {单词: 矩形列表}
+
+    依次尝试：倒排索引精确查找 → 标准搜索 → 词干索引 → 拆分单词和模糊匹配，
+    只有未命中的单词才进入后续阶段。不依赖界面对象，可在工作线程中调用。
+    """
+    index = get_page_index(page)
+    
+    # 在倒排索引中精确查找
+    results = {word: index.find_rects(word) for word in words}
+    pending = [word for word in words if not results[word]]
+    
+    # 标准搜索
+    for word in pending:
+        results[word] = index.search_for(word)
+    pending = [word for word in pending if not results[word]]
+    
+    # 词干索引
+    for word in pending:
+        results[word] = index.find_stem_rects(word)
+    pending = [word for word in pending if not results[word]]
+    
+    # 处理被拆分的单词和模糊匹配
+    if pending:
+        results.update(find_words_in_page(page, pending))
+    
+    return results
+
+# 按选区定位句子时，选区两侧额外包含的单词数
+SELECTION_MARGIN = 10
+
+# 为True时输出句子定位的详细过程（对齐窗口、回溯路径等）
+LOCATE_DEBUG = False
+
+def debug(*args):
+    """输出定位过程的调试信息（LOCATE_DEBUG 为True时）"""
+    if LOCATE_DEBUG:
+        print(*args)
+
 def find_sentence_in_page(page, sentence_text):
-    """使用动态规划的局部序列对齐算法定位句子"""
-    print(f"\n===== 开始查找句子: '{sentence_text}' =====")
+    """定位句子：原文与页面文本一致时按字符偏移直接取出，否则使用动态规划的局部序列对齐算法"""
+    index = get_page_index(page)
+    span = index.find_span(sentence_text)
+    if span is not None:
+        return index.span_word_rects(*span)
+    path, _ = align_sentence(page, sentence_text)
+    return path
+
+def find_sentences_in_page(page, sentence_texts, word_range=None):
+    """批量定位同一段文本中连续的多个句子，返回与输入顺序对应的矩形列表
+
+    句子原文与页面文本一致时，从上一句结束的字符偏移处直接查找并取出单词矩形，不做对齐；
+    模型改动了原文的句子才回退到模糊对齐：先在上一句结束位置之后的窗口内对齐，
+    再按锚点窗口/整页定位。
+    word_range 为框选覆盖的页面单词序号范围，给出时只在选区（及少量边距）内定位。
+    """
+    sentence_tokens = [
+        [clean_word(word) for word in ' '.join(text.split()).split()] for text in sentence_texts
+    ]
+    index = get_page_index(page)
+    region = index.merged_window(word_range, SELECTION_MARGIN) if word_range and index.merged else None
+    limit = region[1] if region else len(index.merged)
+    if word_range:
+        char_lo, char_hi = index.char_range(word_range, SELECTION_MARGIN)
+    else:
+        char_lo, char_hi = 0, len(index.char_stream)
+    
+    results = []
+    cursor = None          # 合并序列中下一句的预期起始位置
+    char_cursor = char_lo  # 下一句的字符偏移查找起点
+    table = None
+    for k, sentence_text in enumerate(sentence_texts):
+        # 原文未被改动：按字符偏移直接取出
+        span = index.find_span(sentence_text, char_cursor, char_hi)
+        if span is not None:
+            start, end = span
+            results.append(index.span_word_rects(start, end))
+            char_cursor = int(index.char_starts[end + 1])
+            cursor = index.merged_position(end + 1)
+            continue
+        
+        if cursor is not None and table is None:
+            # 需要对齐的句子都在续接位置之后：一次算出剩余句子的相似度
+            remaining = [t for tokens in sentence_tokens[k:] for t in tokens]
+            hi = min(limit, cursor + 2 * len(remaining))
+            if remaining and cursor < hi:
+                table = SimilarityTable(remaining, index.merged_cleaned, cursor, hi)
+        
+        path, end = align_sentence(page, sentence_text, cursor, table, region)
+        if path:
+            cursor = end + 1
+            char_cursor = max(char_cursor, int(index.char_starts[index.merged[end]["end"] + 1]))
+        results.append(path)
+    return results
+
+def align_sentence(page, sentence_text, cursor=None, table=None, region=None):
+    """定位句子，返回 (单词矩形列表, 匹配结束位置)
+
+    cursor 为预期的起始位置（合并序列中的页面单词序号），优先在其后的窗口内对齐；
+    table 为批量定位时预先算好的相似度表（SimilarityTable）；
+    region 为选区对应的窗口 [lo, hi)，优先在选区内对齐，选区内得分不足时才扩大到整页。
+    """
+    debug(f"\n===== 开始查找句子: '{sentence_text}' =====")
     
     # 清理句子文本
     cleaned_sentence = ' '.join(sentence_text.split())
     sent_tokens = [clean_word(word) for word in cleaned_sentence.split()]
     
-    print(f"清理后句子: '{cleaned_sentence}'")
-    print(f"句子分词: {sent_tokens}")
+    debug(f"清理后句子: '{cleaned_sentence}'")
+    debug(f"句子分词: {sent_tokens}")
     
     if not sent_tokens:
-        print("错误: 句子分词后为空")
-        return []
+        debug("错误: 句子分词后为空")
+        return [], None
     
-    # 获取页面所有单词及其位置
-    page_words = page.get_text("words")
+    # 使用缓存的页面文本索引（已合并跨行连字符单词）
+    index = get_page_index(page)
     
-    if not page_words:
-        print("错误: 页面无单词")
-        return []
+    if not index.words:
+        debug("错误: 页面无单词")
+        return [], None
     
-    # 增强的跨行单词合并逻辑
-    cleaned_page_words = []
-    i = 0
-    while i < len(page_words):
-        text = page_words[i][4]
-        rect = fitz.Rect(page_words[i][:4])
-        
-        # 检查连字符情况（支持多种连字符类型）
-        has_hyphen = (
-            text.endswith('-') or 
-            text.endswith('‐') or  # U+2010 连字符
-            text.endswith('‑') or  # U+2011 不间断连字符
-            text.endswith('–') or  # U+2013 短破折号
-            text.endswith('—')     # U+2014 长破折号
-        )
-        
-        # 检查下一个单词是否是当前单词的续接
-        if i < len(page_words) - 1 and has_hyphen:
-            next_text = page_words[i+1][4]
-            
-            # 合并单词（去掉连字符）
-            merged_text = text.rstrip('‐‑–—') + next_text
-            
-            # 创建合并后的单词对象
-            merged_rect = rect | fitz.Rect(page_words[i+1][:4])
-            merged_word = {
-                "text": merged_text,
-                "cleaned": clean_word(merged_text),
-                "rect": merged_rect
-            }
-            
-            # 添加合并后的单词
-            cleaned_page_words.append(merged_word)
-            # 跳过下一个单词
-            i += 2
-            continue
-        
-        # 处理普通单词
-        cleaned = clean_word(text)
-        if cleaned:  # 跳过空单词
-            cleaned_page_words.append({
-                "text": text,
-                "cleaned": cleaned,
-                "rect": rect
-            })
-        i += 1
+    cleaned_page_words = index.merged
     
     # 如果页面中没有单词，直接返回
     if not cleaned_page_words:
-        print("错误: 清理后页面无单词")
-        return []
+        debug("错误: 清理后页面无单词")
+        return [], None
     
     # 打印页面单词信息
-    print(f"页面单词数量: {len(cleaned_page_words)}")
-    print("前10个页面单词:")
-    for i, word in enumerate(cleaned_page_words[:10]):
-        print(f"  {i+1}. {word['text']} ({word['cleaned']}) - {word['rect']}")
+    if LOCATE_DEBUG:
+        print(f"页面单词数量: {len(cleaned_page_words)}")
+        print("前10个页面单词:")
+        for i, word in enumerate(cleaned_page_words[:10]):
+            print(f"  {i+1}. {word['text']} ({word['cleaned']}) - {word['rect']}")
     
     # 计算平均单词宽度和高度（用于空间评分）
-    avg_width = sum(r['rect'].width for r in cleaned_page_words) / len(cleaned_page_words)
-    avg_height = sum(r['rect'].height for r in cleaned_page_words) / len(cleaned_page_words)
+    avg_width = index.avg_width
+    avg_height = index.avg_height
     
     # 初始化动态规划矩阵
     m = len(sent_tokens)  # 句子中的单词数
     n = len(cleaned_page_words)  # 页面中的单词数
-    H = np.zeros((m+1, n+1))  # 得分矩阵
-    gap_penalty = 0.5  # 跳词惩罚
-    
-    # 填充动态规划矩阵
-    best_score = 0
-    best_position = (0, 0)
+    gap_penalty = GAP_PENALTY  # 跳词惩罚
     
-    print(f"\n开始动态规划匹配 (句子长度: {m}, 页面单词数: {n})")
+    debug(f"\n开始动态规划匹配 (句子长度: {m}, 页面单词数: {n})")
     
-    for i in range(1, m+1):
-        for j in range(1, n+1):
-            # 计算文本相似度
-            token_sim = calculate_word_similarity(sent_tokens[i-1], cleaned_page_words[j-1]['cleaned'])
-            
-            # 计算空间相似度（如果可能）
-            spatial_score = 1.0
-            if i > 1 and j > 1:
-                # 获取前一个匹配的位置
-                prev_rect = cleaned_page_words[j-2]['rect']
-                current_rect = cleaned_page_words[j-1]['rect']
-                
-                # 计算距离
-                dx = abs(current_rect.x0 - prev_rect.x1)
-                dy = abs(current_rect.y0 - prev_rect.y0)
-                
-                # 计算空间得分
-                spatial_score = exp(-((dx/avg_width)**2 + (dy/avg_height)**2))
-            
-            # 综合得分（文本相似度占80%，空间相似度占20%）
-            total_score = 0.8 * token_sim + 0.2 * spatial_score
-            
-            # 计算各种操作得分
-            match_score = H[i-1, j-1] + total_score
-            delete_score = H[i-1, j] - gap_penalty
-            insert_score = H[i, j-1] - gap_penalty
-            
-            # 选择最佳得分
-            H[i, j] = max(0, match_score, delete_score, insert_score)
-            
-            # 更新最佳位置
-            if H[i, j] > best_score:
-                best_score = H[i, j]
-                best_position = (i, j)
+    # 最低得分要求
+    min_score = m * 0.5
+    spatial = page_spatial_scores(index)
     
-    print(f"最佳得分: {best_score:.2f}, 位置: {best_position}")
+    def align(lo, hi):
+        """在页面单词窗口 [lo, hi) 内批量计算相似度并逐行向量化填充得分矩阵"""
+        if table is not None and table.covers(sent_tokens, lo, hi):
+            similarity = table.matrix(sent_tokens, lo, hi)
+        else:
+            similarity = similarity_matrix(sent_tokens, index.merged_cleaned[lo:hi])
+        scores = score_matrix(similarity, spatial[lo:hi + 1])
+        return (similarity,) + smith_waterman(scores, gap_penalty)
+    
+    def candidate_windows():
+        # 续接窗口：从上一句结束处开始，有效对齐最多跳过 m 个页面单词
+        limit = region[1] if region else n
+        if cursor is not None and cursor < limit:
+            yield "续接", cursor, min(limit, cursor + 2 * m)
+        # 选区窗口
+        if region:
+            yield ("选区",) + tuple(region)
+        # 锚点窗口：罕见单词/词组锚点附近
+        window = anchor_window(sent_tokens, index)
+        if window is not None:
+            yield ("锚点",) + window
+        yield "整页", 0, n
+    
+    # 依次在候选窗口内对齐，得分达到要求即停止
+    for name, lo, hi in candidate_windows():
+        similarity, H, best_score, best_position = align(lo, hi)
+        debug(f"{name}窗口: 页面单词 {lo}-{hi}, 得分: {best_score:.2f}")
+        if best_score >= min_score:
+            break
+    window_words = cleaned_page_words[lo:hi]
+    
+    debug(f"最佳得分: {best_score:.2f}, 位置: {best_position}")
     
     # 如果最佳得分太低，认为没有找到匹配
-    min_score = m * 0.5
     if best_score < min_score:
-        print(f"未找到足够匹配的句子 (最低要求: {min_score:.2f}, 实际: {best_score:.2f})")
-        return []
+        debug(f"未找到足够匹配的句子 (最低要求: {min_score:.2f}, 实际: {best_score:.2f})")
+        return [], None
     
     # 回溯找到最佳匹配路径
     i, j = best_position
     path = []
-    print("\n回溯路径:")
+    debug("\n回溯路径:")
 
     while i > 0 and j > 0 and H[i, j] > 0:
-        # 计算文本相似度用于回溯
-        token_sim = calculate_word_similarity(sent_tokens[i-1], cleaned_page_words[j-1]['cleaned'])
+        # 文本相似度用于回溯
+        token_sim = similarity[i-1, j-1]
         
         # 优先考虑匹配操作
         if H[i, j] == H[i-1, j-1] + token_sim:
             # 匹配操作
-            match_word = cleaned_page_words[j-1]
-            print(f"  匹配: {sent_tokens[i-1]} -> {match_word['cleaned']} (相似度: {token_sim:.2f})")
-            path.append(match_word['rect'])
+            match_word = window_words[j-1]
+            debug(f"  匹配: {sent_tokens[i-1]} -> {match_word['cleaned']} (相似度: {token_sim:.2f})")
+            path.append(fitz.Rect(match_word['rect']))
             i -= 1
             j -= 1
         
@@ -415,14 +575,14 @@ def find_sentence_in_page(page, sentence_text):
             # 检查是否可能来自上方（删除句子单词）
             if H[i, j] == H[i-1, j] - gap_penalty:
                 # 删除操作（跳过句子中的单词）
-                print(f"  删除句子单词: {sent_tokens[i-1]}")
+                debug(f"  删除句子单词: {sent_tokens[i-1]}")
                 i -= 1
             
             # 检查是否可能来自左侧（插入页面单词）
             elif H[i, j] == H[i, j-1] - gap_penalty:
                 # 插入操作（跳过页面中的单词）
-                skip_word = cleaned_page_words[j-1]
-                print(f"  跳过页面单词: {skip_word['text']} ({skip_word['cleaned']})")
+                skip_word = window_words[j-1]
+                debug(f"  跳过页面单词: {skip_word['text']} ({skip_word['cleaned']})")
                 j -= 1
             
             # 当以上都不满足时，寻找最接近的路径
@@ -437,27 +597,28 @@ def find_sentence_in_page(page, sentence_text):
                 
                 if min_diff == match_diff:
                     # 匹配操作
-                    match_word = cleaned_page_words[j-1]
-                    print(f"  强制匹配: {sent_tokens[i-1]} -> {match_word['cleaned']} (相似度: {token_sim:.2f})")
-                    path.append(match_word['rect'])
+                    match_word = window_words[j-1]
+                    debug(f"  强制匹配: {sent_tokens[i-1]} -> {match_word['cleaned']} (相似度: {token_sim:.2f})")
+                    path.append(fitz.Rect(match_word['rect']))
                     i -= 1
                     j -= 1
                 elif min_diff == delete_diff:
                     # 删除操作（跳过句子中的单词）
-                    print(f"  强制删除句子单词: {sent_tokens[i-1]}")
+                    debug(f"  强制删除句子单词: {sent_tokens[i-1]}")
                     i -= 1
                 else:
                     # 插入操作（跳过页面中的单词）
-                    skip_word = cleaned_page_words[j-1]
-                    print(f"  强制跳过页面单词: {skip_word['text']} ({skip_word['cleaned']})")
+                    skip_word = window_words[j-1]
+                    debug(f"  强制跳过页面单词: {skip_word['text']} ({skip_word['cleaned']})")
                     j -= 1
     
     # 反转路径以获得正确顺序
     path.reverse()
     
     # 直接返回所有匹配的单词矩形（不再分组合并）
-    print(f"\n找到 {len(path)} 个匹配单词矩形:")
-    for i, rect in enumerate(path):
-        print(f"  {i+1}. {rect}")
+    if LOCATE_DEBUG:
+        print(f"\n找到 {len(path)} 个匹配单词矩形:")
+        for i, rect in enumerate(path):
+            print(f"  {i+1}. {rect}")
     
-    return path  # 直接返回单词矩形列表
+    return path, lo + best_position[1] - 1  # 单词矩形列表及最后一个匹配单词的位置
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# 默认录制文件：程序目录下的 recordings/requests.jsonl
+RECORD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings')
+RECORD_PATH = os.path.join(RECORD_DIR, 'requests.jsonl')
+
+# 记录当前线程最近一次建立连接的耗时
+_timing = threading.local()
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _timing.connect_ms = (time.perf_counter() - start) * 1000
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _timing.connect_ms = (time.perf_counter() - start) * 1000
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """记录建立连接耗时的HTTP适配器（复用连接时耗时为0）"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool
+        }
+
+# 所有请求共用一个会话，保持连接复用
+_session = requests.Session()
+_session.mount("http://", TimedHTTPAdapter())
+_session.mount("https://", TimedHTTPAdapter())
+
+
+def request_key(payload):
+    """请求指纹：只取模型和消息内容，录制文件可以在不同接口地址下回放"""
+    body = json.dumps(
+        {"model": payload.get("model"), "messages": payload.get("messages")},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+class ReplayMissError(requests.RequestException):
+    """回放文件中没有对应的请求记录（不重试）"""
+
+
+class RecordedResponse:
+    """回放时代替requests.Response的对象"""
+
+    def __init__(self, entry, scale):
+        self.status_code = entry["status"]
+        self.headers = entry.get("headers") or {}
+        self.elapsed = timedelta(seconds=entry.get("ttfb", 0.0) * scale)
+        self._body = entry.get("body", "")
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error (replay)", response=self)
+
+    def json(self):
+        return json.loads(self._body)
+
+    def close(self):
+        pass
+
+
+class Transport:
+    """发送对话请求，支持三种模式：
+
+    live   直接请求接口
+    record 请求接口并把请求/响应及耗时追加到录制文件
+    replay 不访问网络，从录制文件中按请求指纹取出响应，并按录制耗时（乘以倍率）等待
+    """
+
+    def __init__(self, mode="live", path=RECORD_PATH, latency_scale=1.0):
+        self.mode = mode
+        self.path = path
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries = None   # 回放: {key: [entry, ...]}
+        self._cursor = {}      # 回放: {key: 下一条记录的序号}
+
+    def post(self, url, payload, headers, timeout):
+        """发送请求，返回 (response, connect_ms)"""
+        if self.mode == "replay":
+            return self._replay(payload), 0.0
+
+        _timing.connect_ms = 0.0
+        start = time.perf_counter()
+        try:
+            response = _session.post(url, json=payload, headers=headers, timeout=timeout, stream=True)
+            try:
+                body = response.content  # 读取完整响应体，计入总耗时
+            except requests.RequestException:
+                response.close()
+                raise
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if self.mode == "record":
+                self._record(payload, {"error": str(e), "latency": time.perf_counter() - start})
+            raise
+        if self.mode == "record":
+            self._record(payload, {
+                "status": response.status_code,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() == "retry-after"},
+                "body": body.decode("utf-8", errors="replace"),
+                "ttfb": response.elapsed.total_seconds(),
+                "latency": time.perf_counter() - start
+            })
+        return response, _timing.connect_ms
+
+    def _record(self, payload, entry):
+        entry = dict(entry, key=request_key(payload), model=payload.get("model"))
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def _load(self):
+        entries = {}
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    entries.setdefault(entry["key"], []).append(entry)
+        print(f"已加载回放记录: {sum(len(v) for v in entries.values())} 条")
+        return entries
+
+    def _replay(self, payload):
+        key = request_key(payload)
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            recorded = self._entries.get(key)
+            if not recorded:
+                raise ReplayMissError("回放记录中没有该请求")
+            # 同一请求录制了多次（如先失败后重试成功）时按顺序回放，用完后循环
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            entry = recorded[index % len(recorded)]
+
+        if self.latency_scale > 0:
+            time.sleep(entry.get("latency", 0.0) * self.latency_scale)
+        if "error" in entry:
+            raise requests.ConnectionError(f"{entry['error']} (replay)")
+        return RecordedResponse(entry, self.latency_scale)
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(config):
+    """按配置获取传输对象（相同配置共用一个，回放记录只加载一次）"""
+    mode = config.get("TRANSPORT_MODE", "live")
+    path = config.get("TRANSPORT_FILE") or RECORD_PATH
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    scale = float(config.get("REPLAY_LATENCY_SCALE", 1.0))
+    key = (mode, path, scale)
+    with _transports_lock:
+        if key not in _transports:
+            _transports[key] = Transport(mode, path, scale)
+        return _transports[key]
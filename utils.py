@@ -1,5 +1,7 @@
 import csv
 import re
+from functools import lru_cache
+import numpy as np
 from PyQt5 import QtWidgets
 import unicodedata
 
@@ -48,12 +50,90 @@ def clean_text(text):
     text = re.sub(r'\s*\[\d+\]\s*', ' ', text)
     
     return text
+
+def clean_word(w):
+    """
+    清理单词：移除非字母数字字符，保留连字符、撇号和基本标点，
+    同时规范化Unicode字符，特别优化跨行单词处理
+    """
+    # 规范化Unicode：将特殊字符转换为基础形式
+    w = unicodedata.normalize('NFKD', w).encode('ascii', 'ignore').decode('ascii')
+    
+    # 特殊处理跨行连字符情况
+    # 如果单词以连字符开头（可能是跨行单词的第二部分）
+    if w.startswith(('-', '‐', '‑', '–', '—')) and len(w) > 1:
+        w = w[1:]  # 移除开头的连字符
+    
+    # 保留字母、数字、连字符、撇号和基本标点
+    # 注意：保留多种连字符类型以便后续处理
+    cleaned = ''.join(
+        c for c in w 
+        if c.isalnum() or c in ['-', '‐', '‑', '–', '—', "'", '.', ',', ';', ':', '!', '?']
+    ).lower()
+    
+    # 处理常见的OCR错误
+    # 移除结尾的连字符（跨行单词的第一部分）
+    if cleaned.endswith(('-', '‐', '‑', '–', '—')):
+        cleaned = cleaned[:-1]
+    
+    # 统一各种连字符为普通连字符
+    cleaned = cleaned.replace('‐', '-').replace('‑', '-').replace('–', '-').replace('—', '-')
+    
+    # 处理常见缩写
+    if cleaned == "dont": cleaned = "don't"
+    elif cleaned == "cant": cleaned = "can't"
+    elif cleaned == "wont": cleaned = "won't"
+    elif cleaned == "isnt": cleaned = "isn't"
+    elif cleaned == "wasnt": cleaned = "wasn't"
+    elif cleaned == "doesnt": cleaned = "doesn't"
+    elif cleaned == "couldnt": cleaned = "couldn't"
+    elif cleaned == "shouldnt": cleaned = "shouldn't"
+    elif cleaned == "wouldnt": cleaned = "wouldn't"
+    elif cleaned == "arent": cleaned = "aren't"
+    elif cleaned == "havent": cleaned = "haven't"
+    
+    # 特殊处理跨行单词的常见情况
+    # 如果单词以连字符结尾（跨行单词的第一部分）
+    if cleaned.endswith('-') and len(cleaned) > 1:
+        # 保留单词主体部分（去除连字符）
+        cleaned = cleaned[:-1]
+    
+    return cleaned
+
 def calculate_word_similarity(word1, word2):
     """计算两个单词的相似度（0.0-1.0）使用改进的编辑距离 - 增强版"""
-    # 添加Unicode规范化
-    word1 = unicodedata.normalize('NFKD', word1).encode('ascii', 'ignore').decode('ascii')
-    word2 = unicodedata.normalize('NFKD', word2).encode('ascii', 'ignore').decode('ascii')
-    
+    # 添加Unicode规范化（结果缓存）
+    word1 = _normalize_ascii(word1)
+    word2 = _normalize_ascii(word2)
+    return _similarity(word1, _pattern_masks(word1), word2)
+
+def word_similarities(target, candidates):
+    """计算一个单词与一组候选单词的相似度，返回与候选单词顺序对应的数组
+
+    目标单词只规范化并建立位掩码一次；长度差异过大的候选单词直接判为0。
+    结果与逐个调用 calculate_word_similarity 完全相同。
+    """
+    target = _normalize_ascii(target)
+    masks = _pattern_masks(target)
+    scores = {}  # 页面中重复出现的单词只计算一次
+    result = np.zeros(len(candidates))
+    for k, candidate in enumerate(candidates):
+        score = scores.get(candidate)
+        if score is None:
+            score = scores[candidate] = _similarity(target, masks, _normalize_ascii(candidate))
+        result[k] = score
+    return result
+
+def normalize_word(word):
+    """相似度计算使用的规范化形式（去掉重音等非ASCII字符）"""
+    return _normalize_ascii(word)
+
+def edit_distance(word1, word2):
+    """两个单词的编辑距离（位并行算法）"""
+    return _myers_distance(_pattern_masks(word1), len(word1), word2)
+
+def _similarity(word1, masks1, word2):
+    """规范化后的两个单词的相似度；masks1 为 word1 的位掩码表"""
     # 如果完全匹配，返回1.0
     if word1 == word2:
         return 1.0
@@ -82,27 +162,8 @@ def calculate_word_similarity(word1, word2):
     if abs(len1 - len2) / max_len > 0.4:
         return 0.0
     
-    # 创建DP表
-    dp = [[0] * (len2 + 1) for _ in range(len1 + 1)]
-    
-    # 初始化边界条件
-    for i in range(len1 + 1):
-        dp[i][0] = i
-    for j in range(len2 + 1):
-        dp[0][j] = j
-    
-    # 填充DP表
-    for i in range(1, len1 + 1):
-        for j in range(1, len2 + 1):
-            cost = 0 if word1[i-1] == word2[j-1] else 1
-            dp[i][j] = min(
-                dp[i-1][j] + 1,    # 删除
-                dp[i][j-1] + 1,    # 插入
-                dp[i-1][j-1] + cost # 替换
-            )
-    
-    # 计算相似度
-    distance = dp[len1][len2]
+    # 位并行编辑距离
+    distance = _myers_distance(masks1, len1, word2)
     similarity = 1.0 - (distance / max_len)
     
     # 提高常见错误模式的相似度
@@ -115,4 +176,205 @@ def calculate_word_similarity(word1, word2):
             if word1[diff_pos] in vowels and word2[diff_pos] in vowels:
                 similarity = min(1.0, similarity + 0.2)
     
-    return max(0.0, min(1.0, similarity))
\ No newline at end of file
+    return max(0.0, min(1.0, similarity))
+
+@lru_cache(maxsize=65536)
+def _pattern_masks(word):
+    """单词中每个字符出现位置的位掩码 {字符: 掩码}"""
+    masks = {}
+    for pos, c in enumerate(word):
+        masks[c] = masks.get(c, 0) | (1 << pos)
+    return masks
+
+def _myers_distance(masks, len_a, b):
+    """编辑距离（Myers位并行算法）：a 的每一列用一个整数的各位表示，逐个处理 b 的字符
+
+    masks 为 a 的位掩码表；Python整数没有位数限制，适用于任意长度的单词。
+    """
+    if not len_a:
+        return len(b)
+    full = (1 << len_a) - 1
+    high = 1 << (len_a - 1)
+    pv, mv, score = full, 0, len_a
+    for c in b:
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+    return score
+
+@lru_cache(maxsize=65536)
+def _normalize_ascii(word):
+    return unicodedata.normalize('NFKD', word).encode('ascii', 'ignore').decode('ascii')
+
+def _char_codes(words, width, fill):
+    codes = np.full((len(words), max(width, 1)), fill, dtype=np.int32)
+    for k, w in enumerate(words):
+        codes[k, :len(w)] = [ord(c) for c in w]
+    return codes
+
+def _match_masks(words):
+    """每个单词中各字符出现位置的位掩码表 (单词数 × 128)，超过64个字符的单词不填充"""
+    masks = np.zeros((len(words), 128), dtype=np.uint64)
+    for k, w in enumerate(words):
+        if len(w) <= 64:
+            for pos, c in enumerate(w):
+                masks[k, ord(c)] |= np.uint64(1 << pos)
+    return masks
+
+def _bit_parallel_distance(masks, ia, len_a, b, len_b):
+    """批量编辑距离（Myers位并行算法），a为不超过64个字符的单词
+
+    masks: a所在单词组的位掩码表；ia: 每个单词对中a的序号；b: 每个单词对中b的字符编码
+    """
+    # 按b的长度从长到短排序，处理第j个字符时只需计算长度大于j的前缀部分
+    order = np.argsort(-len_b, kind='stable')
+    ia, len_a, b, len_b = ia[order], len_a[order], b[order], len_b[order]
+    active_counts = np.searchsorted(-len_b, -np.arange(int(len_b.max())), side='left')
+
+    one = np.uint64(1)
+    pv = np.where(len_a >= 64, ~np.uint64(0), (one << len_a.astype(np.uint64)) - one)
+    mv = np.zeros_like(pv)
+    high = one << (len_a.astype(np.uint64) - one)
+    score = len_a.astype(np.int64)
+    distance = np.empty_like(score)
+
+    done_from = len(ia)
+    for j, k in enumerate(active_counts):
+        # b已处理完的单词对记录结果
+        distance[k:done_from] = score[k:done_from]
+        done_from = k
+        pv, mv, high, score = pv[:k], mv[:k], high[:k], score[:k]
+
+        eq = masks[ia[:k], b[:k, j]]
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        score = score + ((ph & high) != 0) - ((mh & high) != 0)
+        ph = (ph << one) | one
+        mh = mh << one
+        pv = mh | ~(xv | ph)
+        mv = ph & xv
+    distance[:done_from] = score[:done_from]
+
+    result = np.empty_like(distance)
+    result[order] = distance
+    return result
+
+def _edit_distance(a, len_a, b, len_b):
+    """批量编辑距离：按a的字符逐行推进，每行对所有单词对同时计算（用于超过64个字符的单词）"""
+    # 按a的长度从长到短排序，第i行只需计算长度不小于i的前缀部分
+    order = np.argsort(-len_a, kind='stable')
+    a, len_a, b, len_b = a[order], len_a[order], b[order], len_b[order]
+    active_counts = np.searchsorted(-len_a, -np.arange(int(len_a.max()) + 2), side='right')
+
+    cols = b.shape[1]
+    offsets = np.arange(cols + 1, dtype=np.int32)
+    prev = np.broadcast_to(offsets, (len(a), cols + 1)).copy()
+    distance = np.zeros(len(a), dtype=np.int64)
+    for i in range(1, int(len_a.max()) + 1):
+        k = active_counts[i]
+        cost = a[:k, i - 1, None] != b[:k]
+        current = np.empty((k, cols + 1), dtype=prev.dtype)
+        current[:, 0] = i
+        current[:, 1:] = np.minimum(prev[:k, 1:] + 1, prev[:k, :-1] + cost)
+        # dp[i][j] = min(上/左上, dp[i][j-1] + 1)，整数运算可用前缀最小值一次求出
+        current = np.minimum.accumulate(current - offsets, axis=1) + offsets
+        done = np.arange(active_counts[i + 1], k)
+        distance[done] = current[done, len_b[done]]
+        prev = current
+
+    result = np.empty_like(distance)
+    result[order] = distance
+    return result
+
+def batch_word_similarity(words1, words2):
+    """计算两组单词两两之间的相似度矩阵 (len(words1) × len(words2))
+
+    结果与逐对调用 calculate_word_similarity 完全相同：
+    编辑距离对所有需要计算的组合同时向量化计算，复数、连字符等规则通过字典查找批量处理。
+    """
+    norm1 = [_normalize_ascii(w) for w in words1]
+    norm2 = [_normalize_ascii(w) for w in words2]
+    result = np.zeros((len(norm1), len(norm2)))
+    if not norm1 or not norm2:
+        return result
+
+    len1 = np.array([len(w) for w in norm1])
+    len2 = np.array([len(w) for w in norm2])
+    diff = np.abs(len1[:, None] - len2[None, :])
+    max_len = np.maximum(len1[:, None], len2[None, :])
+
+    # 长度差异不超过40%的组合才计算编辑距离
+    with np.errstate(divide='ignore', invalid='ignore'):
+        close = ~(diff / max_len > 0.4) & (max_len > 0)
+    ia, ib = np.nonzero(close)
+    if ia.size:
+        codes1 = _char_codes(norm1, int(len1.max()), 0)
+        codes2 = _char_codes(norm2, int(len2.max()), -1)
+        distance = np.empty(ia.size, dtype=np.int64)
+        short = len1[ia] <= 64
+        if short.any():
+            distance[short] = _bit_parallel_distance(
+                _match_masks(norm1), ia[short], len1[ia[short]], codes2[ib[short]], len2[ib[short]]
+            )
+        if not short.all():
+            long_ = ~short
+            distance[long_] = _edit_distance(
+                codes1[ia[long_]], len1[ia[long_]], codes2[ib[long_]], len2[ib[long_]]
+            )
+        similarity = 1.0 - (distance / max_len[ia, ib])
+
+        # 单字符差异：元音替换提高相似度
+        single = np.nonzero((distance == 1) & (len1[ia] == len2[ib]))[0]
+        if single.size:
+            a, b = codes1[ia[single]], codes2[ib[single]]
+            width = min(a.shape[1], b.shape[1])
+            pos = np.argmax(a[:, :width] != b[:, :width], axis=1)
+            rows = np.arange(single.size)
+            vowels = [ord(c) for c in "aeiou"]
+            both = np.isin(a[rows, pos], vowels) & np.isin(b[rows, pos], vowels)
+            similarity[single[both]] = np.minimum(1.0, similarity[single[both]] + 0.2)
+
+        result[ia, ib] = np.clip(similarity, 0.0, 1.0)
+
+    positions1, positions2 = {}, {}
+    for i, w in enumerate(norm1):
+        positions1.setdefault(w, []).append(i)
+    for j, w in enumerate(norm2):
+        positions2.setdefault(w, []).append(j)
+
+    def rule_pairs(key):
+        """word1变换后等于word2，或word2变换后等于word1的组合"""
+        pairs = []
+        for i, w in enumerate(norm1):
+            k = key(w)
+            if k is not None:
+                pairs.extend((i, j) for j in positions2.get(k, ()))
+        for j, w in enumerate(norm2):
+            k = key(w)
+            if k is not None:
+                pairs.extend((i, j) for i in positions1.get(k, ()))
+        return pairs
+
+    # 按规则优先级从低到高覆盖：连字符 < 复数/所有格 < 完全相同
+    rules = [
+        (0.92, lambda w: w.replace('-', '') if '-' in w else None),
+        (0.95, lambda w: w[:-1] if w.endswith("s") else None),
+        (0.95, lambda w: w[:-2] if w.endswith("'s") else None),
+        (1.0, lambda w: w),
+    ]
+    for value, key in rules:
+        for i, j in rule_pairs(key):
+            result[i, j] = value
+    return result